@@ -0,0 +1,42 @@
+"""Show that concurrent GameForgeAI.chat calls overlap instead of running back to back.
+
+Run from the project root:
+    python -m benchmarks.bench_concurrency --requests 8 --latency 0.5
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.stub_server import StubServer
+from src.gameforge.ai_client import GameForgeAI, Message
+
+
+async def run(requests: int, latency: float) -> None:
+    messages = [Message(role="user", content="Build a snake game")]
+
+    with StubServer(latency=latency) as server:
+        async with GameForgeAI(api_key="stub", system_prompt="", base_url=server.base_url) as ai:
+            start = time.perf_counter()
+            for _ in range(requests):
+                await ai.chat(messages)
+            sequential = time.perf_counter() - start
+
+            start = time.perf_counter()
+            await asyncio.gather(*(ai.chat(messages) for _ in range(requests)))
+            concurrent = time.perf_counter() - start
+
+    print(f"requests={requests} latency={latency:.2f}s")
+    print(f"sequential: {sequential:.2f}s")
+    print(f"concurrent: {concurrent:.2f}s ({sequential / concurrent:.1f}x faster)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.latency))
+
+
+if __name__ == "__main__":
+    main()
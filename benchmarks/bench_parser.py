@@ -0,0 +1,74 @@
+"""Show that GameForgeParser scales linearly with response size.
+
+Builds synthetic multi-megabyte responses and times both a whole-string parse and a
+streamed parse in small chunks. Time per megabyte should stay flat as size grows.
+
+Run from the project root:
+    python -m benchmarks.bench_parser --sizes 1 2 4 8 --chunk-size 64
+"""
+import argparse
+import time
+
+from src.gameforge.parser import GameForgeParser
+
+FILE_BODY = """function update(dt) {
+  for (let i = 0; i < entities.length; i++) {
+    if (entities[i].x < 0 || entities[i].y > HEIGHT) { entities[i].alive = false; }
+  }
+  ctx.fillText(`<score> ${score}`, 10, 20);
+}
+"""
+
+
+def synthetic_response(megabytes: float, file_size: int = 64 * 1024) -> str:
+    """An artifact with as many file actions of `file_size` bytes as fit in `megabytes`"""
+    body = FILE_BODY * (file_size // len(FILE_BODY))
+    count = max(1, int(megabytes * 1024 * 1024) // len(body))
+    actions = "".join(
+        f'  <forgeAction type="file" filePath="src/module_{i}.js">\n{body}\n  </forgeAction>\n'
+        for i in range(count)
+    )
+    return (
+        "Let's build it.\n\n"
+        '<forgeArtifact id="synthetic" title="Synthetic Benchmark">\n'
+        f"{actions}"
+        '  <forgeAction type="shell">\nnode src/module_0.js\n  </forgeAction>\n'
+        "</forgeArtifact>\n"
+    )
+
+
+def time_parse(text: str) -> float:
+    start = time.perf_counter()
+    GameForgeParser().parse("bench", text)
+    return time.perf_counter() - start
+
+
+def time_stream(text: str, chunk_size: int) -> float:
+    parser = GameForgeParser()
+    start = time.perf_counter()
+    for i in range(0, len(text), chunk_size):
+        parser.feed("bench", text[i:i + chunk_size])
+    parser.finish("bench")
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 2, 4, 8],
+                        help="Response sizes in megabytes")
+    parser.add_argument("--chunk-size", type=int, default=64,
+                        help="Characters per streamed chunk")
+    args = parser.parse_args()
+
+    print(f"{'size (MB)':>10} {'parse (s)':>10} {'s/MB':>8} {'stream (s)':>11} {'s/MB':>8}")
+    for size in args.sizes:
+        text = synthetic_response(size)
+        megabytes = len(text) / (1024 * 1024)
+        parse_time = time_parse(text)
+        stream_time = time_stream(text, args.chunk_size)
+        print(f"{megabytes:>10.2f} {parse_time:>10.3f} {parse_time / megabytes:>8.3f} "
+              f"{stream_time:>11.3f} {stream_time / megabytes:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
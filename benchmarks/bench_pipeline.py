@@ -0,0 +1,167 @@
+"""End-to-end pipeline benchmark against the local Messages API stub.
+
+Drives GameForgeChat.send_message (API client, continuation, parser, scheduler and
+executor) for a batch of games in blocking and streaming mode. Then it times
+GameForgeParser.parse and GameForgeExecutor on their own. It reports throughput,
+latency percentiles and peak traced memory. The recorded example-game responses are
+replayed. Shell actions are skipped so the numbers do not depend on pip or node.
+
+Run from the project root:
+    python -m benchmarks.bench_pipeline --games 12 --concurrency 4 --latency 0.2 \\
+        --tokens-per-second 4000 --max-output-tokens 2048 --error-rate 0.1
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.stub_server import StubServer, load_recorded_responses
+from src.gameforge.ai_client import GameForgeAI, GameForgeChat
+from src.gameforge.executor import GameForgeExecutor
+from src.gameforge.instrumentation import Instrumentation, percentile
+from src.gameforge.parser import ActionType, GameForgeParser
+
+MEGABYTE = 1024 * 1024
+
+
+def report(name: str, count: int, wall: float, megabytes: float, latencies: List[float],
+           peak_bytes: int, extra: str = "") -> None:
+    print(
+        f"{name:<22} {count:>6} {wall:>8.2f} {count / wall:>9.1f} {megabytes / wall:>8.2f} "
+        f"{percentile(latencies, 50) * 1000:>9.1f} {percentile(latencies, 95) * 1000:>9.1f} "
+        f"{percentile(latencies, 99) * 1000:>9.1f} {peak_bytes / MEGABYTE:>9.1f}  {extra}"
+    )
+
+
+def measure(fn: Callable[[], Tuple[int, float, List[float]]]) -> Tuple[int, float, float, List[float], int]:
+    """Run `fn` under tracemalloc; returns count, wall time, megabytes, latencies and peak bytes"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    count, megabytes, latencies = fn()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, wall, megabytes, latencies, peak
+
+
+async def run_games(base_url: str, work_dir: str, games: int, concurrency: int,
+                    stream: bool) -> Tuple[int, float, List[float]]:
+    latencies: List[float] = []
+    output_chars = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with GameForgeAI(api_key="stub", system_prompt="", base_url=base_url,
+                           max_connections=concurrency, instrumentation=Instrumentation(),
+                           max_retries=10) as ai:
+        async def one(index: int) -> None:
+            nonlocal output_chars
+            async with semaphore:
+                executor = GameForgeExecutor(work_dir=work_dir, output_dir=f"{work_dir}/game_{index}",
+                                             instrumentation=ai.instrumentation, run_shell=False)
+                chat = GameForgeChat(ai, GameForgeParser(), executor, stream=stream)
+                start = time.perf_counter()
+                response = await chat.send_message(f"Create game number {index}")
+                latencies.append(time.perf_counter() - start)
+                output_chars += len(response)
+
+        await asyncio.gather(*(one(i) for i in range(games)))
+    return games, output_chars / MEGABYTE, latencies
+
+
+def bench_parser(responses: List[str], repeat: int, chunk_size: int) -> Dict[str, Callable]:
+    def whole() -> Tuple[int, float, List[float]]:
+        latencies = []
+        for _ in range(repeat):
+            for text in responses:
+                start = time.perf_counter()
+                GameForgeParser().parse("bench", text)
+                latencies.append(time.perf_counter() - start)
+        return len(latencies), sum(map(len, responses)) * repeat / MEGABYTE, latencies
+
+    def streamed() -> Tuple[int, float, List[float]]:
+        latencies = []
+        for _ in range(repeat):
+            for text in responses:
+                parser = GameForgeParser()
+                start = time.perf_counter()
+                for i in range(0, len(text), chunk_size):
+                    parser.feed("bench", text[i:i + chunk_size])
+                parser.finish("bench")
+                latencies.append(time.perf_counter() - start)
+        return len(latencies), sum(map(len, responses)) * repeat / MEGABYTE, latencies
+
+    return {"parse (whole)": whole, f"parse ({chunk_size}-char chunks)": streamed}
+
+
+def bench_executor(responses: List[str], work_dir: str) -> Dict[str, Callable]:
+    actions = [
+        action for text in responses
+        for action in GameForgeParser().parse("bench", text).actions
+        if action.type == ActionType.FILE
+    ]
+    executor = GameForgeExecutor(work_dir=work_dir, output_dir=f"{work_dir}/executor")
+
+    def write_pass() -> Tuple[int, float, List[float]]:
+        latencies = []
+        for action in actions:
+            start = time.perf_counter()
+            executor.execute_action(action)
+            latencies.append(time.perf_counter() - start)
+        return len(actions), sum(len(action.content) for action in actions) / MEGABYTE, latencies
+
+    # The first pass creates every file; the second finds them unchanged
+    return {"executor (write)": write_pass, "executor (unchanged)": write_pass}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=12, help="Games generated per mode")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub time to first byte in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=4000, help="Stub output token rate (0 = unpaced)")
+    parser.add_argument("--max-output-tokens", type=int, help="Truncate stub replies to force continuations")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429/529")
+    parser.add_argument("--repeat", type=int, default=20, help="Parser passes over the recorded responses")
+    parser.add_argument("--chunk-size", type=int, default=64)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    responses = load_recorded_responses()
+    if not responses:
+        raise SystemExit("No recorded responses found under src/games/*/responses")
+
+    print(f"{'stage':<22} {'items':>6} {'wall (s)':>8} {'items/s':>9} {'MB/s':>8} "
+          f"{'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'peak (MB)':>9}")
+
+    for stream in (False, True):
+        with tempfile.TemporaryDirectory() as work_dir, StubServer(
+            responses=responses,
+            latency=args.latency,
+            tokens_per_second=args.tokens_per_second or None,
+            max_output_tokens=args.max_output_tokens,
+            error_rate=args.error_rate,
+            seed=0,
+        ) as server:
+            count, wall, megabytes, latencies, peak = measure(
+                lambda: asyncio.run(run_games(server.base_url, work_dir, args.games, args.concurrency, stream))
+            )
+            stats = server.stats
+            extra = (f"requests={stats.get('requests', 0)} truncated={stats.get('truncated', 0)} "
+                     f"errors={stats.get('errors_429', 0) + stats.get('errors_529', 0)}")
+            report(f"send_message ({'stream' if stream else 'blocking'})",
+                   count, wall, megabytes, latencies, peak, extra)
+
+    for name, fn in bench_parser(responses, args.repeat, args.chunk_size).items():
+        report(name, *measure(fn))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, fn in bench_executor(responses, work_dir).items():
+            report(name, *measure(fn))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Local stand-in for the Anthropic Messages API used by the benchmarks.
+
+Replays recorded responses, whole or as a server-sent event stream, with
+configurable latency, output token rate, max_tokens truncation and injected
+429/529 errors. Point GameForgeAI at it with base_url=server.base_url.
+"""
+import glob
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+
+CHARS_PER_TOKEN = 4
+STREAM_CHUNK_CHARS = 64
+
+RECORDED_RESPONSES = os.path.join(os.path.dirname(__file__), "..", "src", "games", "*", "responses", "*.txt")
+
+ERROR_TYPES = {
+    429: "rate_limit_error",
+    500: "api_error",
+    529: "overloaded_error",
+}
+
+
+def load_recorded_responses(pattern: str = RECORDED_RESPONSES) -> List[str]:
+    """Read the sample responses shipped with the example games"""
+    responses = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, "r", encoding="utf-8") as f:
+            responses.append(f.read())
+    return responses
+
+
+def _text_of(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
+
+
+class StubMessagesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("content-length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        server.record("requests")
+
+        status = server.next_error()
+        if status:
+            server.record(f"errors_{status}")
+            time.sleep(server.latency / 2)
+            self._send_error(status)
+            return
+
+        text, stop_reason = server.reply(request)
+        input_tokens = sum(len(_text_of(m["content"])) for m in request.get("messages", [])) // CHARS_PER_TOKEN
+        output_tokens = len(text) // CHARS_PER_TOKEN + 1
+        if stop_reason == "max_tokens":
+            server.record("truncated")
+
+        time.sleep(server.latency)
+        if request.get("stream"):
+            server.record("streamed")
+            self._send_stream(request, text, stop_reason, input_tokens, output_tokens)
+        else:
+            if server.tokens_per_second:
+                time.sleep(output_tokens / server.tokens_per_second)
+            self._send_message(request, text, stop_reason, input_tokens, output_tokens)
+
+    def _message(self, request: dict, content: list, stop_reason: Optional[str],
+                 input_tokens: int, output_tokens: int) -> dict:
+        return {
+            "id": f"msg_{uuid.uuid4().hex}",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "stub"),
+            "content": content,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cache_creation_input_tokens": 0,
+                "cache_read_input_tokens": 0,
+            },
+        }
+
+    def _send_message(self, request, text, stop_reason, input_tokens, output_tokens) -> None:
+        body = json.dumps(self._message(
+            request, [{"type": "text", "text": text}], stop_reason, input_tokens, output_tokens
+        )).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, request, text, stop_reason, input_tokens, output_tokens) -> None:
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("cache-control", "no-cache")
+        self.send_header("transfer-encoding", "chunked")
+        self.end_headers()
+
+        self._event("message_start", {
+            "type": "message_start",
+            "message": self._message(request, [], None, input_tokens, 1),
+        })
+        self._event("content_block_start", {
+            "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""},
+        })
+        delay = (STREAM_CHUNK_CHARS / CHARS_PER_TOKEN / self.server.tokens_per_second
+                 if self.server.tokens_per_second else 0)
+        for start in range(0, len(text), STREAM_CHUNK_CHARS):
+            if delay:
+                time.sleep(delay)
+            self._event("content_block_delta", {
+                "type": "content_block_delta", "index": 0,
+                "delta": {"type": "text_delta", "text": text[start:start + STREAM_CHUNK_CHARS]},
+            })
+        self._event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._event("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+            "usage": {"output_tokens": output_tokens},
+        })
+        self._event("message_stop", {"type": "message_stop"})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _event(self, name: str, data: dict) -> None:
+        payload = f"event: {name}\ndata: {json.dumps(data)}\n\n".encode()
+        self.wfile.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+        self.wfile.flush()
+
+    def _send_error(self, status: int) -> None:
+        body = json.dumps({
+            "type": "error",
+            "error": {"type": ERROR_TYPES.get(status, "api_error"), "message": f"Stub error {status}"},
+        }).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.send_header("retry-after-ms", str(int(self.server.retry_after * 1000)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, responses: Sequence[str], latency: float, tokens_per_second: Optional[float],
+                 max_output_tokens: Optional[int], errors: Sequence[int], error_rate: float,
+                 retry_after: float, seed: Optional[int]):
+        super().__init__(address, StubMessagesHandler)
+        self.responses = list(responses)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.max_output_tokens = max_output_tokens
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.stats: Dict[str, int] = {}
+        self._errors = list(errors)
+        self._next_response = itertools.cycle(range(len(self.responses)))
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def record(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def next_error(self) -> Optional[int]:
+        """Scripted errors first, then random 429/529s at error_rate"""
+        with self._lock:
+            if self._errors:
+                return self._errors.pop(0)
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self._random.choice((429, 529))
+        return None
+
+    def reply(self, request: dict):
+        """Pick the response text and stop reason for a request
+
+        A request ending in an assistant turn is a continuation: the reply is the
+        rest of the recorded response that starts with that prefill.
+        """
+        messages = request.get("messages", [])
+        prefill = ""
+        if messages and messages[-1].get("role") == "assistant":
+            prefill = _text_of(messages[-1]["content"])
+
+        text = None
+        if prefill:
+            text = next((r[len(prefill):] for r in self.responses if r.startswith(prefill)), None)
+        if text is None:
+            with self._lock:
+                text = self.responses[next(self._next_response)]
+
+        limit = min(filter(None, (request.get("max_tokens"), self.max_output_tokens)), default=None)
+        if limit and len(text) > limit * CHARS_PER_TOKEN:
+            return text[:limit * CHARS_PER_TOKEN], "max_tokens"
+        return text, "end_turn"
+
+
+class StubServer:
+    """Serve canned Messages API responses from a background thread
+
+    `responses` are replayed round-robin (a single `response_text` is also accepted).
+    `latency` delays the first byte, `tokens_per_second` paces the output,
+    `max_output_tokens` truncates replies with stop_reason "max_tokens", and
+    `errors` / `error_rate` inject 429 and 529 responses carrying retry-after-ms.
+    """
+
+    def __init__(self, response_text: str = "Done.", latency: float = 0.5,
+                 host: str = "127.0.0.1", port: int = 0, responses: Optional[Sequence[str]] = None,
+                 tokens_per_second: Optional[float] = None, max_output_tokens: Optional[int] = None,
+                 errors: Sequence[int] = (), error_rate: float = 0.0, retry_after: float = 0.05,
+                 seed: Optional[int] = None):
+        self.httpd = StubHTTPServer(
+            (host, port),
+            responses=responses or [response_text],
+            latency=latency,
+            tokens_per_second=tokens_per_second,
+            max_output_tokens=max_output_tokens,
+            errors=errors,
+            error_rate=error_rate,
+            retry_after=retry_after,
+            seed=seed,
+        )
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return dict(self.httpd.stats)
+
+    def __enter__(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -1,12 +1,25 @@
+import argparse
 import asyncio
 import os
 from dotenv import load_dotenv
 import logging
-from src.gameforge.prompts import SystemConstraints
+from src.gameforge.prompts import SystemConstraints, build_game_prompt
 from src.gameforge.parser import GameForgeParser, GameForgeAction
 from src.gameforge.executor import GameForgeExecutor
 from src.gameforge.ai_client import GameForgeAI, GameForgeChat
-import json
+from src.gameforge.batch import load_game_spec, run_batch
+from src.gameforge.bundler import BundleServer, bundle_game
+from src.gameforge.best_of import BestOfN, print_candidate_report
+from src.gameforge.cache import ResponseCache
+from src.gameforge.checkpoint import RunCheckpoint
+from src.gameforge.deps import DependencyCache
+from src.gameforge.fanout import PlanFanOut
+from src.gameforge.instrumentation import Instrumentation
+from src.gameforge.profiler import DEFAULT_FRAME_BUDGET_MS, FrameProfiler
+from src.gameforge.skeletons import list_skeletons, load_skeleton
+from src.gameforge.spec_compiler import SpecCompiler
+from src.gameforge.validator import GameValidator
+from src.gameforge.watch import SpecWatcher
 
 # Configure logging
 logging.basicConfig(
@@ -18,7 +31,139 @@ def get_project_root() -> str:
     """Get the absolute path to the project root directory"""
     return os.path.abspath(os.path.dirname(__file__))
 
+def parse_args() -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Generate a game from game_spec.json")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream the response and write each file as soon as it is complete"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="PATH_OR_GLOB",
+        help="Generate every spec file in a directory or matching a glob concurrently"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of games generated at once in batch mode, or of files with --fan-out"
+    )
+    parser.add_argument("--rpm", type=int, help="Requests-per-minute budget in batch mode")
+    parser.add_argument("--tpm", type=int, help="Tokens-per-minute budget in batch mode")
+    parser.add_argument(
+        "--metrics-file",
+        help="JSON lines file that per-stage timing spans are appended to (default: ai_output/metrics.jsonl)"
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print a per-stage timing and token summary at the end of the run"
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="Syntax-check and headlessly run the generated game, requesting repairs on failure"
+    )
+    parser.add_argument(
+        "--max-repairs",
+        type=int,
+        default=1,
+        help="Maximum number of automatic repair turns after failed validation"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk response cache and always call the API"
+    )
+    parser.add_argument(
+        "--best-of",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Generate N candidates concurrently at different temperatures and keep the best one"
+    )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="latest",
+        metavar="RUN_ID",
+        help="Resume an interrupted run from its checkpoint in ai_output/runs (default: the latest run)"
+    )
+    parser.add_argument(
+        "--compact-spec",
+        action="store_true",
+        help="Send a compact re-rendering of the markdown spec instead of the verbatim text"
+    )
+    parser.add_argument(
+        "--skeleton",
+        choices=list_skeletons(),
+        help="Install a pre-written skeleton and have the model generate only the game-specific modules"
+    )
+    parser.add_argument(
+        "--wheel-cache",
+        action="store_true",
+        help="Serve pip installs from generated shell actions through a local wheel cache instead of running them as written"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After generating, keep watching game_spec.json and send each edit as a refinement turn"
+    )
+    parser.add_argument(
+        "--fan-out",
+        action="store_true",
+        help="Plan the files first, then generate each file with its own concurrent request"
+    )
+    parser.add_argument(
+        "--bundle",
+        action="store_true",
+        help="Write a minified, precompressed build with extracted assets to the output's dist directory"
+    )
+    parser.add_argument(
+        "--serve",
+        nargs="?",
+        type=int,
+        const=8000,
+        metavar="PORT",
+        help="Bundle the game and serve the build locally (default port: 8000); implies --bundle"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run the game headlessly with scripted input and check its frame times against a budget"
+    )
+    parser.add_argument(
+        "--frame-budget",
+        type=float,
+        default=DEFAULT_FRAME_BUDGET_MS,
+        metavar="MS",
+        help="Maximum p95 frame time in milliseconds for --profile (default: one frame at 60 fps)"
+    )
+    parser.add_argument(
+        "--profile-frames",
+        type=int,
+        default=600,
+        metavar="N",
+        help="Number of frames to profile"
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Send the profile's hotspots back as an optimization turn when over budget; implies --profile"
+    )
+    args = parser.parse_args()
+    if args.optimize:
+        args.profile = True
+    if args.serve is not None:
+        args.bundle = True
+    if args.fan_out and args.best_of > 1:
+        parser.error("--fan-out cannot be combined with --best-of")
+    return args
+
 async def main():
+    args = parse_args()
     try:
         # Load environment variables
         load_dotenv()
@@ -27,45 +172,130 @@ async def main():
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY not found in environment")
 
-        # Read game specification from JSON file
-        try:
-            with open('game_spec.json', 'r', encoding='utf-8') as f:
-                game_data = json.load(f)
-                
-            game_name = game_data['game_name']
-            spec = game_data['spec']
-            
-            # Construct the complete prompt
-            user_input = f"""Create a browser game called {game_name} that is described as follows:\n\n{spec}"""
-        except FileNotFoundError:
-            raise FileNotFoundError("game_spec.json not found")
-        except KeyError as e:
-            raise KeyError(f"Missing required key in game_spec.json: {e}")
-        except json.JSONDecodeError:
-            raise ValueError("Invalid JSON format in game_spec.json")
+        project_root = get_project_root()
+        cache = None if args.no_cache else ResponseCache(os.path.join(project_root, ".gameforge_cache"))
+        dependency_cache = (
+            DependencyCache(os.path.join(project_root, ".gameforge_wheels")) if args.wheel_cache else None
+        )
+        os.makedirs(os.path.join(project_root, "ai_output"), exist_ok=True)
+        runs_dir = os.path.join(project_root, "ai_output", "runs")
+        checkpoint = None
+        if args.resume:
+            checkpoint = RunCheckpoint.load(runs_dir, None if args.resume == "latest" else args.resume)
+            if checkpoint.complete:
+                print(f"Run {checkpoint.run_id} already completed; nothing to resume")
+                return
+            if checkpoint.pending is None and not checkpoint.history:
+                print(f"Run {checkpoint.run_id} was interrupted before its first message; nothing to resume")
+                return
+        instrumentation = Instrumentation(
+            path=args.metrics_file or os.path.join(project_root, "ai_output", "metrics.jsonl"),
+            run_id=checkpoint.run_id if checkpoint else None
+        )
+
+        validator = GameValidator() if args.validate else None
+        profiler = FrameProfiler(frames=args.profile_frames, budget_ms=args.frame_budget) if args.profile else None
+        skeleton = load_skeleton(args.skeleton) if args.skeleton else None
+        spec_compiler = (
+            SpecCompiler(None if args.no_cache else os.path.join(project_root, ".gameforge_cache", "specs"))
+            if args.compact_spec else None
+        )
+
+        if args.batch:
+            constraints = SystemConstraints(work_dir=project_root)
+            await run_batch(
+                api_key=api_key,
+                system_prompt=constraints.get_static_prompt(),
+                system_context=constraints.get_runtime_prompt(),
+                work_dir=project_root,
+                pattern=args.batch,
+                concurrency=args.concurrency,
+                requests_per_minute=args.rpm,
+                tokens_per_minute=args.tpm,
+                stream=args.stream,
+                cache=cache,
+                instrumentation=instrumentation,
+                validator=validator,
+                max_repairs=args.max_repairs,
+                dependency_cache=dependency_cache,
+                spec_compiler=spec_compiler,
+                skeleton=skeleton,
+                bundle=args.bundle,
+                profiler=profiler,
+                optimize=args.optimize
+            )
+            if args.timings:
+                instrumentation.print_summary()
+            return
+
+        if checkpoint:
+            # The interrupted message is sent again and continues from its checkpoint
+            game_name = checkpoint.state["game_name"]
+            user_input = checkpoint.pending.user_message if checkpoint.pending else None
+            spec = checkpoint.state.get("spec")
+        else:
+            with instrumentation.span("prompt_build") as span:
+                # Read game specification from JSON file
+                game = load_game_spec('game_spec.json')
+                game_name = game.game_name
+                spec = game.spec
+                if spec_compiler:
+                    compiled = spec_compiler.compile(spec)
+                    spec = compiled.text
+                    span["spec_tokens_before"] = compiled.original_tokens
+                    span["spec_tokens_after"] = compiled.compiled_tokens
+
+                # Construct the complete prompt
+                user_input = build_game_prompt(game.game_name, spec, skeleton)
+            if args.best_of == 1 and not args.fan_out:
+                checkpoint = RunCheckpoint.create(runs_dir, instrumentation.run_id, game_name, spec)
 
         # Initialize system constraints and output directory
-        project_root = get_project_root()
         output_dir = os.path.join(project_root, "ai_output")
         os.makedirs(output_dir, exist_ok=True)
         
         # Initialize components without callbacks
         constraints = SystemConstraints(work_dir=project_root)
-        executor = GameForgeExecutor(work_dir=project_root)
+        executor = GameForgeExecutor(
+            work_dir=project_root,
+            instrumentation=instrumentation,
+            dependency_cache=dependency_cache
+        )
         parser = GameForgeParser()
+        if skeleton and not args.resume:
+            # A resumed run keeps the skeleton files as the interrupted run left them, patches included
+            executor.install_skeleton(skeleton)
         
         # Initialize AI and chat
         ai = GameForgeAI(
             api_key=api_key,
-            system_prompt=constraints.get_system_prompt()
+            system_prompt=constraints.get_static_prompt(),
+            system_context=constraints.get_runtime_prompt(),
+            cache=cache,
+            instrumentation=instrumentation
         )
-        chat = GameForgeChat(ai, parser, executor)
+        chat = GameForgeChat(ai, parser, executor, stream=args.stream, checkpoint=checkpoint)
 
-        print("User:", user_input)
-        print("GameForge:", end=" ")
+        if user_input:
+            print("User:", user_input)
+            print("GameForge:", end=" ")
         
         # Get response and save it
-        response = await chat.send_message(user_input)
+        if user_input is None:
+            # Interrupted after the last message finished (e.g. during validation)
+            response = chat.message_history[-1].content
+        elif args.best_of > 1:
+            best_of = BestOfN(ai, executor, n=args.best_of, stream=args.stream,
+                              validator=validator, skeleton=skeleton)
+            winner = await best_of.run(user_input)
+            print_candidate_report(best_of.candidates, winner)
+            chat = winner.chat
+            response = winner.response
+        elif args.fan_out and not checkpoint:
+            fan_out = PlanFanOut(chat, max_concurrency=args.concurrency, skeleton=skeleton)
+            response = await fan_out.run(user_input)
+        else:
+            response = await chat.send_message(user_input)
         
         # Save the response
         response_dir = os.path.join(output_dir, "responses")
@@ -77,12 +307,69 @@ async def main():
         
         print(f"\nResponse saved to: {response_file}")
         print(response)
+
+        if validator:
+            report = await validator.validate_and_repair(chat, args.max_repairs)
+            print(f"Validation: {report.format()}")
+        if profiler:
+            with instrumentation.span("profile") as span:
+                if args.optimize:
+                    profile = await profiler.profile_and_optimize(chat, validator=validator,
+                                                                  max_repairs=args.max_repairs)
+                else:
+                    profile = await profiler.profile(executor.output_dir)
+                span.update(frames=len(profile.frames), p95_ms=profile.stat("total_ms", 95), ok=profile.ok)
+            profile.save(os.path.join(runs_dir, instrumentation.run_id, "profile.json"))
+            print(f"Profile: {profile.format()}")
+        print(f"Files: {chat.write_summary}")
+        print(
+            f"Tokens: {chat.usage.input_tokens} input, "
+            f"{chat.usage.cache_creation_input_tokens} cache write, "
+            f"{chat.usage.cache_read_input_tokens} cache read, "
+            f"{chat.usage.output_tokens} output"
+        )
+        if checkpoint:
+            checkpoint.mark_complete()
+
+        def build_bundle():
+            with instrumentation.span("bundle") as span:
+                bundle = bundle_game(executor.output_dir)
+                span.update(source_bytes=bundle.source_bytes, compressed_bytes=bundle.compressed_bytes)
+            print(f"Bundle: {bundle.format()}")
+            return bundle
+
+        server = None
+        if args.bundle:
+            bundle = await asyncio.to_thread(build_bundle)
+            if args.serve is not None and bundle.files:
+                server = BundleServer(bundle.dist_dir, port=args.serve).start()
+                print(f"Serving the bundle at {server.url} (Ctrl-C to stop)")
+        if args.timings:
+            instrumentation.print_summary()
+
+        if args.watch:
+            # The client and chat stay warm; each spec edit becomes a patch turn
+            print("Watching game_spec.json for changes (Ctrl-C to stop)")
+            if spec is None:
+                # Resumed from a checkpoint that did not record the spec: assume the current file
+                game = load_game_spec('game_spec.json')
+                spec = spec_compiler.compile(game.spec).text if spec_compiler else game.spec
+            watcher = SpecWatcher(chat, 'game_spec.json', spec_compiler=spec_compiler,
+                                  validator=validator, max_repairs=args.max_repairs, baseline=spec,
+                                  on_refined=build_bundle if args.bundle else None)
+            await watcher.run()
+        elif server:
+            # Serve until interrupted
+            await asyncio.Event().wait()
         
     finally:
         # Cleanup resources
         if 'chat' in locals():
-            if chat.ai and hasattr(chat.ai, 'client') and chat.ai.client:
-                await chat.ai.client.close()
+            await chat.ai.close()
+        if locals().get('validator'):
+            validator.close()
+        if locals().get('server'):
+            server.close()
         
         # Cancel all remaining tasks
         for task in asyncio.all_tasks():
@@ -1,101 +1,503 @@
-from dataclasses import dataclass
-from typing import List, AsyncIterator, Optional, AsyncGenerator
+from dataclasses import dataclass, asdict
+from typing import List, AsyncIterator, Optional, AsyncGenerator, Callable
 import anthropic
 import asyncio
+import httpx
 import json
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
 from .parser import GameForgeParser
-from .executor import GameForgeExecutor
+from .executor import GameForgeExecutor, WriteSummary
+from .scheduler import ActionScheduler
+from .history import HistoryManager
+from .prompts import get_patch_prompt
+from .cache import ResponseCache
+from .checkpoint import PendingMessage, RunCheckpoint
+from .instrumentation import Instrumentation
+from .rate_limit import RateLimiter
+from .tokens import TokenUsage, estimate_tokens
 import re
 
+logger = logging.getLogger(__name__)
+
+# Exponential backoff for retryable API errors, unless the server sends retry-after
+RETRY_BASE_DELAY = 1.0
+MAX_RETRY_DELAY = 120.0
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
 @dataclass
 class Message:
     role: str  # 'user' or 'assistant'
     content: str
 
+@dataclass
+class Completion:
+    text: str
+    stop_reason: Optional[str]
+    usage: TokenUsage
+
 class GameForgeAI:
-    def __init__(self, api_key: str, system_prompt: str):
-        self.client = anthropic.Anthropic(api_key=api_key)
+    def __init__(self, api_key: str, system_prompt: str, system_context: Optional[str] = None,
+                 base_url: Optional[str] = None,
+                 max_connections: int = 20, http_client: Optional[httpx.AsyncClient] = None,
+                 rate_limiter: Optional[RateLimiter] = None, cache: Optional[ResponseCache] = None,
+                 instrumentation: Optional[Instrumentation] = None, max_retries: int = 5):
+        # A single pooled HTTP client lets concurrent requests reuse keep-alive connections.
+        # Callers running several GameForgeAI instances can pass one in to share the pool.
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or anthropic.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+        # Retries are handled here so that they honour retry-after and are instrumented
+        self.client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=self.http_client,
+            max_retries=0
+        )
+        self.max_retries = max_retries
         self.system_prompt = system_prompt
+        self.system_context = system_context
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.instrumentation = instrumentation or Instrumentation()
+
+    async def __aenter__(self) -> "GameForgeAI":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
 
     async def close(self):
-        """Close the AI client and cleanup resources"""
-        if hasattr(self.client, 'close'):
-            await self.client.close()
+        """Close the AI client and release its pooled HTTP connections"""
+        if self._owns_http_client and not self.http_client.is_closed:
+            await self.http_client.aclose()
 
     async def chat(self, messages: List[Message]) -> str:
         """Get complete chat response from the AI"""
-        try:
-            formatted_messages = [
-                {"role": msg.role, "content": msg.content}
-                for msg in messages
-            ]
-
-            response = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=4096,
-                system=self.system_prompt,
-                messages=formatted_messages,
-                temperature=0.2,
-                top_p=0.2
+        completion = await self.complete(messages)
+        return completion.text
+
+    async def complete(self, messages: List[Message], temperature: Optional[float] = None) -> Completion:
+        """Get the complete response together with its stop reason and token usage"""
+        params = self._request_params(messages, temperature)
+        cached = self._cache_get(params)
+        if cached:
+            self.instrumentation.record("api.cache_hit", 0.0)
+            return cached
+
+        estimated_tokens = await self._acquire(params)
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = await self.client.beta.prompt_caching.messages.create(**params)
+                break
+            except Exception as e:
+                if not await self._backoff(e, attempt):
+                    print(f"Error in chat: {e}")
+                    raise
+                attempt += 1
+
+        completion = self._to_completion(response)
+        self._record_api(started, None, completion)
+        self._release(estimated_tokens, completion.usage)
+        self._cache_put(params, completion)
+        return completion
+
+    async def chat_stream(self, messages: List[Message],
+                          on_complete: Optional[Callable[[Completion], None]] = None,
+                          temperature: Optional[float] = None) -> AsyncIterator[str]:
+        """Stream the chat response from the AI as text chunks
+
+        `on_complete` receives the final Completion once the stream has finished.
+        """
+        params = self._request_params(messages, temperature)
+        cached = self._cache_get(params)
+        if cached:
+            self.instrumentation.record("api.cache_hit", 0.0)
+            yield cached.text
+            if on_complete:
+                on_complete(cached)
+            return
+
+        estimated_tokens = await self._acquire(params)
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            first_token = None
+            try:
+                async with self.client.beta.prompt_caching.messages.stream(**params) as stream:
+                    async for text in stream.text_stream:
+                        if first_token is None:
+                            first_token = time.perf_counter() - started
+                        yield text
+                    message = await stream.get_final_message()
+                break
+            except Exception as e:
+                # Text that was already yielded cannot be taken back, so only retry before it
+                if first_token is not None or not await self._backoff(e, attempt):
+                    print(f"Error in chat stream: {e}")
+                    raise
+                attempt += 1
+
+        completion = self._to_completion(message)
+        self._record_api(started, first_token, completion)
+        self._release(estimated_tokens, completion.usage)
+        self._cache_put(params, completion)
+        if on_complete:
+            on_complete(completion)
+
+    async def _backoff(self, error: Exception, attempt: int) -> bool:
+        """Sleep before retrying a retryable error; return False if it should be raised"""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return False
+        delay = retry_after(error)
+        if delay is None:
+            delay = RETRY_BASE_DELAY * 2 ** attempt * (1 + random.random() / 2)
+        delay = min(delay, MAX_RETRY_DELAY)
+        logger.warning(f"{type(error).__name__}: {error}; retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        self.instrumentation.record("api.retry", delay, error=type(error).__name__, attempt=attempt + 1)
+        await asyncio.sleep(delay)
+        return True
+
+    def _record_api(self, started: float, first_token: Optional[float], completion: Completion) -> None:
+        """Record time to first token and total generation time with the call's token usage"""
+        duration = time.perf_counter() - started
+        # A blocking call only returns once generation is complete
+        self.instrumentation.record("api.first_token", duration if first_token is None else first_token)
+        self.instrumentation.record(
+            "api.generate",
+            duration,
+            stop_reason=completion.stop_reason,
+            **asdict(completion.usage)
+        )
+
+    def _cache_get(self, params: dict) -> Optional[Completion]:
+        """Replay a cached response; hits cost no tokens"""
+        if not self.cache:
+            return None
+        entry = self.cache.get(ResponseCache.make_key(params))
+        if entry is None:
+            return None
+        return Completion(text=entry["text"], stop_reason=entry["stop_reason"], usage=TokenUsage())
+
+    def _cache_put(self, params: dict, completion: Completion) -> None:
+        if self.cache:
+            self.cache.put(ResponseCache.make_key(params), {
+                "text": completion.text,
+                "stop_reason": completion.stop_reason,
+                "usage": asdict(completion.usage)
+            })
+
+    async def _acquire(self, params: dict) -> int:
+        """Wait for the rate limiter and return the tokens reserved for this request"""
+        if not self.rate_limiter:
+            return 0
+        estimated_tokens = estimate_tokens(str(params["system"])) + sum(
+            estimate_tokens(str(message["content"])) for message in params["messages"]
+        )
+        await self.rate_limiter.acquire(estimated_tokens)
+        return estimated_tokens
+
+    def _release(self, estimated_tokens: int, usage: TokenUsage) -> None:
+        if self.rate_limiter:
+            self.rate_limiter.record(estimated_tokens, usage.total_tokens)
+
+    def _to_completion(self, response) -> Completion:
+        return Completion(
+            text=response.content[0].text if response.content else "",
+            stop_reason=response.stop_reason,
+            usage=TokenUsage(
+                input_tokens=response.usage.input_tokens,
+                output_tokens=response.usage.output_tokens,
+                cache_creation_input_tokens=getattr(response.usage, "cache_creation_input_tokens", None) or 0,
+                cache_read_input_tokens=getattr(response.usage, "cache_read_input_tokens", None) or 0
             )
-            
-            return response.content[0].text
-        except Exception as e:
-            print(f"Error in chat: {e}")
-            raise
+        )
+
+    def _request_params(self, messages: List[Message], temperature: Optional[float] = None) -> dict:
+        """Build the Messages API parameters shared by blocking and streaming calls
+
+        An explicit `temperature` replaces the default near-deterministic sampling
+        (temperature and top_p of 0.2), so callers can ask for varied responses.
+        """
+        formatted_messages = [
+            {"role": msg.role, "content": msg.content}
+            for msg in messages
+        ]
+        sampling = dict(temperature=0.2, top_p=0.2) if temperature is None else dict(temperature=temperature)
+
+        return dict(
+            model="claude-3-5-sonnet-20241022",
+            max_tokens=4096,
+            system=self._system_blocks(),
+            messages=formatted_messages,
+            **sampling
+        )
+
+    def _system_blocks(self) -> List[dict]:
+        """Mark the static system prompt as a cacheable prefix, followed by the per-run context"""
+        blocks = [{
+            "type": "text",
+            "text": self.system_prompt,
+            "cache_control": {"type": "ephemeral"}
+        }]
+        if self.system_context:
+            blocks.append({"type": "text", "text": self.system_context})
+        return blocks
+
+def is_retryable(error: Exception) -> bool:
+    """Connection problems, timeouts, rate limits and overloaded/5xx responses"""
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, from retry-after-ms or retry-after"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return max(float(headers["retry-after-ms"]) / 1000, 0.0)
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return max(float(value), 0.0)
+            except ValueError:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+    return None
+
+class ResponseStitcher:
+    """Join a continuation onto a partial response without duplicated whitespace or tags
+
+    Continuations are requested by prefilling the assistant turn with the partial
+    response, so the model normally resumes mid-token. Occasionally it re-emits the
+    whitespace the prefill had to drop or re-opens the artifact/action it was in;
+    the start of the continuation is held back until that can be decided.
+    """
+
+    def __init__(self, previous: str):
+        self.previous = previous
+        self._pending = ""
+        self._resolved = not previous
+
+    def feed(self, chunk: str) -> str:
+        """Return the part of `chunk` that can be appended to the response"""
+        if self._resolved:
+            return chunk
+        self._pending += chunk
+        head = self._pending.lstrip()
+        if not head or (head.startswith('<') and '>' not in head):
+            return ""
+        return self.flush()
+
+    def flush(self) -> str:
+        """Release whatever is still held back at the end of the continuation"""
+        if self._resolved:
+            return ""
+        self._resolved = True
+        return self._dedupe(self._pending)
+
+    def _dedupe(self, text: str) -> str:
+        trailing = self.previous[len(self.previous.rstrip()):]
+        if trailing and text.startswith(trailing):
+            text = text[len(trailing):]
+
+        lead = text.lstrip()
+        artifact_match = re.match(r'<forgeArtifact\b[^>]*>', lead)
+        if artifact_match and '<forgeArtifact' in self.previous:
+            return lead[artifact_match.end():]
+
+        action_match = re.match(r'<forgeAction\b[^>]*>', lead)
+        last_open = self.previous.rfind('<forgeAction')
+        if action_match and last_open > self.previous.rfind('</forgeAction>'):
+            if self.previous.startswith(action_match.group(0), last_open):
+                return lead[action_match.end():]
+        return text
 
 class GameForgeChat:
-    def __init__(self, ai: GameForgeAI, parser: GameForgeParser, executor: GameForgeExecutor):
+    def __init__(self, ai: GameForgeAI, parser: GameForgeParser, executor: GameForgeExecutor,
+                 stream: bool = False, max_continuations: int = 5, token_budget: Optional[int] = None,
+                 history: Optional[HistoryManager] = None, patch_followups: bool = True,
+                 temperature: Optional[float] = None, checkpoint: Optional[RunCheckpoint] = None):
         self.ai = ai
         self.parser = parser
         self.executor = executor
+        self.stream = stream
+        self.max_continuations = max_continuations
+        self.token_budget = token_budget
         self.message_history: List[Message] = []
+        self.history = history or HistoryManager(executor.output_dir)
+        self.patch_followups = patch_followups
+        self.temperature = temperature
+        self.checkpoint = checkpoint
+        if checkpoint:
+            # A resumed run continues the conversation it had already finished
+            self.message_history = [Message(**turn) for turn in checkpoint.history]
+        self.usage = TokenUsage()
+        self.last_usage = TokenUsage()
+        self.write_summary = WriteSummary()
 
     async def send_message(self, user_message: str) -> str:
         """Send a message and get complete response"""
         self.message_history.append(Message(role="user", content=user_message))
-        
-        response = await self.ai.chat(self.message_history)
-        
-        # Check for truncation by looking for unclosed tags or incomplete code blocks
-        if self._is_truncated(response):
-            # Add continue prompt and get the rest
-            continue_response = await self.ai.chat([
-                *self.message_history,
-                Message(role="assistant", content=response),
-                Message(role="user", content="Continue your prior response. IMPORTANT: Immediately begin from where you left off without any interruptions. Do not repeat any content, including artifact and action tags.")
-            ])
-            response = response + continue_response
-
-        # Parse and execute actions from the complete response
-        parsed_response = self.parser.parse(
-            message_id=str(len(self.message_history)),
-            input_text=response
+        message_id = str(len(self.message_history))
+
+        pending = self.checkpoint.start_message(message_id, user_message) if self.checkpoint else None
+
+        instrumentation = self.ai.instrumentation
+        scheduler = ActionScheduler(
+            self.executor,
+            skip=pending.executed if pending else None,
+            on_complete=self.checkpoint.record_action if self.checkpoint else None
         )
-        
-        # Execute any actions from the parsed response
-        if parsed_response.actions:
+        with instrumentation.span("generation", message_id=message_id) as span:
+            response = await self._generate(message_id, scheduler, pending)
+            span.update(asdict(self.last_usage))
+
+        if self.stream:
+            # Actions were already scheduled as their closing tags streamed in
+            self.parser.finish(message_id)
+        else:
+            # Parse and execute actions from the complete response
+            with instrumentation.span("parse", characters=len(response)):
+                parsed_response = self.parser.parse(
+                    message_id=message_id,
+                    input_text=response
+                )
+            
+            # Schedule the actions as a dependency graph
             for action in parsed_response.actions:
-                self.executor.execute_action(action)
+                scheduler.submit(action)
+
+        with instrumentation.span("execute"):
+            try:
+                await scheduler.join()
+            finally:
+                await self.executor.close_shell()
+        self.write_summary = self.executor.pop_summary()
+        logger.info(f"Files: {self.write_summary}")
         
         self.message_history.append(Message(role="assistant", content=response))
+        if self.checkpoint:
+            self.checkpoint.finish_message(response)
         return response
 
-    def _is_truncated(self, response: str) -> bool:
-        """Check if response appears to be truncated"""
-        # Check for unmatched forge tags
-        opening_tags = len(re.findall(r'<forge\w+[^>]*>', response))
-        closing_tags = len(re.findall(r'</forge\w+>', response))
-        if opening_tags != closing_tags:
-            return True
+    async def generate(self, user_message: str) -> str:
+        """Get the complete response to a message without executing any of its actions
 
-        # Check for unmatched code blocks
-        backticks = response.count('```')
-        if backticks % 2 != 0:
-            return True
+        The exchange is added to the history like any other turn. The response is
+        never streamed, since nothing is scheduled while it arrives.
+        """
+        self.message_history.append(Message(role="user", content=user_message))
+        message_id = str(len(self.message_history))
+        with self.ai.instrumentation.span("generation", message_id=message_id) as span:
+            response = await self._generate(message_id, ActionScheduler(self.executor), stream=False)
+            span.update(asdict(self.last_usage))
+        self.message_history.append(Message(role="assistant", content=response))
+        return response
+
+    async def _generate(self, message_id: str, scheduler: ActionScheduler,
+                        pending: Optional[PendingMessage] = None, stream: Optional[bool] = None) -> str:
+        """Generate a response, continuing for as long as the API stops on max_tokens
+
+        A resumed message starts from its checkpointed partial response; if that
+        response was already complete, no request is made at all.
+        """
+        stream = self.stream if stream is None else stream
+        response = pending.response if pending else ""
+        usage = TokenUsage(**pending.usage) if pending else TokenUsage()
+
+        if response and stream:
+            # Actions completed in the checkpointed text are scheduled (or skipped) as usual
+            for action in self.parser.feed(message_id, response):
+                scheduler.submit(action)
+        if pending and pending.complete:
+            self.usage.add(usage)
+            self.last_usage = usage
+            return response
+
+        # Older turns are compacted once per message; continuations reuse the same prefix
+        history = self.history.build(self.message_history, patch_mode=self.patch_followups)
+        if self.patch_followups and len(history) > 1:
+            # Follow-up turns ask for patches instead of complete files
+            history[-1] = Message(role="user", content=f"{history[-1].content}\n\n{get_patch_prompt()}")
+
+        for round_number in range(self.max_continuations + 1):
+            messages = list(history)
+            if response:
+                # Prefill the assistant turn so the model resumes exactly where it stopped.
+                # The API rejects a final assistant turn that ends in whitespace.
+                messages.append(Message(role="assistant", content=response.rstrip()))
+
+            stitcher = ResponseStitcher(response)
+            stage = "continuation" if round_number else "first_response"
+            with self.ai.instrumentation.span(stage, round=round_number) as span:
+                if stream:
+                    text, completion = await self._stream_round(message_id, messages, stitcher, scheduler)
+                else:
+                    completion = await self.ai.complete(messages, temperature=self.temperature)
+                    text = stitcher.feed(completion.text) + stitcher.flush()
+                span.update(stop_reason=completion.stop_reason, output_tokens=completion.usage.output_tokens)
+
+            response += text
+            usage.add(completion.usage)
 
-        # Check if ends mid-sentence
-        if response.rstrip()[-1] not in '.!?}"\'':
-            return True
+            budget_exhausted = bool(self.token_budget and usage.total_tokens >= self.token_budget)
+            if self.checkpoint:
+                self.checkpoint.record_round(
+                    response, complete=completion.stop_reason != "max_tokens" or budget_exhausted, usage=usage
+                )
+            if completion.stop_reason != "max_tokens":
+                break
+            if budget_exhausted:
+                logger.warning(f"Token budget of {self.token_budget} exhausted; response is truncated")
+                break
+        else:
+            logger.warning(f"Response still truncated after {self.max_continuations} continuations")
+
+        self.usage.add(usage)
+        self.last_usage = usage
+        logger.info(
+            f"Response generated in {round_number + 1} round(s): "
+            f"{usage.total_tokens} tokens ({usage.output_tokens} output)"
+        )
+        return response
+
+    async def _stream_round(self, message_id: str, messages: List[Message], stitcher: ResponseStitcher,
+                            scheduler: ActionScheduler) -> tuple[str, Completion]:
+        """Feed streamed chunks to the parser and schedule completed actions immediately"""
+        chunks = []
+        completions = []
+
+        def consume(text: str) -> None:
+            if not text:
+                return
+            chunks.append(text)
+            for action in self.parser.feed(message_id, text):
+                scheduler.submit(action)
+
+        try:
+            async for chunk in self.ai.chat_stream(messages, on_complete=completions.append,
+                                                   temperature=self.temperature):
+                consume(stitcher.feed(chunk))
+        except BaseException:
+            # Keep what already streamed in so a resumed run continues from it
+            if self.checkpoint:
+                self.checkpoint.record_partial(stitcher.previous + "".join(chunks))
+            raise
+        consume(stitcher.flush())
 
-        return False
\ No newline at end of file
+        return "".join(chunks), completions[0]
@@ -0,0 +1,267 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from .ai_client import GameForgeAI, GameForgeChat
+from .bundler import BundleReport, bundle_game
+from .cache import ResponseCache
+from .deps import DependencyCache
+from .executor import GameForgeExecutor
+from .instrumentation import Instrumentation
+from .parser import GameForgeParser
+from .profiler import FrameProfiler, ProfileReport
+from .prompts import build_game_prompt
+from .skeletons import Skeleton
+from .spec_compiler import SpecCompiler
+from .rate_limit import RateLimiter
+from .tokens import TokenUsage
+from .validator import SKIPPED_DIRS, GameValidator, ValidationReport
+
+logger = logging.getLogger(__name__)
+
+SPEC_EXTENSIONS = ('.json', '.md', '.txt')
+
+# Characters allowed in an output directory name; anything else becomes "_"
+UNSAFE_NAME_CHARS = re.compile(r'[^A-Za-z0-9._-]+')
+
+@dataclass
+class GameSpec:
+    game_name: str
+    spec: str
+    path: str
+
+@dataclass
+class GameResult:
+    game_name: str
+    spec_path: str
+    latency: float = 0.0
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    actions: int = 0
+    error: Optional[str] = None
+    validation: Optional[ValidationReport] = None
+    bundle: Optional[BundleReport] = None
+    profile: Optional[ProfileReport] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def load_game_spec(path: str) -> GameSpec:
+    """Load a game spec from a game_spec.json style file or a plain markdown/text spec"""
+    if not path.endswith('.json'):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                spec = f.read()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"{path} not found")
+        game_name = os.path.splitext(os.path.basename(path))[0]
+        return GameSpec(game_name=game_name, spec=spec, path=path)
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            game_data = json.load(f)
+        return GameSpec(game_name=game_data['game_name'], spec=game_data['spec'], path=path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"{path} not found")
+    except KeyError as e:
+        raise KeyError(f"Missing required key in {path}: {e}")
+    except json.JSONDecodeError:
+        raise ValueError(f"Invalid JSON format in {path}")
+
+def find_spec_files(pattern: str) -> List[str]:
+    """Resolve a directory or glob pattern to a sorted list of spec files"""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*')
+    return sorted(
+        path for path in glob.glob(pattern)
+        if os.path.isfile(path) and path.endswith(SPEC_EXTENSIONS)
+    )
+
+def safe_dir_name(name: str) -> str:
+    """`name` as a single path component: no separators, no leading dot"""
+    return UNSAFE_NAME_CHARS.sub('_', name).strip('._') or "game"
+
+def output_dir_names(spec_paths: List[str]) -> List[str]:
+    """A distinct output directory name per spec, from its game name or else its file name
+
+    Later specs with a name already taken get a numeric suffix, so games never share
+    a directory (and a write manifest).
+    """
+    taken = set(SKIPPED_DIRS)
+    names = []
+    for path in spec_paths:
+        try:
+            base = safe_dir_name(load_game_spec(path).game_name)
+        except (OSError, KeyError, ValueError):
+            base = safe_dir_name(os.path.splitext(os.path.basename(path))[0])
+        name, suffix = base, 2
+        while name.lower() in taken:
+            name, suffix = f"{base}-{suffix}", suffix + 1
+        taken.add(name.lower())
+        names.append(name)
+    return names
+
+class BatchRunner:
+    """Generate many games concurrently, each in its own chat and output directory"""
+
+    def __init__(self, ai: GameForgeAI, work_dir: str, concurrency: int = 4, stream: bool = False,
+                 validator: Optional[GameValidator] = None, max_repairs: int = 1,
+                 dependency_cache: Optional[DependencyCache] = None,
+                 spec_compiler: Optional[SpecCompiler] = None, skeleton: Optional[Skeleton] = None,
+                 bundle: bool = False, profiler: Optional[FrameProfiler] = None, optimize: bool = False):
+        self.ai = ai
+        self.work_dir = work_dir
+        self.concurrency = concurrency
+        self.stream = stream
+        self.validator = validator
+        self.max_repairs = max_repairs
+        self.dependency_cache = dependency_cache
+        self.spec_compiler = spec_compiler
+        self.skeleton = skeleton
+        self.bundle = bundle
+        self.profiler = profiler
+        self.optimize = optimize
+        # Assets extracted from every game are stored once and hard-linked into each bundle
+        self.asset_store = os.path.join(work_dir, "ai_output", ".gameforge_assets")
+
+    async def run(self, spec_paths: List[str]) -> List[GameResult]:
+        """Run every spec under the concurrency limit and collect per-game results"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(
+            self._run_one(path, name, semaphore) for path, name in zip(spec_paths, output_dir_names(spec_paths))
+        ))
+
+    async def _run_one(self, spec_path: str, output_name: str, semaphore: asyncio.Semaphore) -> GameResult:
+        result = GameResult(game_name=os.path.basename(spec_path), spec_path=spec_path)
+        async with semaphore:
+            start = time.perf_counter()
+            chat = None
+            try:
+                game = load_game_spec(spec_path)
+                result.game_name = game.game_name
+
+                output_dir = os.path.join(self.work_dir, "ai_output", output_name)
+                executor = GameForgeExecutor(work_dir=self.work_dir, output_dir=output_dir,
+                                             instrumentation=self.ai.instrumentation,
+                                             dependency_cache=self.dependency_cache)
+                if self.skeleton:
+                    executor.install_skeleton(self.skeleton)
+                chat = GameForgeChat(self.ai, GameForgeParser(), executor, stream=self.stream)
+
+                spec = self.spec_compiler.compile(game.spec).text if self.spec_compiler else game.spec
+                response = await chat.send_message(build_game_prompt(game.game_name, spec, self.skeleton))
+                result.actions = len(GameForgeParser().parse("batch", response).actions)
+
+                response_dir = os.path.join(output_dir, "responses")
+                os.makedirs(response_dir, exist_ok=True)
+                with open(os.path.join(response_dir, f"response_{output_name}.txt"), "w", encoding="utf-8") as f:
+                    f.write(response)
+
+                if self.validator:
+                    result.validation = await self.validator.validate_and_repair(chat, self.max_repairs)
+                    if not result.validation.ok:
+                        result.error = f"validation: {len(result.validation.issues)} issue(s)"
+
+                if self.profiler:
+                    with self.ai.instrumentation.span("profile", game=game.game_name) as span:
+                        if self.optimize:
+                            result.profile = await self.profiler.profile_and_optimize(
+                                chat, validator=self.validator, max_repairs=self.max_repairs
+                            )
+                        else:
+                            result.profile = await self.profiler.profile(output_dir)
+                        span.update(p95_ms=result.profile.stat("total_ms", 95), ok=result.profile.ok)
+                    # Kept with the run rather than in the game directory, which gets bundled
+                    result.profile.save(os.path.join(self.work_dir, "ai_output", "runs", self.ai.instrumentation.run_id,
+                                                     f"{output_name}.profile.json"))
+                    if not result.profile.ok and not result.error:
+                        result.error = "profile: " + (
+                            "game failed while profiling" if result.profile.error
+                            else f"p95 frame time over {result.profile.budget_ms:.1f} ms"
+                        )
+
+                if self.bundle:
+                    with self.ai.instrumentation.span("bundle", game=game.game_name):
+                        result.bundle = await asyncio.to_thread(bundle_game, output_dir, asset_store=self.asset_store)
+            except Exception as e:
+                logger.error(f"Failed to generate {spec_path}: {e}")
+                result.error = str(e) or type(e).__name__
+            finally:
+                result.latency = time.perf_counter() - start
+                if chat:
+                    result.usage = chat.usage
+        return result
+
+def print_batch_report(results: List[GameResult], wall_time: float, console: Optional[Console] = None) -> None:
+    """Print per-game latency, tokens and failures as a table"""
+    console = console or Console()
+    table = Table(title="Batch generation")
+    table.add_column("Game")
+    table.add_column("Status")
+    table.add_column("Latency (s)", justify="right")
+    table.add_column("Input tokens", justify="right")
+    table.add_column("Cache write", justify="right")
+    table.add_column("Cache read", justify="right")
+    table.add_column("Output tokens", justify="right")
+    table.add_column("Actions", justify="right")
+    table.add_column("Bundle (KB)", justify="right")
+    table.add_column("p95 frame (ms)", justify="right")
+
+    for result in results:
+        table.add_row(
+            result.game_name,
+            "ok" if result.ok else f"[red]failed: {result.error}[/red]",
+            f"{result.latency:.1f}",
+            str(result.usage.input_tokens),
+            str(result.usage.cache_creation_input_tokens),
+            str(result.usage.cache_read_input_tokens),
+            str(result.usage.output_tokens),
+            str(result.actions),
+            f"{result.bundle.compressed_bytes / 1024:.1f}" if result.bundle and result.bundle.files else "-",
+            f"{result.profile.stat('total_ms', 95):.2f}" if result.profile and result.profile.frames else "-"
+        )
+    console.print(table)
+
+    failures = sum(1 for result in results if not result.ok)
+    total_latency = sum(result.latency for result in results)
+    console.print(
+        f"{len(results)} games, {failures} failed, wall time {wall_time:.1f}s "
+        f"(sum of latencies {total_latency:.1f}s)"
+    )
+
+async def run_batch(api_key: str, system_prompt: str, system_context: Optional[str], work_dir: str, pattern: str,
+                    concurrency: int = 4, requests_per_minute: Optional[int] = None,
+                    tokens_per_minute: Optional[int] = None, stream: bool = False,
+                    cache: Optional[ResponseCache] = None,
+                    instrumentation: Optional[Instrumentation] = None,
+                    validator: Optional[GameValidator] = None, max_repairs: int = 1,
+                    dependency_cache: Optional[DependencyCache] = None,
+                    spec_compiler: Optional[SpecCompiler] = None,
+                    skeleton: Optional[Skeleton] = None, bundle: bool = False,
+                    profiler: Optional[FrameProfiler] = None, optimize: bool = False) -> List[GameResult]:
+    """Generate every spec matching `pattern` and print a report"""
+    spec_paths = find_spec_files(pattern)
+    if not spec_paths:
+        raise FileNotFoundError(f"No spec files found for {pattern}")
+
+    rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    async with GameForgeAI(api_key=api_key, system_prompt=system_prompt, system_context=system_context,
+                           max_connections=concurrency, rate_limiter=rate_limiter, cache=cache,
+                           instrumentation=instrumentation) as ai:
+        start = time.perf_counter()
+        runner = BatchRunner(ai, work_dir, concurrency=concurrency, stream=stream,
+                             validator=validator, max_repairs=max_repairs,
+                             dependency_cache=dependency_cache, spec_compiler=spec_compiler,
+                             skeleton=skeleton, bundle=bundle, profiler=profiler, optimize=optimize)
+        results = await runner.run(spec_paths)
+        print_batch_report(results, time.perf_counter() - start)
+    return results
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from .ai_client import GameForgeAI, GameForgeChat
+from .executor import MANIFEST_NAME, GameForgeExecutor
+from .history import HistoryManager
+from .parser import ActionType, GameForgeParser, ParsedResponse
+from .skeletons import Skeleton
+from .tokens import TokenUsage
+from .validator import GameValidator, ValidationReport
+
+logger = logging.getLogger(__name__)
+
+# Candidates sample at evenly spaced temperatures in this range
+MIN_TEMPERATURE = 0.2
+MAX_TEMPERATURE = 1.0
+
+# Generated code up to this size earns points; beyond it, size says little about quality
+SIZE_CREDIT_BYTES = 40_000
+
+@dataclass
+class Candidate:
+    index: int
+    temperature: float
+    output_dir: str
+    chat: Optional[GameForgeChat] = None
+    response: str = ""
+    parsed: Optional[ParsedResponse] = None
+    validation: Optional[ValidationReport] = None
+    code_bytes: int = 0
+    latency: float = 0.0
+    error: Optional[str] = None
+    score: float = 0.0
+    usage: TokenUsage = field(default_factory=TokenUsage)
+
+def candidate_temperatures(n: int) -> List[float]:
+    """Evenly spaced, distinct temperatures so candidates (and their cache keys) differ"""
+    if n == 1:
+        return [MIN_TEMPERATURE]
+    step = (MAX_TEMPERATURE - MIN_TEMPERATURE) / (n - 1)
+    return [round(MIN_TEMPERATURE + i * step, 3) for i in range(n)]
+
+def score_candidate(candidate: Candidate) -> float:
+    """Score a candidate on parse completeness, truncation, validation and code size
+
+    A failed or empty generation scores 0. Others start at 100 and get 30 points for
+    a complete, error-free parse (minus 10 per parse error), -30 if the response was
+    truncated, 40 points if validation passed (minus 5 per issue otherwise), and up
+    to 20 points for the amount of code generated.
+    """
+    parsed = candidate.parsed
+    if candidate.error or parsed is None or not parsed.actions:
+        return 0.0
+
+    score = 100.0
+    score += 30 if parsed.artifact_id and not parsed.errors else -10 * len(parsed.errors)
+    if parsed.truncated:
+        score -= 30
+    if candidate.validation is not None:
+        score += 40 if candidate.validation.ok else -5 * len(candidate.validation.issues)
+    score += 20 * min(candidate.code_bytes, SIZE_CREDIT_BYTES) / SIZE_CREDIT_BYTES
+    return score
+
+class BestOfN:
+    """Generate a game N times concurrently and promote the best candidate
+
+    Each candidate has its own chat and writes into an isolated scratch directory
+    with shell actions skipped. Candidates are validated and scored, and only the
+    winner's files and shell commands reach the real executor's output directory.
+    """
+
+    def __init__(self, ai: GameForgeAI, executor: GameForgeExecutor, n: int = 3, stream: bool = False,
+                 validator: Optional[GameValidator] = None, skeleton: Optional[Skeleton] = None,
+                 temperatures: Optional[List[float]] = None):
+        self.ai = ai
+        self.executor = executor
+        self.n = n
+        self.stream = stream
+        self.validator = validator
+        self.skeleton = skeleton
+        self.temperatures = temperatures or candidate_temperatures(n)
+        self.candidates: List[Candidate] = []
+
+    async def run(self, user_message: str) -> Candidate:
+        """Generate all candidates, score them and promote the winner into the output directory"""
+        scratch_root = tempfile.mkdtemp(prefix="gameforge-candidates-")
+        try:
+            self.candidates = [
+                Candidate(index=i, temperature=temperature, output_dir=os.path.join(scratch_root, str(i)))
+                for i, temperature in enumerate(self.temperatures[:self.n])
+            ]
+            with self.ai.instrumentation.span("best_of_n", candidates=len(self.candidates)) as span:
+                await asyncio.gather(*(
+                    self._generate(candidate, user_message) for candidate in self.candidates
+                ))
+                for candidate in self.candidates:
+                    candidate.score = score_candidate(candidate)
+
+                # Ties go to the lower temperature
+                winner = max(self.candidates, key=lambda c: (c.score, -c.temperature))
+                span.update(winner=winner.index, score=winner.score, temperature=winner.temperature)
+
+            if winner.chat is None or winner.parsed is None:
+                raise RuntimeError(f"All {len(self.candidates)} candidates failed: {winner.error}")
+            logger.info(f"Promoting candidate {winner.index} (temperature {winner.temperature}, score {winner.score:.1f})")
+            await self.promote(winner)
+            return winner
+        finally:
+            shutil.rmtree(scratch_root, ignore_errors=True)
+
+    async def _generate(self, candidate: Candidate, user_message: str) -> None:
+        start = time.perf_counter()
+        try:
+            executor = GameForgeExecutor(
+                work_dir=self.executor.work_dir,
+                output_dir=candidate.output_dir,
+                instrumentation=self.ai.instrumentation,
+                run_shell=False
+            )
+            if self.skeleton:
+                executor.install_skeleton(self.skeleton)
+            candidate.chat = GameForgeChat(
+                self.ai, GameForgeParser(), executor, stream=self.stream, temperature=candidate.temperature
+            )
+            candidate.response = await candidate.chat.send_message(user_message)
+            candidate.usage = candidate.chat.usage
+            candidate.parsed = GameForgeParser().parse(f"candidate-{candidate.index}", candidate.response)
+            candidate.code_bytes = sum(
+                len(action.content.encode('utf-8')) for action in candidate.parsed.actions
+                if action.type != ActionType.SHELL
+            )
+            if self.validator:
+                candidate.validation = await self.validator.validate(candidate.output_dir)
+        except Exception as e:
+            logger.error(f"Candidate {candidate.index} failed: {e}")
+            candidate.error = str(e) or type(e).__name__
+        finally:
+            candidate.latency = time.perf_counter() - start
+
+    async def promote(self, winner: Candidate) -> None:
+        """Copy the winner's files into the real output directory and run its shell actions
+
+        The winner's chat is rebound to the real executor so follow-up and repair
+        turns continue from the promoted files.
+        """
+        for dirpath, _, filenames in os.walk(winner.output_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                relative = os.path.relpath(path, winner.output_dir)
+                if relative == MANIFEST_NAME:
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.executor.write_file(relative, f.read())
+
+        try:
+            for action in winner.parsed.actions:
+                if action.type == ActionType.SHELL:
+                    await self.executor.execute_action_async(action)
+        finally:
+            await self.executor.close_shell()
+
+        chat = winner.chat
+        chat.executor = self.executor
+        chat.history = HistoryManager(self.executor.output_dir)
+        chat.write_summary = self.executor.pop_summary()
+
+def print_candidate_report(candidates: List[Candidate], winner: Candidate, console: Optional[Console] = None) -> None:
+    """Print each candidate's score and the signals behind it"""
+    console = console or Console()
+    table = Table(title="Best-of-N candidates")
+    table.add_column("#", justify="right")
+    table.add_column("Temperature", justify="right")
+    table.add_column("Score", justify="right")
+    table.add_column("Actions", justify="right")
+    table.add_column("Truncated")
+    table.add_column("Validation")
+    table.add_column("Code (KB)", justify="right")
+    table.add_column("Latency (s)", justify="right")
+    table.add_column("Output tokens", justify="right")
+
+    for candidate in candidates:
+        parsed = candidate.parsed
+        if candidate.error:
+            validation = f"[red]failed: {candidate.error}[/red]"
+        elif candidate.validation is None:
+            validation = "-"
+        else:
+            validation = "ok" if candidate.validation.ok else f"{len(candidate.validation.issues)} issue(s)"
+        table.add_row(
+            f"{candidate.index}{' *' if candidate is winner else ''}",
+            f"{candidate.temperature:.2f}",
+            f"{candidate.score:.1f}",
+            str(len(parsed.actions)) if parsed else "-",
+            ("yes" if parsed.truncated else "no") if parsed else "-",
+            validation,
+            f"{candidate.code_bytes / 1024:.1f}",
+            f"{candidate.latency:.1f}",
+            str(candidate.usage.output_tokens)
+        )
+    console.print(table)
@@ -0,0 +1,644 @@
+import base64
+import binascii
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+import threading
+import urllib.parse
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from .validator import SKIPPED_DIRS, check_javascript, generated_files
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = "dist"
+ASSETS_DIR = "assets"
+
+BUNDLE_SKIPPED_DIRS = SKIPPED_DIRS | {DIST_DIR, "runs"}
+BUNDLE_SKIPPED_FILES = {"package.json", "package-lock.json"}
+HTML_EXTENSIONS = {".html", ".htm"}
+JS_EXTENSIONS = {".js", ".mjs"}
+TEXT_EXTENSIONS = HTML_EXTENSIONS | JS_EXTENSIONS | {".css", ".json", ".svg", ".txt"}
+ASSET_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ico", ".bmp",
+    ".wav", ".mp3", ".ogg", ".m4a", ".woff", ".woff2", ".ttf", ".otf",
+}
+COMPRESSIBLE_EXTENSIONS = TEXT_EXTENSIONS | {".wav", ".bmp", ".ico", ".ttf", ".otf"}
+
+# Data URIs smaller than this stay inline; a separate request would cost more
+MIN_EXTRACT_BYTES = 512
+# Precompressed siblings are only written for files at least this large...
+MIN_COMPRESS_BYTES = 1024
+# ...and only kept when they save at least this fraction
+MIN_COMPRESSION_SAVING = 0.1
+
+MIME_EXTENSIONS = {"audio/wav": ".wav", "audio/mp3": ".mp3", "audio/ogg": ".ogg", "image/jpeg": ".jpg"}
+
+DATA_URI_PATTERN = re.compile(
+    r'data:(?P<mime>[\w.+-]+/[\w.+-]+)(?:;[\w.+-]+=[\w.+-]+)*;base64,(?P<data>[A-Za-z0-9+/]{64,}={0,2})'
+)
+HTML_RAW_BLOCK = re.compile(r'(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)', re.IGNORECASE | re.DOTALL)
+HTML_COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+HTML_REFERENCE = re.compile(r'(<(?:script|link)\b[^>]*?\b(?:src|href)\s*=\s*)(["\'])([^"\']+)\2', re.IGNORECASE)
+SCRIPT_TYPE = re.compile(r'\btype\s*=\s*["\']?([^"\'\s>]+)', re.IGNORECASE)
+INLINE_JS_TYPES = {"text/javascript", "application/javascript", "module"}
+
+# Names produced by the bundler that never change content: hashed assets and fingerprinted JS/CSS
+HASHED_NAME_PATTERN = re.compile(rf'(?:^|/){ASSETS_DIR}/[0-9a-f]{{16}}\.\w+$|\.[0-9a-f]{{10}}\.(?:js|mjs|css)$')
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+JS_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^}")
+JS_REGEX_KEYWORDS = {
+    "return", "typeof", "instanceof", "in", "of", "new", "delete", "void", "throw", "case", "do", "else",
+    "yield", "await",
+}
+# Characters next to which a space is never needed. + - / . < > are left out on purpose:
+# "a + +b", "1 .toString()" and "<!--" must keep their spaces.
+JS_TIGHT = set("{}()[];,:=?|&*%!")
+# Adjacent characters that are kept apart even next to JS_TIGHT: joined they could
+# form "<!--" or "-->", which browsers and Node read as HTML-like comments
+JS_UNSAFE_JOINS = {"<!", "->"}
+CSS_TIGHT = set("{};,>")
+
+@dataclass
+class BundleReport:
+    output_dir: str
+    dist_dir: str
+    files: List[str] = field(default_factory=list)
+    assets: List[str] = field(default_factory=list)
+    unminified: List[str] = field(default_factory=list)
+    source_bytes: int = 0
+    bundle_bytes: int = 0
+    compressed_bytes: int = 0
+
+    def format(self) -> str:
+        if not self.files:
+            return "nothing to bundle (no HTML entry point)"
+        summary = (
+            f"{len(self.files)} files, {len(self.assets)} extracted assets: "
+            f"{self.source_bytes / 1024:.1f} KB source, {self.bundle_bytes / 1024:.1f} KB minified, "
+            f"{self.compressed_bytes / 1024:.1f} KB compressed"
+        )
+        if self.unminified:
+            summary += f" ({len(self.unminified)} left unminified: {', '.join(self.unminified)})"
+        return summary
+
+def _string_end(source: str, start: int) -> int:
+    """Index just past the quoted string starting at `start`"""
+    quote = source[start]
+    i = start + 1
+    while i < len(source):
+        char = source[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == quote:
+            return i + 1
+        if char == "\n":
+            break
+        i += 1
+    raise ValueError(f"Unterminated string at offset {start}")
+
+def _template_end(source: str, start: int) -> int:
+    """Index just past the end of a template literal chunk: its closing backtick or a `${`"""
+    i = start
+    while i < len(source):
+        char = source[i]
+        if char == "\\":
+            i += 2
+        elif char == "`":
+            return i + 1
+        elif source.startswith("${", i):
+            return i + 2
+        else:
+            i += 1
+    raise ValueError(f"Unterminated template literal at offset {start}")
+
+def _regex_end(source: str, start: int) -> int:
+    """Index just past the regular expression literal (and its flags) starting at `start`"""
+    i = start + 1
+    in_class = False
+    while True:
+        if i >= len(source) or source[i] == "\n":
+            raise ValueError(f"Unterminated regular expression at offset {start}")
+        char = source[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        elif char == "/" and not in_class:
+            break
+        i += 1
+    i += 1
+    while i < len(source) and (source[i].isalnum() or source[i] in "_$"):
+        i += 1
+    return i
+
+def minify_js(source: str) -> str:
+    """Strip comments, indentation and redundant spaces from JavaScript
+
+    Line breaks are kept wherever automatic semicolon insertion could depend on
+    them. Strings, template literals and regular expressions are copied verbatim.
+    Raises ValueError on input the scanner does not understand.
+    """
+    out: List[str] = []
+    templates: List[int] = []  # open braces inside each enclosing template substitution
+    last = ""  # last character emitted
+    word = ""  # last identifier or keyword emitted
+    pending = ""  # whitespace skipped since the last token: "", " " or "\n"
+    i, n = 0, len(source)
+
+    def emit(token: str, is_word: bool = False) -> None:
+        nonlocal last, word, pending
+        if pending and out:
+            if pending == "\n" and last not in "{;," and token[0] not in "});,":
+                out.append("\n")
+            elif pending == " " and (
+                (last not in JS_TIGHT and token[0] not in JS_TIGHT) or last + token[0] in JS_UNSAFE_JOINS
+            ):
+                out.append(" ")
+        pending = ""
+        out.append(token)
+        last = token[-1]
+        word = token if is_word else ""
+
+    while i < n:
+        char = source[i]
+        if char == "}" and templates and templates[-1] == 0:
+            templates.pop()
+            j = _template_end(source, i + 1)
+            emit(source[i:j])
+            if source.startswith("${", j - 2):
+                templates.append(0)
+            i = j
+        elif char == "`":
+            j = _template_end(source, i + 1)
+            emit(source[i:j])
+            if source.startswith("${", j - 2):
+                templates.append(0)
+            i = j
+        elif char in "\"'":
+            j = _string_end(source, i)
+            emit(source[i:j])
+            i = j
+        elif source.startswith("//", i):
+            j = source.find("\n", i)
+            i = n if j == -1 else j
+        elif source.startswith("/*", i):
+            j = source.find("*/", i + 2)
+            if j == -1:
+                raise ValueError(f"Unterminated comment at offset {i}")
+            if "\n" in source[i:j]:
+                pending = "\n"
+            elif not pending:
+                pending = " "
+            i = j + 2
+        elif char == "/" and (not last or last in JS_REGEX_PRECEDERS or word in JS_REGEX_KEYWORDS):
+            j = _regex_end(source, i)
+            emit(source[i:j], is_word=True)
+            i = j
+        elif char.isspace():
+            j = i
+            while j < n and source[j].isspace():
+                if source[j] in "\n\r\u2028\u2029":
+                    pending = "\n"
+                j += 1
+            if not pending:
+                pending = " "
+            i = j
+        elif char.isalnum() or char in "_$" or ord(char) > 127:
+            j = i
+            while j < n and (source[j].isalnum() or source[j] in "_$" or ord(source[j]) > 127):
+                j += 1
+            emit(source[i:j], is_word=True)
+            i = j
+        else:
+            if templates and char == "{":
+                templates[-1] += 1
+            elif templates and char == "}":
+                templates[-1] -= 1
+            emit(char)
+            i += 1
+
+    if templates:
+        raise ValueError("Unterminated template substitution")
+    return "".join(out).strip() + "\n"
+
+def minify_css(source: str) -> str:
+    """Drop comments and redundant whitespace from CSS; strings are copied verbatim"""
+    out: List[str] = []
+    pending = False
+    i, n = 0, len(source)
+
+    def emit(token: str) -> None:
+        nonlocal pending
+        previous = out[-1][-1] if out else ""
+        if pending and out and previous not in CSS_TIGHT and previous != ":" and token[0] not in CSS_TIGHT:
+            out.append(" ")
+        if token == "}" and previous == ";":
+            out[-1] = out[-1][:-1]
+        pending = False
+        out.append(token)
+
+    while i < n:
+        char = source[i]
+        if char in "\"'":
+            j = _string_end(source, i)
+            emit(source[i:j])
+            i = j
+        elif source.startswith("/*", i):
+            j = source.find("*/", i + 2)
+            if j == -1:
+                raise ValueError(f"Unterminated comment at offset {i}")
+            pending = True
+            i = j + 2
+        elif char.isspace():
+            pending = True
+            i += 1
+        else:
+            emit(char)
+            i += 1
+    return "".join(out).strip() + "\n"
+
+def _collapse_html(text: str) -> str:
+    text = HTML_COMMENT.sub("", text)
+    text = re.sub(r'[ \t]*\n\s*', "\n", text)
+    return re.sub(r'[ \t]{2,}', " ", text)
+
+def _checked_js(source: str, suffix: str = ".js") -> Tuple[str, bool]:
+    """Minified JavaScript, or the original and False if minifying failed or broke the syntax"""
+    try:
+        minified = minify_js(source)
+    except ValueError as e:
+        logger.debug(f"Not minifying JavaScript: {e}")
+        return source, False
+    if check_javascript(minified, suffix) and not check_javascript(source, suffix):
+        logger.warning("Minified JavaScript failed the syntax check; keeping the original")
+        return source, False
+    return minified, True
+
+def minify_html(source: str) -> Tuple[str, bool]:
+    """Drop comments and collapse whitespace outside script/style/pre/textarea blocks
+
+    Inline scripts and styles are minified as JavaScript and CSS. Returns the HTML
+    and whether every inline block could be minified.
+    """
+    parts = []
+    complete = True
+    position = 0
+    for match in HTML_RAW_BLOCK.finditer(source):
+        open_tag, tag, body, close_tag = match.groups()
+        parts.append(_collapse_html(source[position:match.start()]))
+        tag = tag.lower()
+        script_type = SCRIPT_TYPE.search(open_tag)
+        if tag == "script" and body.strip() and (not script_type or script_type.group(1).lower() in INLINE_JS_TYPES):
+            body, ok = _checked_js(body)
+            complete = complete and ok
+        elif tag == "style":
+            try:
+                body = minify_css(body)
+            except ValueError:
+                complete = False
+        parts.append(open_tag + body + close_tag)
+        position = match.end()
+    parts.append(_collapse_html(source[position:]))
+    return "".join(parts).strip() + "\n", complete
+
+def asset_extension(mime: str) -> str:
+    return MIME_EXTENSIONS.get(mime.lower()) or mimetypes.guess_extension(mime.lower()) or ".bin"
+
+def extract_data_uris(source: str, assets: Dict[str, bytes], prefix: str = "") -> str:
+    """Replace large base64 data URIs with paths to content-hashed asset files
+
+    Decoded assets are collected in `assets` by path relative to the bundle root;
+    `prefix` leads from where the URL is resolved back to that root.
+    """
+    def replace(match: re.Match) -> str:
+        try:
+            data = base64.b64decode(match.group("data"), validate=True)
+        except binascii.Error:
+            return match.group(0)
+        if len(data) < MIN_EXTRACT_BYTES:
+            return match.group(0)
+        path = f"{ASSETS_DIR}/{hashlib.sha256(data).hexdigest()[:16]}{asset_extension(match.group('mime'))}"
+        assets[path] = data
+        return prefix + path
+
+    return DATA_URI_PATTERN.sub(replace, source)
+
+def _root_prefix(path: str) -> str:
+    """Relative URL prefix from the directory of `path` back to the bundle root"""
+    return "../" * path.count("/")
+
+def _collect_sources(output_dir: str) -> Dict[str, str]:
+    """Map bundle-relative paths of the web files in `output_dir` to their absolute paths
+
+    Only files this game's executor wrote are bundled (see generated_files), so other
+    games' output directories nested under `output_dir` stay out of the bundle.
+    """
+    sources = {}
+    for path in generated_files(output_dir):
+        relative = os.path.relpath(path, output_dir)
+        *parents, name = relative.split(os.sep)
+        if any(d in BUNDLE_SKIPPED_DIRS or d.startswith(".") for d in parents):
+            continue
+        if name.startswith(".") or name in BUNDLE_SKIPPED_FILES:
+            continue
+        extension = os.path.splitext(name)[1].lower()
+        if extension in TEXT_EXTENSIONS or extension in ASSET_EXTENSIONS:
+            sources[relative.replace(os.sep, "/")] = path
+    return sources
+
+def _fingerprint(outputs: Dict[str, bytes]) -> None:
+    """Rename JS/CSS files loaded from HTML to content-hashed names and update the HTML
+
+    Files that other scripts or stylesheets refer to by name (e.g. ES module imports)
+    keep their names.
+    """
+    pages = [path for path in outputs if os.path.splitext(path)[1] in HTML_EXTENSIONS]
+    others = [
+        outputs[path].decode("utf-8", errors="replace") for path in outputs
+        if os.path.splitext(path)[1] in JS_EXTENSIONS | {".css"}
+    ]
+
+    renames: Dict[str, str] = {}
+    for page in pages:
+        for match in HTML_REFERENCE.finditer(outputs[page].decode("utf-8")):
+            reference = match.group(3).split("?", 1)[0].split("#", 1)[0]
+            if re.match(r'^(?:[a-z]+:)?//|^data:|^/', reference, re.IGNORECASE):
+                continue
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(page), reference))
+            stem, extension = posixpath.splitext(target)
+            if target not in outputs or extension not in JS_EXTENSIONS | {".css"} or target in renames:
+                continue
+            if any(posixpath.basename(target) in text for text in others):
+                continue
+            renames[target] = f"{stem}.{hashlib.sha256(outputs[target]).hexdigest()[:10]}{extension}"
+
+    if not renames:
+        return
+    for page in pages:
+        def rewrite(match: re.Match, page: str = page) -> str:
+            value = match.group(3)
+            reference, suffix = re.match(r'([^?#]*)(.*)', value).groups()
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(page), reference))
+            if target not in renames:
+                return match.group(0)
+            renamed = reference[:len(reference) - len(posixpath.basename(target))] + posixpath.basename(renames[target])
+            return f"{match.group(1)}{match.group(2)}{renamed}{suffix}{match.group(2)}"
+
+        outputs[page] = HTML_REFERENCE.sub(rewrite, outputs[page].decode("utf-8")).encode("utf-8")
+    for old, new in renames.items():
+        outputs[new] = outputs.pop(old)
+
+def _write_if_changed(path: str, data: bytes) -> None:
+    """Atomically write `data` unless the file already holds it"""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _link_asset(store: str, path: str, data: bytes, destination: str) -> None:
+    """Place an asset from the shared store, hard-linking so identical assets are stored once"""
+    stored = os.path.join(store, os.path.basename(path))
+    _write_if_changed(stored, data)
+    if os.path.exists(destination):
+        if os.path.samefile(stored, destination):
+            return
+        os.remove(destination)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    try:
+        os.link(stored, destination)
+    except OSError:
+        shutil.copyfile(stored, destination)
+
+@lru_cache(maxsize=None)
+def _log_missing_brotli() -> None:
+    """Say once per process why bundles have no .br files"""
+    logger.info("brotli is not installed; bundles get .gz files only (pip install brotli to add .br)")
+
+def _compressed_variants(data: bytes) -> Dict[str, bytes]:
+    """gzip (and brotli, when installed) encodings of `data` that are worth serving"""
+    if len(data) < MIN_COMPRESS_BYTES:
+        return {}
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    else:
+        _log_missing_brotli()
+    limit = len(data) * (1 - MIN_COMPRESSION_SAVING)
+    return {suffix: encoded for suffix, encoded in variants.items() if len(encoded) <= limit}
+
+def bundle_game(output_dir: str, dist_dir: Optional[str] = None, asset_store: Optional[str] = None) -> BundleReport:
+    """Build a minified, precompressed copy of an HTML5 game in `output_dir`/dist
+
+    Large base64 data URIs are moved into content-hashed files under assets/, JS,
+    CSS, HTML and JSON are minified, JS/CSS loaded from HTML get content-hashed
+    names, and .gz (plus .br when brotli is installed) siblings are written. The
+    generated sources are left untouched so later turns can keep patching them.
+    With `asset_store`, extracted assets are stored once there and hard-linked
+    into each game's bundle.
+    """
+    output_dir = os.path.abspath(output_dir)
+    dist_dir = os.path.abspath(dist_dir or os.path.join(output_dir, DIST_DIR))
+    report = BundleReport(output_dir=output_dir, dist_dir=dist_dir)
+
+    sources = _collect_sources(output_dir)
+    if not any(os.path.splitext(path)[1] in HTML_EXTENSIONS for path in sources):
+        logger.info(f"No HTML entry point in {output_dir}; nothing to bundle")
+        return report
+
+    outputs: Dict[str, bytes] = {}
+    assets: Dict[str, bytes] = {}
+    for path, full_path in sources.items():
+        extension = os.path.splitext(path)[1].lower()
+        with open(full_path, "rb") as f:
+            data = f.read()
+        report.source_bytes += len(data)
+        if extension not in TEXT_EXTENSIONS:
+            outputs[path] = data
+            continue
+
+        text = data.decode("utf-8", errors="replace")
+        text = extract_data_uris(text, assets, "" if extension in JS_EXTENSIONS else _root_prefix(path))
+        minified = True
+        if extension in HTML_EXTENSIONS:
+            text, minified = minify_html(text)
+        elif extension in JS_EXTENSIONS:
+            text, minified = _checked_js(text, extension)
+        elif extension == ".css":
+            try:
+                text = minify_css(text)
+            except ValueError:
+                minified = False
+        elif extension == ".json":
+            try:
+                text = json.dumps(json.loads(text), separators=(",", ":"), ensure_ascii=False)
+            except json.JSONDecodeError:
+                minified = False
+        if not minified:
+            report.unminified.append(path)
+        outputs[path] = text.encode("utf-8")
+
+    _fingerprint(outputs)
+
+    written = set()
+    for path, data in sorted(outputs.items()):
+        destination = os.path.join(dist_dir, *path.split("/"))
+        _write_if_changed(destination, data)
+        written.add(destination)
+        served = len(data)
+        if os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            for suffix, encoded in _compressed_variants(data).items():
+                _write_if_changed(destination + suffix, encoded)
+                written.add(destination + suffix)
+                served = min(served, len(encoded))
+        report.files.append(path)
+        report.bundle_bytes += len(data)
+        report.compressed_bytes += served
+
+    for path, data in sorted(assets.items()):
+        destination = os.path.join(dist_dir, *path.split("/"))
+        if asset_store:
+            _link_asset(asset_store, path, data, destination)
+        else:
+            _write_if_changed(destination, data)
+        written.add(destination)
+        report.assets.append(path)
+        report.bundle_bytes += len(data)
+        report.compressed_bytes += len(data)
+
+    # Remove what earlier builds produced but this one did not (e.g. old fingerprinted names)
+    for root, dirs, files in os.walk(dist_dir, topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            if path not in written:
+                os.remove(path)
+        if root != dist_dir and not os.listdir(root):
+            os.rmdir(root)
+
+    logger.info(f"Bundled {output_dir} into {dist_dir}: {report.format()}")
+    return report
+
+def _accepts(header: str, encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows `encoding`"""
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() != encoding:
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+class BundleRequestHandler(SimpleHTTPRequestHandler):
+    """Serve a bundle, preferring precompressed siblings and caching hashed files for a year"""
+
+    extensions_map = {
+        **SimpleHTTPRequestHandler.extensions_map,
+        ".js": "text/javascript",
+        ".mjs": "text/javascript",
+        ".wasm": "application/wasm",
+    }
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, "index.html")
+            if not urllib.parse.urlsplit(self.path).path.endswith("/") or not os.path.isfile(index):
+                return super().send_head()
+            path = index
+        if not os.path.isfile(path):
+            return super().send_head()
+
+        accepted = self.headers.get("Accept-Encoding", "")
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if _accepts(accepted, encoding) and os.path.isfile(path + suffix):
+                break
+        else:
+            return super().send_head()
+
+        f = open(path + suffix, "rb")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+        self.send_header("Last-Modified", self.date_time_string(os.stat(path).st_mtime))
+        self.end_headers()
+        return f
+
+    def end_headers(self):
+        if getattr(self, "_status", None) == HTTPStatus.OK:
+            path = urllib.parse.urlsplit(self.path).path
+            hashed = HASHED_NAME_PATTERN.search(path)
+            self.send_header("Cache-Control", IMMUTABLE_CACHE_CONTROL if hashed else REVALIDATE_CACHE_CONTROL)
+            self.send_header("Vary", "Accept-Encoding")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+class BundleServer:
+    """Serve a bundle directory over HTTP from a background thread"""
+
+    def __init__(self, dist_dir: str, host: str = "127.0.0.1", port: int = 8000):
+        self.dist_dir = dist_dir
+        self.httpd = ThreadingHTTPServer((host, port), partial(BundleRequestHandler, directory=dist_dir))
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "BundleServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Serving {self.dist_dir} at {self.url}")
+        return self
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "BundleServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
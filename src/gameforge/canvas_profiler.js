@@ -0,0 +1,404 @@
+// Frame-time profiler for canvas games, run by src/gameforge/profiler.py:
+//   node canvas_profiler.js manifest.json result.json
+// The manifest lists the page's scripts in load order and the number of frames to run.
+// Scripts run in a VM context with a mocked DOM and 2D canvas; time is simulated at
+// 60 fps, synthetic key presses and clicks are dispatched, and each frame's wall time,
+// time spent in canvas calls and heap growth are recorded alongside a CPU profile.
+'use strict';
+const fs = require('fs');
+const vm = require('vm');
+const inspector = require('inspector');
+const { pathToFileURL } = require('url');
+
+const [manifestPath, resultPath] = process.argv.slice(2);
+const manifest = JSON.parse(fs.readFileSync(manifestPath, 'utf8'));
+
+const FRAME_MS = 1000 / 60;
+const SAMPLING_INTERVAL_US = 200;
+const KEYS = [
+  ['Space', ' ', 32], ['ArrowLeft', 'ArrowLeft', 37], ['ArrowRight', 'ArrowRight', 39],
+  ['ArrowUp', 'ArrowUp', 38], ['ArrowDown', 'ArrowDown', 40], ['KeyZ', 'z', 90]
+];
+const ENTER = ['Enter', 'Enter', 13];
+
+let now = 0;
+let renderNs = 0n;
+const drawCalls = {};
+const listeners = [];
+let timers = [];
+let nextTimerId = 1;
+let animationFrames = [];
+// Errors the game caught and logged itself, e.g. a loop that stops and shows an overlay
+const loggedErrors = [];
+
+// --- mocks -------------------------------------------------------------
+
+function stub(target = function () {}) {
+  return new Proxy(target, {
+    get(t, prop) {
+      if (prop in t) return t[prop];
+      if (prop === Symbol.toPrimitive) return () => 0;
+      if (prop === 'then') return (onFulfilled) => Promise.resolve().then(onFulfilled);
+      if (typeof prop === 'symbol') return undefined;
+      t[prop] = stub();
+      return t[prop];
+    },
+    apply() { return stub(); },
+    construct() { return stub(); }
+  });
+}
+
+function eventTarget(obj) {
+  // `this` rather than `obj`, so listeners added through a stub proxy match dispatches to it
+  obj.addEventListener = function (type, fn) { listeners.push({ target: this, type, fn }); };
+  obj.removeEventListener = function (type, fn) {
+    const index = listeners.findIndex((l) => l.target === this && l.type === type && l.fn === fn);
+    if (index !== -1) listeners.splice(index, 1);
+  };
+  obj.dispatchEvent = function (event) { dispatchTo(this, event); return true; };
+  return obj;
+}
+
+function timed(fn, name) {
+  return function (...args) {
+    const start = process.hrtime.bigint();
+    try {
+      return fn.apply(this, args);
+    } finally {
+      renderNs += process.hrtime.bigint() - start;
+      drawCalls[name] = (drawCalls[name] || 0) + 1;
+    }
+  };
+}
+
+function context2d(canvas) {
+  const pixels = (w, h) => ({ width: w, height: h, data: new Uint8ClampedArray(Math.max(0, (w | 0) * (h | 0) * 4)) });
+  const gradient = () => ({ addColorStop() {} });
+  const state = {
+    canvas,
+    fillStyle: '#000000', strokeStyle: '#000000', lineWidth: 1, lineCap: 'butt', lineJoin: 'miter',
+    miterLimit: 10, lineDashOffset: 0, globalAlpha: 1, globalCompositeOperation: 'source-over',
+    font: '10px sans-serif', textAlign: 'start', textBaseline: 'alphabetic', direction: 'ltr',
+    shadowBlur: 0, shadowColor: 'rgba(0, 0, 0, 0)', shadowOffsetX: 0, shadowOffsetY: 0,
+    imageSmoothingEnabled: true, filter: 'none',
+    measureText: (text) => ({ width: String(text).length * 8, actualBoundingBoxAscent: 8, actualBoundingBoxDescent: 2 }),
+    createLinearGradient: gradient, createRadialGradient: gradient, createConicGradient: gradient,
+    createPattern: () => ({ setTransform() {} }),
+    getImageData: (x, y, w, h) => pixels(w, h),
+    createImageData: (w, h) => (typeof w === 'object' ? pixels(w.width, w.height) : pixels(w, h)),
+    getTransform: () => ({ a: 1, b: 0, c: 0, d: 1, e: 0, f: 0 }),
+    isPointInPath: () => false,
+    isPointInStroke: () => false,
+    getLineDash: () => []
+  };
+  const wrapped = {};
+  return new Proxy(state, {
+    get(target, prop) {
+      if (typeof prop === 'symbol') return target[prop];
+      if (!(prop in target)) {
+        // Any other drawing call (fillRect, drawImage, arc, ...) is a timed no-op
+        target[prop] = function () {};
+      }
+      const value = target[prop];
+      if (typeof value !== 'function') return value;
+      return wrapped[prop] || (wrapped[prop] = timed(value, prop));
+    }
+  });
+}
+
+const elements = {};
+
+function element(tag, id) {
+  const el = eventTarget({
+    tagName: String(tag).toUpperCase(), id: id || '', style: {}, dataset: {}, children: [],
+    width: tag === 'canvas' ? 300 : 0, height: tag === 'canvas' ? 150 : 0,
+    textContent: '', innerHTML: '', innerText: '', value: '', disabled: false, hidden: false,
+    classList: { add() {}, remove() {}, toggle() {}, contains: () => false },
+    appendChild(child) { this.children.push(child); return child; },
+    removeChild(child) { return child; },
+    insertBefore(child) { return child; },
+    append() {}, prepend() {}, remove() {}, setAttribute() {}, removeAttribute() {},
+    getAttribute: () => null, focus() {}, blur() {}, click() {},
+    querySelector: (selector) => query(selector),
+    querySelectorAll: () => [],
+    getBoundingClientRect() {
+      const width = this.width || 800;
+      const height = this.height || 600;
+      return { left: 0, top: 0, x: 0, y: 0, width, height, right: width, bottom: height };
+    }
+  });
+  let ctx = null;
+  el.getContext = (type) => (type === '2d' ? (ctx = ctx || context2d(proxy)) : null);
+  el.toDataURL = () => 'data:,';
+  const proxy = stub(el);
+  return proxy;
+}
+
+function query(selector) {
+  const key = String(selector);
+  if (!elements[key]) {
+    const tag = /^[a-z]+$/i.test(key) ? key : 'div';
+    elements[key] = element(tag, key.replace(/^#/, ''));
+  }
+  return elements[key];
+}
+
+class Image {
+  constructor(width, height) {
+    eventTarget(this);
+    this.width = width || 0;
+    this.height = height || 0;
+    this.complete = false;
+    this._src = '';
+  }
+
+  set src(value) {
+    this._src = value;
+    this.complete = true;
+    this.naturalWidth = this.width = this.width || 32;
+    this.naturalHeight = this.height = this.height || 32;
+    setTimer(() => {
+      if (typeof this.onload === 'function') this.onload({ type: 'load', target: this });
+      dispatchTo(this, { type: 'load', target: this });
+    }, 0, false);
+  }
+
+  get src() {
+    return this._src;
+  }
+
+  decode() {
+    return Promise.resolve();
+  }
+}
+
+function Audio() {
+  return stub(eventTarget({
+    play: () => Promise.resolve(), pause() {}, load() {}, currentTime: 0, volume: 1, loop: false,
+    paused: true, duration: 1, cloneNode: () => new Audio()
+  }));
+}
+
+function AudioContext() {
+  return stub({ get currentTime() { return now / 1000; }, state: 'running', sampleRate: 44100 });
+}
+
+const storage = new Map();
+const localStorage = {
+  getItem: (key) => (storage.has(String(key)) ? storage.get(String(key)) : null),
+  setItem: (key, value) => storage.set(String(key), String(value)),
+  removeItem: (key) => storage.delete(String(key)),
+  clear: () => storage.clear(),
+  key: (index) => Array.from(storage.keys())[index] || null,
+  get length() { return storage.size; }
+};
+
+// --- simulated time ----------------------------------------------------
+
+function setTimer(fn, delay, repeat, args = []) {
+  const id = nextTimerId++;
+  if (typeof fn === 'function') {
+    timers.push({ id, fn, args, due: now + Math.max(0, Number(delay) || 0), interval: repeat ? Math.max(1, Number(delay) || 0) : 0 });
+  }
+  return id;
+}
+
+function clearTimer(id) {
+  timers = timers.filter((timer) => timer.id !== id);
+}
+
+function runTimers() {
+  for (let guard = 0; guard < 1000; guard++) {
+    const due = timers.filter((timer) => timer.due <= now).sort((a, b) => a.due - b.due)[0];
+    if (!due) return;
+    if (due.interval) {
+      due.due += due.interval;
+    } else {
+      clearTimer(due.id);
+    }
+    due.fn(...due.args);
+  }
+}
+
+function runAnimationFrames() {
+  const callbacks = animationFrames;
+  animationFrames = [];
+  callbacks.forEach(({ fn }) => fn(now));
+}
+
+// --- input -------------------------------------------------------------
+
+function dispatchTo(target, event) {
+  listeners
+    .filter((l) => l.target === target && l.type === event.type)
+    .forEach((l) => l.fn.call(target, event));
+  const handler = target['on' + event.type];
+  if (typeof handler === 'function') handler.call(target, event);
+}
+
+function dispatch(type, props) {
+  const event = Object.assign({
+    type, repeat: false, shiftKey: false, ctrlKey: false, altKey: false, metaKey: false, button: 0,
+    target: canvas, currentTarget: canvas, preventDefault() {}, stopPropagation() {}, stopImmediatePropagation() {}
+  }, props);
+  [document, window, canvas].forEach((target) => dispatchTo(target, event));
+}
+
+function key(type, [code, name, keyCode]) {
+  dispatch(type, { code, key: name, keyCode, which: keyCode });
+}
+
+function click() {
+  const point = { clientX: 400, clientY: 300, offsetX: 400, offsetY: 300, pageX: 400, pageY: 300 };
+  ['pointerdown', 'mousedown', 'pointerup', 'mouseup', 'click'].forEach((type) => dispatch(type, point));
+}
+
+let held = null;
+
+function input(frame) {
+  if (held && frame >= held.until) {
+    key('keyup', held.key);
+    held = null;
+  }
+  if (frame % 300 === 10) {
+    // Start (or restart) the game
+    key('keydown', ENTER);
+    key('keyup', ENTER);
+    click();
+  }
+  if (!held && frame >= 30 && frame % 15 === 0) {
+    held = { key: KEYS[(frame / 15) % KEYS.length], until: frame + 8 };
+    key('keydown', held.key);
+  }
+}
+
+// --- page --------------------------------------------------------------
+
+const document = stub(eventTarget({
+  readyState: 'complete', hidden: false, visibilityState: 'visible', title: '', cookie: '',
+  body: element('body'), head: element('head'), documentElement: element('html'),
+  fonts: { ready: Promise.resolve(), load: () => Promise.resolve([]), add() {} },
+  getElementById: (id) => query('#' + id),
+  querySelector: (selector) => query(selector),
+  querySelectorAll: () => [],
+  getElementsByTagName: (tag) => [query(tag)],
+  getElementsByClassName: () => [],
+  createElement: (tag) => element(tag),
+  createElementNS: (ns, tag) => element(tag),
+  createTextNode: () => element('text'),
+  hasFocus: () => true
+}));
+const canvas = document.querySelector('canvas');
+
+const window = eventTarget({
+  document, localStorage, sessionStorage: localStorage, Image, Audio, AudioContext, webkitAudioContext: AudioContext,
+  HTMLCanvasElement: function HTMLCanvasElement() {}, HTMLImageElement: Image,
+  innerWidth: 1280, innerHeight: 720, devicePixelRatio: 1,
+  performance: { now: () => now },
+  navigator: stub({ userAgent: 'gameforge-profiler', getGamepads: () => [] }),
+  location: stub({ href: 'http://localhost/', search: '', hash: '', reload() {} }),
+  requestAnimationFrame: (fn) => { const id = nextTimerId++; animationFrames.push({ id, fn }); return id; },
+  cancelAnimationFrame: (id) => { animationFrames = animationFrames.filter((frame) => frame.id !== id); },
+  setTimeout: (fn, delay, ...args) => setTimer(fn, delay, false, args),
+  setInterval: (fn, delay, ...args) => setTimer(fn, delay, true, args),
+  clearTimeout: clearTimer,
+  clearInterval: clearTimer,
+  matchMedia: () => ({ matches: false, addListener() {}, removeListener() {}, addEventListener() {} }),
+  getComputedStyle: () => stub({}),
+  alert() {}, confirm: () => true, prompt: () => null, focus() {}, scrollTo() {},
+  console: {
+    log() {}, info() {}, debug() {}, warn() {},
+    // Errors come from the VM context, so `instanceof Error` does not apply
+    error(...args) { loggedErrors.push(...args.filter((arg) => arg && typeof arg.stack === 'string')); }
+  },
+  Promise, Date, Math, JSON, Map, Set, WeakMap, WeakSet, Symbol, Uint8ClampedArray, Float32Array, Int32Array,
+  Uint8Array, Uint16Array, Uint32Array, Float64Array, ArrayBuffer, DataView
+});
+window.window = window.self = window.globalThis = window.parent = window.top = window;
+const context = vm.createContext(window);
+
+// --- run ---------------------------------------------------------------
+
+function post(session, method, params = {}) {
+  return new Promise((resolve, reject) => {
+    session.post(method, params, (error, result) => (error ? reject(error) : resolve(result)));
+  });
+}
+
+function hotspots(profile, files) {
+  const byFunction = {};
+  let total = 0;
+  profile.nodes.forEach((node) => {
+    const hits = node.hitCount || 0;
+    const { url, functionName, lineNumber } = node.callFrame;
+    if (functionName === '(idle)') return;
+    total += hits;
+    if (!files.has(url) || !hits) return;
+    const name = `${files.get(url)}:${lineNumber + 1} ${functionName || '(anonymous)'}`;
+    byFunction[name] = (byFunction[name] || 0) + hits;
+  });
+  return Object.entries(byFunction)
+    .sort((a, b) => b[1] - a[1])
+    .slice(0, 10)
+    .map(([name, hits]) => [name, total ? (100 * hits) / total : 0]);
+}
+
+async function main() {
+  const result = { frames: [], hotspots: [], draw_calls: {}, error: null };
+  // The CPU profile reports scripts by URL, usually file:// for absolute filenames
+  const files = new Map(manifest.scripts.flatMap((script) => [
+    [script.path, script.name], [pathToFileURL(script.path).href, script.name], ['file://' + script.path, script.name]
+  ]));
+  const session = new inspector.Session();
+  session.connect();
+  await post(session, 'Profiler.enable');
+  await post(session, 'Profiler.setSamplingInterval', { interval: SAMPLING_INTERVAL_US });
+
+  try {
+    for (const script of manifest.scripts) {
+      vm.runInContext(script.code, context, { filename: script.path });
+    }
+    ['DOMContentLoaded', 'load'].forEach((type) => {
+      dispatchTo(document, { type, target: document });
+      dispatchTo(window, { type, target: window });
+    });
+    await new Promise(setImmediate);
+
+    // Measure only the frame loop, not loading
+    Object.keys(drawCalls).forEach((name) => delete drawCalls[name]);
+    await post(session, 'Profiler.start');
+    for (let frame = 0; frame < manifest.frames; frame++) {
+      now += FRAME_MS;
+      renderNs = 0n;
+      const heapBefore = process.memoryUsage().heapUsed;
+      const start = process.hrtime.bigint();
+      input(frame);
+      runTimers();
+      runAnimationFrames();
+      if (loggedErrors.length) throw loggedErrors[0];
+      const totalNs = process.hrtime.bigint() - start;
+      const allocated = Math.max(0, process.memoryUsage().heapUsed - heapBefore);
+      const total = Number(totalNs) / 1e6;
+      const render = Number(renderNs) / 1e6;
+      result.frames.push([total, Math.max(0, total - render), render, allocated]);
+      // Let promise callbacks (image decodes, audio resumes) run between frames
+      await new Promise(setImmediate);
+    }
+  } catch (error) {
+    result.error = error && error.stack ? error.stack.split('\n').filter((line) => !line.includes(__filename)).slice(0, 4).join('\n') : String(error);
+  }
+
+  try {
+    const { profile } = await post(session, 'Profiler.stop');
+    result.hotspots = hotspots(profile, files);
+  } catch (error) {
+    // The profiler was never started: the scripts failed while loading
+  }
+  result.draw_calls = drawCalls;
+  fs.writeFileSync(resultPath, JSON.stringify(result));
+}
+
+main().then(() => process.exit(0), (error) => {
+  console.error(error);
+  process.exit(1);
+});
@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from .tokens import TokenUsage
+
+logger = logging.getLogger(__name__)
+
+STATE_NAME = "state.json"
+
+@dataclass
+class PendingMessage:
+    """A user message whose response or actions have not finished yet"""
+    message_id: str
+    user_message: str
+    response: str = ""
+    rounds: int = 0
+    complete: bool = False
+    executed: List[int] = field(default_factory=list)
+    usage: Dict[str, int] = field(default_factory=lambda: asdict(TokenUsage()))
+
+class RunCheckpoint:
+    """On-disk state of a single-game run, written after every step that costs tokens
+
+    The run directory holds state.json with the finished conversation turns, plus the
+    in-flight message: its raw (possibly partial) response, whether generation
+    completed, and the indices of the actions that were already executed. A resumed
+    run continues generating from the partial response and skips executed actions.
+    """
+
+    def __init__(self, run_dir: str, state: Optional[dict] = None):
+        self.run_dir = os.path.abspath(run_dir)
+        self.path = os.path.join(self.run_dir, STATE_NAME)
+        self.state = state or {
+            "run_id": os.path.basename(self.run_dir),
+            "created": time.time(),
+            "status": "running",
+            "game_name": None,
+            "spec": None,
+            "history": [],
+            "pending": None,
+        }
+        self.pending: Optional[PendingMessage] = (
+            PendingMessage(**self.state["pending"]) if self.state.get("pending") else None
+        )
+
+    @classmethod
+    def create(cls, runs_dir: str, run_id: str, game_name: Optional[str] = None,
+               spec: Optional[str] = None) -> "RunCheckpoint":
+        run_dir = os.path.join(runs_dir, run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        checkpoint = cls(run_dir)
+        checkpoint.state["game_name"] = game_name
+        # The spec as the model saw it, so a resumed watch diffs edits against it
+        checkpoint.state["spec"] = spec
+        checkpoint.save()
+        logger.info(f"Checkpointing run to {run_dir}")
+        return checkpoint
+
+    @classmethod
+    def load(cls, runs_dir: str, run_id: Optional[str] = None) -> "RunCheckpoint":
+        """Load a run by id, or the most recently updated one"""
+        if run_id is None:
+            candidates = [
+                os.path.join(runs_dir, name) for name in os.listdir(runs_dir)
+                if os.path.isfile(os.path.join(runs_dir, name, STATE_NAME))
+            ] if os.path.isdir(runs_dir) else []
+            if not candidates:
+                raise FileNotFoundError(f"No checkpointed runs in {runs_dir}")
+            run_dir = max(candidates, key=lambda path: os.path.getmtime(os.path.join(path, STATE_NAME)))
+        else:
+            run_dir = os.path.join(runs_dir, run_id)
+
+        path = os.path.join(run_dir, STATE_NAME)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(run_dir, json.load(f))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No checkpoint found at {path}")
+        except json.JSONDecodeError:
+            raise ValueError(f"Invalid checkpoint file {path}")
+
+    @property
+    def run_id(self) -> str:
+        return self.state["run_id"]
+
+    @property
+    def complete(self) -> bool:
+        return self.state["status"] == "complete"
+
+    @property
+    def history(self) -> List[dict]:
+        """Finished turns as role/content dicts"""
+        return self.state["history"]
+
+    def start_message(self, message_id: str, user_message: str) -> PendingMessage:
+        """Begin a message, or return the unfinished one if it is being resumed"""
+        if self.pending and self.pending.user_message == user_message:
+            logger.info(
+                f"Resuming message {self.pending.message_id}: {len(self.pending.response)} characters after "
+                f"{self.pending.rounds} round(s), {len(self.pending.executed)} action(s) already executed"
+            )
+            return self.pending
+        self.pending = PendingMessage(message_id=message_id, user_message=user_message)
+        self.save()
+        return self.pending
+
+    def record_round(self, response: str, complete: bool, usage: TokenUsage) -> None:
+        """Store the response so far after a generation round (or an interrupted one)"""
+        self.pending.response = response
+        self.pending.rounds += 1
+        self.pending.complete = complete
+        self.pending.usage = asdict(usage)
+        self.save()
+
+    def record_partial(self, response: str) -> None:
+        """Store text that streamed in before the round was interrupted"""
+        if self.pending and len(response) > len(self.pending.response):
+            self.pending.response = response
+            self.save()
+
+    def record_action(self, index: int) -> None:
+        """Mark the action at `index` of the pending message as executed"""
+        self.pending.executed.append(index)
+        self.save()
+
+    def finish_message(self, response: str) -> None:
+        """Move the pending message into the finished history"""
+        self.state["history"].extend([
+            {"role": "user", "content": self.pending.user_message},
+            {"role": "assistant", "content": response},
+        ])
+        self.pending = None
+        self.save()
+
+    def mark_complete(self) -> None:
+        self.state["status"] = "complete"
+        self.save()
+
+    def save(self) -> None:
+        """Atomically write the state file"""
+        self.state["pending"] = asdict(self.pending) if self.pending else None
+        self.state["updated"] = time.time()
+        fd, tmp_path = tempfile.mkstemp(dir=self.run_dir, prefix=f"{STATE_NAME}.", suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
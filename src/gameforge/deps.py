@@ -0,0 +1,249 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shlex
+import sys
+import sysconfig
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "index.json"
+
+# Segment separators that are rewritten around; anything fancier is left alone
+COMMAND_SEPARATORS = ('&&', ';')
+SHELL_OPERATOR_CHARS = set('();<>|&')
+
+# pip executables: pip, pip3, pip3.11, venv/bin/pip, ...
+PIP_EXECUTABLE = re.compile(r'^(?:.*/)?pip(?:\d+(?:\.\d+)*)?$')
+PYTHON_EXECUTABLE = re.compile(r'^(?:.*/)?python(?:\d+(?:\.\d+)*)?$')
+
+# Install options that are harmless to keep / safe to drop when serving from the cache
+PASSTHROUGH_FLAGS = {'-q', '--quiet', '-v', '--verbose', '--no-cache-dir', '--disable-pip-version-check'}
+DROPPED_FLAGS = {'-U', '--upgrade'}
+REQUIREMENT_FILE_FLAGS = {'-r', '--requirement'}
+
+# Requirement specifiers that name a package on an index, e.g. "pygame", "numpy>=1.26"
+REQUIREMENT_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*(?:\[[A-Za-z0-9,._-]+\])?(?:[<>=!~]=?[^\s]*)?$')
+
+@dataclass
+class PipInstall:
+    pip: List[str]
+    requirements: List[str] = field(default_factory=list)
+    requirement_files: List[str] = field(default_factory=list)
+    flags: List[str] = field(default_factory=list)
+
+def normalize_requirement(requirement: str) -> str:
+    return re.sub(r'[-_.]+', '-', requirement.strip().lower())
+
+def environment_tag() -> str:
+    """Python version and platform of this interpreter, e.g. py3.12-linux-x86_64"""
+    return f"py{sys.version_info.major}.{sys.version_info.minor}-{sysconfig.get_platform()}"
+
+def split_segments(command: str) -> List[str]:
+    """Split at unquoted && and ; into [segment, separator, segment, ...]"""
+    parts = []
+    start = i = 0
+    quote = None
+    while i < len(command):
+        char = command[i]
+        if char == '\\' and quote != "'":
+            i += 2
+            continue
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        else:
+            separator = next((sep for sep in COMMAND_SEPARATORS if command.startswith(sep, i)), None)
+            if separator:
+                parts.extend([command[start:i].strip(), separator])
+                i += len(separator)
+                start = i
+                continue
+        i += 1
+    parts.append(command[start:].strip())
+    return parts
+
+def parse_pip_install(command: str, cwd: Optional[str] = None) -> Optional[PipInstall]:
+    """Recognise a plain `pip install` of index packages, or return None
+
+    Local paths are resolved against `cwd`, the directory the command runs in.
+    """
+    if '$' in command or '`' in command:
+        return None
+    try:
+        lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        argv = list(lexer)
+    except ValueError:
+        return None
+    # Pipes and redirections (including an unquoted "pkg>=1.0") are left to the shell
+    if any(set(arg) <= SHELL_OPERATOR_CHARS for arg in argv):
+        return None
+
+    if len(argv) >= 2 and PIP_EXECUTABLE.match(argv[0]) and argv[1] == 'install':
+        pip, args = argv[:1], argv[2:]
+    elif (len(argv) >= 4 and PYTHON_EXECUTABLE.match(argv[0])
+          and argv[1:3] == ['-m', 'pip'] and argv[3] == 'install'):
+        pip, args = argv[:3], argv[4:]
+    else:
+        return None
+
+    install = PipInstall(pip=pip)
+    args = iter(args)
+    for arg in args:
+        if arg in PASSTHROUGH_FLAGS:
+            install.flags.append(arg)
+        elif arg in DROPPED_FLAGS:
+            continue
+        elif arg in REQUIREMENT_FILE_FLAGS:
+            path = next(args, None)
+            if path is None:
+                return None
+            install.requirement_files.append(path)
+        elif arg.startswith('-'):
+            # Editable installs, custom indexes, --user, ...: run the command as written
+            return None
+        elif REQUIREMENT_PATTERN.match(arg) and not os.path.exists(os.path.join(cwd or os.getcwd(), arg)):
+            install.requirements.append(arg)
+        else:
+            return None
+
+    if not install.requirements and not install.requirement_files:
+        return None
+    return install
+
+def _changed_dir(segment: str, cwd: Optional[str]) -> Optional[str]:
+    """The directory after a plain `cd DIR` segment; other segments leave `cwd` as it is"""
+    try:
+        argv = shlex.split(segment)
+    except ValueError:
+        return cwd
+    if len(argv) == 2 and argv[0] == 'cd' and not any(char in argv[1] for char in '$~`'):
+        return os.path.normpath(os.path.join(cwd or os.getcwd(), argv[1]))
+    return cwd
+
+class DependencyCache:
+    """Local wheel cache that pip installs from generated artifacts are served from
+
+    `pip install X` is rewritten to build or download wheels into the cache once and
+    then install with `--no-index --find-links <cache>`. Requirements that have been
+    installed successfully before skip the wheel step entirely, so repeated installs
+    across games and runs are quick and need no network access. Requirement files are
+    warm once a file with the same contents has been installed.
+
+    Warm entries are kept per Python version and platform (`environment`), since a
+    wheel built for one interpreter may not install on another.
+    """
+
+    def __init__(self, cache_dir: str, environment: Optional[str] = None):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.environment = environment or environment_tag()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index_path = os.path.join(self.cache_dir, INDEX_NAME)
+        self._lock = threading.Lock()
+        self._warm = self._load_index()
+
+    def rewrite(self, command: str, cwd: Optional[str] = None) -> Tuple[str, List[str]]:
+        """Rewrite pip installs in `command`, run in directory `cwd`, to use the cache
+
+        Returns the command to run and the requirements to mark warm if it succeeds.
+        Commands without a recognisable pip install are returned unchanged.
+        """
+        parts = split_segments(command)
+        pending: List[str] = []
+        rewritten = False
+        for i in range(0, len(parts), 2):
+            install = parse_pip_install(parts[i], cwd)
+            if install is None:
+                cwd = _changed_dir(parts[i], cwd)
+                continue
+            keys = self._requirement_file_keys(install, cwd)
+            parts[i] = self._install_command(install, keys)
+            pending.extend(install.requirements)
+            pending.extend(key for key in keys if key)
+            rewritten = True
+
+        if not rewritten:
+            return command, []
+        new_command = " ".join(part for part in parts if part)
+        logger.info(f"Serving pip install from wheel cache: {new_command}")
+        return new_command, pending
+
+    def is_warm(self, requirement: str) -> bool:
+        with self._lock:
+            return self._key(requirement) in self._warm
+
+    def mark_warm(self, requirements: List[str]) -> None:
+        """Record requirements whose wheels are now in the cache"""
+        if not requirements:
+            return
+        with self._lock:
+            new = {self._key(requirement) for requirement in requirements} - self._warm
+            if not new:
+                return
+            self._warm |= new
+            self._save_index()
+
+    def _key(self, requirement: str) -> str:
+        return f"{self.environment}:{normalize_requirement(requirement)}"
+
+    @staticmethod
+    def _requirement_file_keys(install: PipInstall, cwd: Optional[str]) -> List[Optional[str]]:
+        """Cache keys for the requirement files from their contents; None if unreadable or using options"""
+        keys = []
+        for path in install.requirement_files:
+            try:
+                with open(os.path.join(cwd or os.getcwd(), path), 'rb') as f:
+                    content = f.read()
+            except OSError:
+                keys.append(None)
+                continue
+            lines = [line.strip() for line in content.decode('utf-8', errors='replace').splitlines()]
+            if any(line.startswith('-') for line in lines):
+                keys.append(None)
+            else:
+                keys.append(f"requirements-file:{hashlib.sha256(content).hexdigest()}")
+        return keys
+
+    def _install_command(self, install: PipInstall, requirement_file_keys: List[Optional[str]]) -> str:
+        pip = " ".join(shlex.quote(arg) for arg in install.pip)
+        flags = "".join(f" {flag}" for flag in install.flags)
+        cache = shlex.quote(self.cache_dir)
+        targets = " ".join(
+            [shlex.quote(requirement) for requirement in install.requirements]
+            + [f"-r {shlex.quote(path)}" for path in install.requirement_files]
+        )
+        offline = f"{pip} install{flags} --no-index --find-links {cache} {targets}"
+
+        # Requirement files are identified by their contents, since they may change between runs
+        warm = all(self.is_warm(r) for r in install.requirements) and all(
+            key is not None and self.is_warm(key) for key in requirement_file_keys
+        )
+        if warm:
+            return offline
+        return f"{pip} wheel{flags} --wheel-dir {cache} --find-links {cache} {targets} && {offline}"
+
+    def _load_index(self) -> Set[str]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return set(json.load(f))
+        except FileNotFoundError:
+            return set()
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable wheel cache index {self.index_path}: {e}")
+            return set()
+
+    def _save_index(self) -> None:
+        """Atomically persist the warm requirements; callers hold _lock"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{INDEX_NAME}.", suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(sorted(self._warm), f, indent=2)
+        os.replace(tmp_path, self.index_path)
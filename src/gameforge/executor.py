@@ -1,14 +1,46 @@
+import asyncio
+import hashlib
+import json
 import os
-import subprocess
+import tempfile
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 import logging
+from .deps import DependencyCache
+from .instrumentation import Instrumentation
 from .parser import GameForgeAction, ActionType
+from .patcher import PatchError, apply_patch, verify_content
+from .shell import CommandPolicy, ShellSession
+from .skeletons import Skeleton
 
 logger = logging.getLogger(__name__)
 
+MANIFEST_NAME = ".gameforge_manifest.json"
+
+@dataclass
+class WriteSummary:
+    created: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        summary = (f"{len(self.created)} created, {len(self.changed)} changed, "
+                   f"{len(self.unchanged)} unchanged")
+        if self.failed:
+            summary += f", {len(self.failed)} failed ({', '.join(self.failed)})"
+        return summary
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
 class GameForgeExecutor:
-    def __init__(self, work_dir: Optional[str] = None):
+    def __init__(self, work_dir: Optional[str] = None, output_dir: Optional[str] = None,
+                 command_timeout: float = 120.0, instrumentation: Optional[Instrumentation] = None,
+                 command_policy: Optional[CommandPolicy] = None,
+                 dependency_cache: Optional[DependencyCache] = None, run_shell: bool = True):
         # Convert to absolute path if relative path provided
         if work_dir:
             self.work_dir = os.path.abspath(work_dir)
@@ -18,71 +50,242 @@ class GameForgeExecutor:
                 "../.."
             ))
         
-        # Ensure ai_output directory exists in work_dir
-        self.output_dir = os.path.join(self.work_dir, "ai_output")
+        # Ensure the output directory (ai_output in work_dir by default) exists
+        self.output_dir = os.path.abspath(output_dir or os.path.join(self.work_dir, "ai_output"))
         os.makedirs(self.output_dir, exist_ok=True)
+        self.command_timeout = command_timeout
+        self.command_policy = command_policy or CommandPolicy()
+        self._shell: Optional[ShellSession] = None
+        self.dependency_cache = dependency_cache
+        self.run_shell = run_shell
+        self.instrumentation = instrumentation or Instrumentation()
+
+        # Content hashes of files written to output_dir, persisted across runs
+        self.manifest_path = os.path.join(self.output_dir, MANIFEST_NAME)
+        self._manifest = self._load_manifest()
+        self._manifest_lock = threading.Lock()
+        self.summary = WriteSummary()
         
     def execute_action(self, action: GameForgeAction) -> None:
-        """Execute a gameforge action (file or shell command)"""
+        """Execute a gameforge action (file or shell command) from code without a running event loop"""
         try:
             if action.type == ActionType.FILE:
                 self._handle_file_action(action)
+            elif action.type == ActionType.PATCH:
+                self._handle_patch_action(action)
             elif action.type == ActionType.SHELL:
-                self._handle_shell_action(action)
+                # Same policy, timeout and dependency cache as the async path, in a session of its own
+                asyncio.run(self._run_shell_action(action))
         except Exception as e:
             logger.error(f"Failed to execute action: {e}")
             raise
     
+    async def execute_action_async(self, action: GameForgeAction) -> None:
+        """Execute a gameforge action without blocking the event loop"""
+        try:
+            if action.type == ActionType.FILE:
+                await asyncio.to_thread(self._handle_file_action, action)
+            elif action.type == ActionType.PATCH:
+                await asyncio.to_thread(self._handle_patch_action, action)
+            elif action.type == ActionType.SHELL:
+                await self._handle_shell_action_async(action)
+        except Exception as e:
+            logger.error(f"Failed to execute action: {e}")
+            raise
+
     def _handle_file_action(self, action: GameForgeAction) -> None:
         """Handle file creation/update actions"""
         if not action.file_path:
             logger.error("No file path provided for file action")
             return
 
-        # Ensure file path is relative to ai_output directory
+        with self.instrumentation.span("file_write", path=action.file_path, bytes=len(action.content)) as span:
+            span["changed"] = self.write_file(action.file_path, action.content)
+
+    def _handle_patch_action(self, action: GameForgeAction) -> None:
+        """Apply a unified diff or SEARCH/REPLACE blocks to an existing file
+
+        Raises PatchError, after recording the file as failed, if the patch does not apply.
+        """
+        if not action.file_path:
+            logger.error("No file path provided for patch action")
+            return
+
         full_path = os.path.join(self.output_dir, action.file_path)
-        
+        with self.instrumentation.span("file_patch", path=action.file_path) as span:
+            try:
+                with open(full_path, 'r', encoding='utf-8') as f:
+                    original = f.read()
+                patched = apply_patch(original, action.content)
+                error = verify_content(action.file_path, patched)
+                if error:
+                    raise PatchError(error)
+            except (OSError, PatchError) as e:
+                logger.error(f"Failed to patch file {full_path}: {e}")
+                span["error"] = str(e)
+                with self._manifest_lock:
+                    self.summary.failed.append(os.path.relpath(full_path, self.output_dir))
+                raise PatchError(f"Failed to patch {action.file_path}: {e}") from e
+            span["changed"] = self.write_file(action.file_path, patched)
+
+    def write_file(self, file_path: str, content: str) -> bool:
+        """Write a file under output_dir unless it already has this content
+
+        Changed files are written to a temporary sibling and moved into place with
+        os.replace, so readers never see a half-written file. Returns True if the
+        file on disk was modified.
+        """
+        # Ensure file path is relative to ai_output directory
+        full_path = os.path.join(self.output_dir, file_path)
+        relative_path = os.path.relpath(full_path, self.output_dir)
+        data = content.encode('utf-8')
+        digest = content_hash(data)
+
+        exists = os.path.exists(full_path)
+        if exists and self._is_unchanged(full_path, digest, len(data)):
+            with self._manifest_lock:
+                self.summary.unchanged.append(relative_path)
+                if self._manifest.get(relative_path) != digest:
+                    self._manifest[relative_path] = digest
+                    self._save_manifest()
+            logger.info(f"Unchanged file: {full_path}")
+            return False
+
         # Create directories if they don't exist
         os.makedirs(os.path.dirname(full_path), exist_ok=True)
 
         try:
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(action.content)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(full_path),
+                prefix=f".{os.path.basename(full_path)}.",
+                suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, full_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
             logger.info(f"Created/updated file: {full_path}")
         except Exception as e:
             logger.error(f"Failed to write file {full_path}: {str(e)}")
+            return False
+
+        with self._manifest_lock:
+            (self.summary.changed if exists else self.summary.created).append(relative_path)
+            self._manifest[relative_path] = digest
+            self._save_manifest()
+        return True
+
+    def install_skeleton(self, skeleton: Skeleton) -> List[str]:
+        """Copy a skeleton's files into output_dir; returns the files that were written"""
+        written = [path for path, content in skeleton.files.items() if self.write_file(path, content)]
+        logger.info(f"Installed {skeleton.name} skeleton ({len(written)} of {len(skeleton.files)} files written)")
+        return written
+
+    def pop_summary(self) -> WriteSummary:
+        """Return the files written since the last call and start a new summary"""
+        with self._manifest_lock:
+            summary, self.summary = self.summary, WriteSummary()
+        return summary
+
+    def _is_unchanged(self, full_path: str, digest: str, size: int) -> bool:
+        """True if the file on disk already holds the content with `digest`
+
+        The manifest alone is not trusted: a file edited outside GameForge can keep
+        its size, so the bytes on disk are hashed whenever the size matches.
+        """
+        if os.path.getsize(full_path) != size:
+            return False
+        with open(full_path, 'rb') as f:
+            return content_hash(f.read()) == digest
+
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable manifest {self.manifest_path}: {e}")
+            return {}
+
+    def _save_manifest(self) -> None:
+        """Atomically persist the manifest; callers hold _manifest_lock"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, prefix=f"{MANIFEST_NAME}.", suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
     
-    def _handle_shell_action(self, action: GameForgeAction) -> None:
-        """Execute shell commands with error handling and environment setup"""
-        # Split multiple commands and execute them separately
-        commands = action.content.strip().split('\n')
-        
-        for cmd in commands:
-            cmd = cmd.strip()
-            if not cmd:
-                continue
-                
-            try:
-                # Use shell=True to support command chaining and environment variables
-                result = subprocess.run(
-                    cmd,
-                    shell=True,
-                    cwd=self.work_dir,
-                    capture_output=True,
-                    text=True,
-                    env={**os.environ}  # Use current environment
-                )
-                
-                if result.stdout:
-                    logger.info(f"Command output: {result.stdout}")
-                
-                if result.returncode != 0:
-                    logger.error(f"Command failed: {cmd}")
-                    logger.error(f"Error output: {result.stderr}")
-                    # Continue execution instead of raising error
-                    continue
-                    
-            except Exception as e:
-                logger.error(f"Failed to execute command '{cmd}': {str(e)}")
-                # Continue with next command instead of stopping
-                continue
\ No newline at end of file
+    async def _run_shell_action(self, action: GameForgeAction) -> None:
+        try:
+            await self._handle_shell_action_async(action)
+        finally:
+            await self.close_shell()
+
+    async def _handle_shell_action_async(self, action: GameForgeAction) -> None:
+        """Feed each command line into the artifact's persistent shell session"""
+        if not self.run_shell:
+            logger.info(f"Skipping shell action in {self.output_dir}: {action.content.strip()}")
+            return
+        for cmd in split_commands(action.content):
+            with self.instrumentation.span("shell_command", command=cmd) as span:
+                span["exit_code"] = await self.run_command(cmd)
+
+    async def run_command(self, cmd: str, timeout: Optional[float] = None) -> Optional[int]:
+        """Run one shell command and return its exit code, or None if it was blocked or timed out"""
+        reason = self.command_policy.check(cmd)
+        if reason:
+            logger.error(f"Command blocked by policy ({reason}): {cmd}")
+            return None
+
+        if self._shell is None:
+            self._shell = ShellSession(cwd=self.work_dir, timeout=self.command_timeout)
+
+        installed: List[str] = []
+        if self.dependency_cache:
+            # Paths in the command are relative to wherever earlier commands left the shell
+            cmd, installed = self.dependency_cache.rewrite(cmd, cwd=self._shell.current_dir)
+
+        try:
+            result = await self._shell.run(cmd, timeout=timeout)
+        except Exception as e:
+            logger.error(f"Failed to execute command '{cmd}': {str(e)}")
+            await self._shell.close()
+            return None
+
+        if result.timed_out:
+            logger.error(f"Command timed out after {timeout or self.command_timeout}s: {cmd}")
+            return None
+
+        if result.exit_code != 0:
+            logger.error(f"Command failed with exit code {result.exit_code}: {cmd}")
+        elif installed:
+            self.dependency_cache.mark_warm(installed)
+
+        return result.exit_code
+
+    async def close_shell(self) -> None:
+        """End the shell session of the current artifact; the next command starts a new one"""
+        shell, self._shell = self._shell, None
+        if shell:
+            await shell.close()
+
+def split_commands(content: str) -> List[str]:
+    """Split a shell action into command lines, joining backslash continuations"""
+    commands = []
+    pending = ""
+    for line in content.strip().split('\n'):
+        line = line.strip()
+        if line.endswith('\\'):
+            pending += line[:-1] + " "
+            continue
+        line = (pending + line).strip()
+        pending = ""
+        if line:
+            commands.append(line)
+    if pending.strip():
+        commands.append(pending.strip())
+    return commands
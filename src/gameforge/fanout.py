@@ -0,0 +1,242 @@
+import asyncio
+import html
+import json
+import logging
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from .ai_client import GameForgeChat, Message
+from .parser import ActionType, GameForgeAction, GameForgeParser, ParsedResponse
+from .prompts import build_file_prompt, build_plan_prompt
+from .scheduler import ActionScheduler, is_setup_command, referenced_files
+from .skeletons import Skeleton
+from .tokens import TokenUsage
+
+logger = logging.getLogger(__name__)
+
+JSON_FENCE = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL)
+
+@dataclass
+class PlannedFile:
+    path: str
+    purpose: str = ""
+    interface: str = ""
+
+@dataclass
+class ProjectPlan:
+    id: str
+    title: str
+    files: List[PlannedFile]
+    shell: List[str] = field(default_factory=list)
+
+    def format(self) -> str:
+        """The plan as shown to every per-file call; stable so those calls can be cached"""
+        return json.dumps(asdict(self), indent=2)
+
+@dataclass
+class FileResult:
+    planned: PlannedFile
+    response: str = ""
+    actions: List[GameForgeAction] = field(default_factory=list)
+    truncated: bool = False
+    error: Optional[str] = None
+    usage: TokenUsage = field(default_factory=TokenUsage)
+
+def parse_plan(text: str) -> ProjectPlan:
+    """Parse the planning response, which may wrap its JSON in a code fence"""
+    fenced = JSON_FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end < start:
+        raise ValueError("No JSON object in planning response")
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid plan JSON: {e}")
+
+    files = []
+    seen = set()
+    for entry in data.get('files') or []:
+        path = os.path.normpath(str(entry.get('path', '')).strip()) if isinstance(entry, dict) else ""
+        if not path or path == '.' or os.path.isabs(path) or path.startswith('..'):
+            raise ValueError(f"Invalid file path in plan: {entry!r}")
+        if path in seen:
+            continue
+        seen.add(path)
+        files.append(PlannedFile(
+            path=path,
+            purpose=str(entry.get('purpose', '')),
+            interface=str(entry.get('interface', ''))
+        ))
+    if not files:
+        raise ValueError("Plan lists no files")
+
+    shell = data.get('shell') or []
+    if isinstance(shell, str):
+        shell = [shell]
+    return ProjectPlan(
+        id=str(data.get('id') or 'game'),
+        title=str(data.get('title') or data.get('id') or 'Game'),
+        files=files,
+        shell=[str(command) for command in shell if str(command).strip()]
+    )
+
+def render_artifact(parsed: ParsedResponse) -> str:
+    """Render a merged response as the single artifact a one-shot generation would have produced"""
+    # The id and title come from the model's plan and may contain quotes or '>'
+    lines = [f'<forgeArtifact id="{html.escape(parsed.artifact_id)}" title="{html.escape(parsed.title)}">']
+    for action in parsed.actions:
+        path = f' filePath="{html.escape(action.file_path)}"' if action.file_path else ""
+        lines.append(f'<forgeAction type="{action.type.value}"{path}>\n{action.content.strip()}\n</forgeAction>')
+    lines.append('</forgeArtifact>')
+    return "\n".join(lines)
+
+class PlanFanOut:
+    """Generate a game as a short planning call followed by concurrent per-file calls
+
+    The plan lists the files with the interfaces they expose to each other. Every file
+    is then generated by its own request against the same plan, and written as soon as
+    it arrives. Setup commands from the plan run meanwhile, each once the planned files
+    it reads (e.g. requirements.txt) are written, and the other commands run last. The
+    results are merged into one ParsedResponse and recorded on `chat` as a single turn,
+    so follow-up and repair turns see an ordinary artifact.
+    """
+
+    def __init__(self, chat: GameForgeChat, max_concurrency: int = 8, skeleton: Optional[Skeleton] = None):
+        self.chat = chat
+        self.max_concurrency = max_concurrency
+        self.skeleton = skeleton
+        self.plan: Optional[ProjectPlan] = None
+        self.results: List[FileResult] = []
+        self.parsed: Optional[ParsedResponse] = None
+
+    async def run(self, user_message: str) -> str:
+        """Plan, generate and execute the game; returns the merged response"""
+        chat = self.chat
+        instrumentation = chat.ai.instrumentation
+        usage = TokenUsage()
+
+        with instrumentation.span("plan") as span:
+            completion = await chat.ai.complete(
+                [Message(role="user", content=build_plan_prompt(user_message))], temperature=chat.temperature
+            )
+            usage.add(completion.usage)
+            try:
+                self.plan = parse_plan(completion.text)
+            except ValueError as e:
+                logger.warning(f"Planning failed ({e}); generating the game in a single response")
+                chat.usage.add(usage)
+                return await chat.send_message(user_message)
+            if self.skeleton:
+                self.plan.files = [f for f in self.plan.files if f.path not in self.skeleton.files]
+            span.update(files=len(self.plan.files), output_tokens=completion.usage.output_tokens)
+        logger.info(f"Planned {len(self.plan.files)} file(s): {', '.join(f.path for f in self.plan.files)}")
+
+        scheduler = ActionScheduler(chat.executor)
+        setup = [command for command in self.plan.shell if is_setup_command(command)]
+        # Planned files each setup command still waits for; commands are submitted in plan order
+        waiting = [referenced_files(command, [planned.path for planned in self.plan.files]) for command in setup]
+        submitted = 0
+
+        def submit_ready_setup() -> None:
+            nonlocal submitted
+            while submitted < len(setup) and not waiting[submitted]:
+                scheduler.submit(GameForgeAction(type=ActionType.SHELL, content=setup[submitted]))
+                submitted += 1
+
+        submit_ready_setup()
+        early_setup = setup[:submitted]
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        owned = {planned.path for planned in self.plan.files}
+
+        async def generate(planned: PlannedFile) -> FileResult:
+            async with semaphore:
+                result = await self._generate_file(user_message, planned, owned)
+            for action in result.actions:
+                scheduler.submit(action)
+            for paths in waiting:
+                paths.discard(planned.path)
+            submit_ready_setup()
+            return result
+
+        with instrumentation.span("fan_out", files=len(self.plan.files)):
+            self.results = await asyncio.gather(*(generate(planned) for planned in self.plan.files))
+
+        shell = [
+            GameForgeAction(type=ActionType.SHELL, content=command)
+            for command in self.plan.shell if command not in setup
+        ]
+        with instrumentation.span("execute"):
+            try:
+                await scheduler.run(shell)
+            finally:
+                await chat.executor.close_shell()
+
+        self.parsed = self._merge(early_setup, setup[len(early_setup):], shell)
+        for result in self.results:
+            usage.add(result.usage)
+        response = render_artifact(self.parsed)
+
+        chat.usage.add(usage)
+        chat.last_usage = usage
+        chat.write_summary = chat.executor.pop_summary()
+        chat.message_history.extend([
+            Message(role="user", content=user_message),
+            Message(role="assistant", content=response)
+        ])
+        logger.info(f"Files: {chat.write_summary}")
+        return response
+
+    async def _generate_file(self, user_message: str, planned: PlannedFile, owned: set) -> FileResult:
+        """Generate one planned file in a fresh conversation"""
+        result = FileResult(planned=planned)
+        chat = GameForgeChat(self.chat.ai, GameForgeParser(), self.chat.executor,
+                             patch_followups=False, temperature=self.chat.temperature)
+        try:
+            result.response = await chat.generate(build_file_prompt(user_message, self.plan.format(), planned.path))
+        except Exception as e:
+            logger.error(f"Generating {planned.path} failed: {e}")
+            result.error = str(e) or type(e).__name__
+            return result
+        result.usage = chat.usage
+
+        parsed = GameForgeParser().parse(planned.path, result.response)
+        result.truncated = parsed.truncated
+        for action in parsed.actions:
+            if action.type != ActionType.FILE or not action.file_path:
+                continue
+            path = os.path.normpath(action.file_path)
+            if path != planned.path and path in owned:
+                logger.warning(f"Ignoring {path} written by the call for {planned.path}")
+                continue
+            result.actions.append(action)
+        if not any(os.path.normpath(action.file_path) == planned.path for action in result.actions):
+            result.error = f"No file action for {planned.path}"
+            logger.error(result.error)
+        return result
+
+    def _merge(self, early_setup: List[str], late_setup: List[str], shell: List[GameForgeAction]) -> ParsedResponse:
+        """Combine the plan's commands and every file into the response a single call would give
+
+        Setup commands that waited for planned files are placed after the files, so a
+        replay of the response runs them in an order that works.
+        """
+        actions = [GameForgeAction(type=ActionType.SHELL, content=command) for command in early_setup]
+        errors = []
+        for result in self.results:
+            actions.extend(result.actions)
+            if result.error:
+                errors.append(result.error)
+        actions.extend(GameForgeAction(type=ActionType.SHELL, content=command) for command in late_setup)
+        actions.extend(shell)
+        return ParsedResponse(
+            artifact_id=self.plan.id,
+            title=self.plan.title,
+            actions=actions,
+            truncated=any(result.truncated for result in self.results),
+            errors=errors
+        )
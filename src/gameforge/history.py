@@ -0,0 +1,149 @@
+import hashlib
+import logging
+import os
+from dataclasses import replace
+from typing import Dict, List, Optional, Sequence, Set
+
+from .parser import ActionType, ForgeTokenizer, ParsedResponse
+from .tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Prose before an artifact is kept in compacted turns, up to this many characters
+MAX_PROSE_CHARS = 400
+
+class HistoryManager:
+    """Bound the conversation sent to the API to a token budget
+
+    History within the budget is sent unchanged. Otherwise the first user message
+    (the game spec) and the most recent turns are sent verbatim, and older assistant
+    turns are replaced by a manifest of the files they wrote (path, hash, size).
+    The files those turns wrote are attached to the latest user message with their
+    current on-disk contents, so edits work against what is actually in the output
+    directory. Only complete file actions count as showing a file; with `patch_mode`
+    every generated file whose current contents no verbatim turn shows is attached,
+    since patches must quote the file exactly.
+    """
+
+    def __init__(self, output_dir: str, token_budget: int = 60000, keep_recent_turns: int = 1):
+        self.output_dir = output_dir
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+
+    def build(self, history: Sequence, patch_mode: bool = False) -> List:
+        """Return the messages to send for `history`, which ends with the new user message"""
+        messages = list(history)
+        compacted = self._compact(messages, 0, patch_mode)
+        if len(messages) <= 2 * self.keep_recent_turns + 1 or self.count_tokens(compacted) <= self.token_budget:
+            return compacted
+
+        for keep in range(self.keep_recent_turns, -1, -1):
+            compacted = self._compact(messages, len(messages) - 1 - 2 * keep, patch_mode)
+            if self.count_tokens(compacted) <= self.token_budget:
+                return compacted
+
+        # Still over budget: drop the oldest compacted exchanges, keeping the spec
+        while len(compacted) > 3 and self.count_tokens(compacted) > self.token_budget:
+            del compacted[1:3]
+        logger.info(f"History trimmed to {len(compacted)} messages")
+        return compacted
+
+    @staticmethod
+    def count_tokens(messages: Sequence) -> int:
+        return sum(estimate_tokens(message.content) for message in messages)
+
+    def _compact(self, messages: List, verbatim_from: int, patch_mode: bool) -> List:
+        """Compact assistant turns before index `verbatim_from` and attach the files they hide"""
+        attached = self._attached_files(messages, verbatim_from, patch_mode)
+
+        compacted = []
+        for index, message in enumerate(messages):
+            if message.role == "assistant" and index < verbatim_from:
+                message = replace(message, content=self._manifest(message.content))
+            compacted.append(message)
+
+        if attached:
+            compacted[-1] = replace(
+                compacted[-1],
+                content=f"{compacted[-1].content}\n\n{self._current_contents(attached)}"
+            )
+        return compacted
+
+    def _manifest(self, content: str) -> str:
+        """Summarise an assistant turn as its prose plus the files and commands it emitted"""
+        parsed = self._parse(content)
+        if not parsed.actions:
+            return content
+
+        prose = content.split('<forgeArtifact', 1)[0].strip()
+        if len(prose) > MAX_PROSE_CHARS:
+            prose = prose[:MAX_PROSE_CHARS].rstrip() + "..."
+
+        lines = [prose, f"[Earlier response \"{parsed.title}\", contents omitted. Files and commands:]"]
+        for action in parsed.actions:
+            if action.type == ActionType.SHELL:
+                lines.append(f"- shell: {action.content.strip()}")
+            elif action.type == ActionType.PATCH:
+                lines.append(f"- {action.file_path} (patched)")
+            elif action.file_path:
+                digest = hashlib.sha256(action.content.encode('utf-8')).hexdigest()[:12]
+                lines.append(
+                    f"- {action.file_path} (sha256 {digest}, {action.content.count(chr(10)) + 1} lines)"
+                )
+        return "\n".join(line for line in lines if line)
+
+    @staticmethod
+    def _parse(content: str) -> ParsedResponse:
+        # The tokenizer is used directly so plain prose turns are not logged as malformed
+        tokenizer = ForgeTokenizer("history")
+        tokenizer.feed(content)
+        return tokenizer.close()
+
+    def _written_files(self, messages: Sequence) -> Set[str]:
+        paths = set()
+        for message in messages:
+            if message.role == "assistant":
+                paths.update(
+                    os.path.normpath(action.file_path)
+                    for action in self._parse(message.content).actions
+                    if action.file_path
+                )
+        return paths
+
+    def _visible_contents(self, messages: Sequence) -> Dict[str, str]:
+        """The latest complete contents of each file as shown by `messages`; patched files are not shown"""
+        visible = {}
+        for message in messages:
+            if message.role != "assistant":
+                continue
+            for action in self._parse(message.content).actions:
+                if not action.file_path:
+                    continue
+                path = os.path.normpath(action.file_path)
+                if action.type == ActionType.FILE:
+                    visible[path] = action.content
+                else:
+                    visible.pop(path, None)
+        return visible
+
+    def _attached_files(self, messages: Sequence, verbatim_from: int, patch_mode: bool) -> List[str]:
+        """Files written by compacted turns (any turn in patch mode) whose current contents no verbatim turn shows"""
+        written = self._written_files(messages if patch_mode else messages[:verbatim_from])
+        visible = self._visible_contents(messages[verbatim_from:])
+        attached = []
+        for path in sorted(written):
+            full_path = os.path.join(self.output_dir, path)
+            if not os.path.isfile(full_path):
+                continue
+            with open(full_path, 'r', encoding='utf-8', errors='replace') as f:
+                if path in visible and f.read().strip() == visible[path].strip():
+                    continue
+            attached.append(path)
+        return attached
+
+    def _current_contents(self, paths: List[str]) -> str:
+        sections = ["Current contents of the files written in earlier turns:"]
+        for path in paths:
+            with open(os.path.join(self.output_dir, path), 'r', encoding='utf-8') as f:
+                sections.append(f"--- {path} ---\n{f.read()}")
+        return "\n\n".join(sections)
@@ -0,0 +1,119 @@
+import json
+import math
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+@dataclass
+class Span:
+    name: str
+    run_id: str
+    start: float
+    duration: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `values`"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+class Instrumentation:
+    """Records timed spans for each pipeline stage and emits them as JSON lines
+
+    Spans are kept in memory for the summary table and, when `path` is given,
+    appended to that file as they finish so a crashed run still leaves its data.
+    """
+
+    def __init__(self, path: Optional[str] = None, run_id: Optional[str] = None):
+        self.path = path
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block; the yielded dict can be filled with attributes known only at the end"""
+        start = time.time()
+        started = time.perf_counter()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes.setdefault("error", type(e).__name__)
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started, start=start, **attributes)
+
+    def record(self, name: str, duration: float, start: Optional[float] = None, **attributes: Any) -> Span:
+        """Record a span whose duration was measured elsewhere"""
+        span = Span(
+            name=name,
+            run_id=self.run_id,
+            start=start if start is not None else time.time() - duration,
+            duration=duration,
+            attributes=attributes
+        )
+        with self._lock:
+            self.spans.append(span)
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(asdict(span), default=str) + "\n")
+        return span
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage count, total, p50, p95 and token totals"""
+        grouped = defaultdict(list)
+        for span in self.spans:
+            grouped[span.name].append(span)
+
+        summary = {}
+        for name, spans in grouped.items():
+            durations = [span.duration for span in spans]
+            stats = {
+                "count": len(spans),
+                "total": sum(durations),
+                "p50": percentile(durations, 50),
+                "p95": percentile(durations, 95),
+            }
+            for key in ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"):
+                values = [span.attributes[key] for span in spans if key in span.attributes]
+                if values:
+                    stats[key] = sum(values)
+            summary[name] = stats
+        return summary
+
+    def print_summary(self, console: Optional[Console] = None) -> None:
+        """Print the per-stage summary as a table"""
+        console = console or Console()
+        table = Table(title=f"Pipeline timings (run {self.run_id})")
+        table.add_column("Stage", no_wrap=True)
+        table.add_column("Count", justify="right")
+        table.add_column("Total (s)", justify="right")
+        table.add_column("p50 (s)", justify="right")
+        table.add_column("p95 (s)", justify="right")
+        table.add_column("Input", justify="right")
+        table.add_column("Cached", justify="right")
+        table.add_column("Output", justify="right")
+
+        for name, stats in self.summary().items():
+            cached = stats.get("cache_read_input_tokens", 0) + stats.get("cache_creation_input_tokens", 0)
+            table.add_row(
+                name,
+                str(stats["count"]),
+                f"{stats['total']:.3f}",
+                f"{stats['p50']:.3f}",
+                f"{stats['p95']:.3f}",
+                str(stats.get("input_tokens", "")),
+                str(cached) if "cache_read_input_tokens" in stats else "",
+                str(stats.get("output_tokens", ""))
+            )
+        console.print(table)
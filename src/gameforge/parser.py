@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional, List, Dict, Callable
+import html
 import re
 import logging
 
@@ -9,6 +10,7 @@ logger = logging.getLogger(__name__)
 class ActionType(Enum):
     FILE = "file"
     SHELL = "shell"
+    PATCH = "patch"
 
 @dataclass
 class GameForgeAction:
@@ -27,48 +29,274 @@ class ParsedResponse:
     artifact_id: str
     title: str
     actions: List[GameForgeAction]
+    truncated: bool = False
+    errors: List[str] = field(default_factory=list)
+
+ATTRIBUTE_PATTERN = re.compile(r'([A-Za-z_][\w-]*)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+ARTIFACT_OPEN = 'forgeArtifact'
+ARTIFACT_CLOSE = '/forgeArtifact'
+ACTION_OPEN = 'forgeAction'
+ACTION_CLOSE = '/forgeAction'
+TAG_NAMES = (ARTIFACT_OPEN, ARTIFACT_CLOSE, ACTION_OPEN, ACTION_CLOSE)
+
+# Markers that end the content of an action, in the order they are checked
+ACTION_TERMINATORS = ('<' + ACTION_CLOSE, '<' + ACTION_OPEN, '<' + ARTIFACT_CLOSE)
+LONGEST_TERMINATOR = max(len(marker) for marker in ACTION_TERMINATORS)
+
+# A forge tag whose '>' has not arrived within this many characters is treated as text
+MAX_TAG_LENGTH = 1024
+
+_WAIT = object()
+
+class ForgeTokenizer:
+    """Single-pass, incremental tokenizer for the forgeArtifact/forgeAction grammar
+
+    Chunks are scanned once: text outside tags is discarded as soon as it cannot be
+    the start of a tag, and action content is moved out of the working buffer as it
+    arrives, so the buffer stays bounded by the largest chunk plus one tag and total
+    work is linear in the size of the response.
+    """
+
+    def __init__(self, message_id: str):
+        self.message_id = message_id
+        self.artifact: Optional[ArtifactData] = None
+        self.actions: List[GameForgeAction] = []
+        self.errors: List[str] = []
+        self.truncated = False
+        self._artifact_closed = False
+        self._buffer = ""
+        self._pos = 0
+        self._action_attrs: Optional[Dict[str, str]] = None
+        self._content: List[str] = []
+        self._marker_index: Dict[str, int] = {}
+
+    def feed(self, chunk: str) -> List[GameForgeAction]:
+        """Consume a chunk and return the actions whose closing tag it completed"""
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        self._marker_index = {}
+        completed = []
+
+        while True:
+            if self._action_attrs is None:
+                if not self._scan_text():
+                    break
+            elif not self._scan_action(completed):
+                break
+
+        return completed
+
+    def close(self) -> ParsedResponse:
+        """Finish the response, reporting unclosed tags as truncation"""
+        if self._action_attrs is not None:
+            self.errors.append("Unclosed forgeAction at end of response")
+            self.truncated = True
+            self._action_attrs = None
+        if self.artifact is not None and not self._artifact_closed:
+            self.errors.append("Unclosed forgeArtifact at end of response")
+            self.truncated = True
+        elif self._pos < len(self._buffer) and self._match_tag_name(self._pos, final=True):
+            self.errors.append("Incomplete forge tag at end of response")
+            self.truncated = True
+        self._buffer = ""
+        self._pos = 0
+
+        if self.artifact is None:
+            return ParsedResponse(artifact_id="", title="", actions=[],
+                                  truncated=self.truncated, errors=self.errors)
+        return ParsedResponse(
+            artifact_id=self.artifact.id,
+            title=self.artifact.title,
+            actions=self.actions,
+            truncated=self.truncated,
+            errors=self.errors
+        )
+
+    def _scan_text(self) -> bool:
+        """Advance through text outside actions; return False when more input is needed"""
+        buffer = self._buffer
+        while True:
+            start = buffer.find('<', self._pos)
+            if start == -1:
+                self._pos = len(buffer)
+                return False
+
+            name = self._match_tag_name(start)
+            if name is _WAIT:
+                self._pos = start
+                return False
+            if name is None:
+                self._pos = start + 1
+                continue
+
+            end = buffer.find('>', start)
+            if end == -1:
+                if len(buffer) - start > MAX_TAG_LENGTH:
+                    self.errors.append(f"Unterminated <{name}> tag")
+                    self._pos = start + 1
+                    continue
+                self._pos = start
+                return False
+
+            self._pos = end + 1
+            attrs = self._parse_attributes(buffer[start + 1 + len(name):end])
+            if name == ARTIFACT_OPEN:
+                self._open_artifact(attrs)
+            elif name == ARTIFACT_CLOSE:
+                if self.artifact is None or self._artifact_closed:
+                    self.errors.append("Closing forgeArtifact without an open artifact")
+                self._artifact_closed = True
+            elif name == ACTION_OPEN:
+                self._action_attrs = attrs
+                self._content = []
+                return True
+            else:
+                self.errors.append("Closing forgeAction without an open action")
+
+    def _scan_action(self, completed: List[GameForgeAction]) -> bool:
+        """Collect action content up to its closing tag; return False when more input is needed"""
+        buffer = self._buffer
+        while True:
+            found = [
+                (index, marker) for marker in ACTION_TERMINATORS
+                if (index := self._find_marker(marker)) != -1
+            ]
+            if not found:
+                # Keep only a possible partial terminator in the working buffer
+                safe = len(buffer) - LONGEST_TERMINATOR
+                if safe > self._pos:
+                    self._content.append(buffer[self._pos:safe])
+                    self._pos = safe
+                return False
+
+            index, marker = min(found)
+            name = self._match_tag_name(index)
+            if name is _WAIT:
+                self._content.append(buffer[self._pos:index])
+                self._pos = index
+                return False
+            if name is None:
+                # e.g. "<forgeActionFoo": ordinary content
+                self._content.append(buffer[self._pos:index + 1])
+                self._pos = index + 1
+                continue
+
+            self._content.append(buffer[self._pos:index])
+            self._pos = index
+            if name == ACTION_CLOSE:
+                end = buffer.find('>', index)
+                if end == -1:
+                    return False
+                self._pos = end + 1
+                self._emit_action(completed)
+            else:
+                # The action was never closed; the nested tag is handled as text
+                self.errors.append(f"forgeAction left unclosed before <{name}>")
+                self._action_attrs = None
+                self._content = []
+            return True
+
+    def _find_marker(self, marker: str) -> int:
+        """Find `marker` at or after the current position without rescanning the buffer
+
+        Positions only move forward within a buffer, so a previous result stays valid
+        until the scan passes it; rare markers are not searched for again per action.
+        """
+        index = self._marker_index.get(marker)
+        if index is None or (index != -1 and index < self._pos):
+            index = self._buffer.find(marker, self._pos)
+            self._marker_index[marker] = index
+        return index
+
+    def _match_tag_name(self, start: int, final: bool = False):
+        """Return the forge tag name starting at `start`, None if it is not one, or _WAIT"""
+        buffer = self._buffer
+        available = buffer[start + 1:start + 2 + len(ARTIFACT_CLOSE)]
+        for name in TAG_NAMES:
+            if available.startswith(name):
+                if len(available) == len(name):
+                    # The character that follows decides between e.g. forgeAction and forgeActionX
+                    return name if final else _WAIT
+                if not (available[len(name)].isalnum() or available[len(name)] == '_'):
+                    return name
+            elif name.startswith(available):
+                return name if final else _WAIT
+        return None
+
+    def _parse_attributes(self, text: str) -> Dict[str, str]:
+        # Values may be entity-escaped, as in artifacts rendered from a fan-out plan
+        return {
+            match.group(1): html.unescape(match.group(2) if match.group(2) is not None else match.group(3))
+            for match in ATTRIBUTE_PATTERN.finditer(text)
+        }
+
+    def _open_artifact(self, attrs: Dict[str, str]) -> None:
+        if self.artifact is not None and not self._artifact_closed:
+            self.errors.append("forgeArtifact opened inside another forgeArtifact")
+        self._artifact_closed = False
+        if self.artifact is not None:
+            # Follow-up artifacts in the same response extend the first one
+            return
+        self.artifact = ArtifactData(
+            id=attrs.get('id', ''),
+            title=attrs.get('title', ''),
+            message_id=self.message_id
+        )
+
+    def _emit_action(self, completed: List[GameForgeAction]) -> None:
+        attrs = self._action_attrs
+        content = "".join(self._content).strip()
+        self._action_attrs = None
+        self._content = []
+
+        if self.artifact is None or self._artifact_closed:
+            self.errors.append("forgeAction outside of a forgeArtifact")
+            return
+        try:
+            action_type = ActionType(attrs.get('type'))
+        except ValueError:
+            self.errors.append(f"Unknown forgeAction type: {attrs.get('type')!r}")
+            return
+
+        action = GameForgeAction(
+            type=action_type,
+            content=content,
+            file_path=attrs.get('filePath')
+        )
+        self.actions.append(action)
+        completed.append(action)
 
 class GameForgeParser:
     def __init__(self, callbacks: Dict[str, Callable] = None):
         self.callbacks = callbacks or {}
-        self._messages = {}
+        self._messages: Dict[str, ForgeTokenizer] = {}
         self._action_id = 0
-        
+
     def parse(self, message_id: str, input_text: str) -> ParsedResponse:
         """Parse the AI response into structured data"""
-        # Extract artifact details using regex
-        artifact_match = re.search(
-            r'<forgeArtifact id="([^"]+)" title="([^"]+)">', 
-            input_text
-        )
-        if not artifact_match:
-            logger.warning("No artifact found in response")
-            return ParsedResponse(artifact_id="", title="", actions=[])
-
-        artifact_id = artifact_match.group(1)
-        title = artifact_match.group(2)
-        
-        # Extract actions
-        actions = []
-        action_matches = re.finditer(
-            r'<forgeAction type="(file|shell)"(?:\s+filePath="([^"]+)")?\s*>\n(.*?)\n\s*</forgeAction>',
-            input_text,
-            re.DOTALL
-        )
+        tokenizer = ForgeTokenizer(message_id)
+        tokenizer.feed(input_text)
+        return self._result(tokenizer.close())
 
-        for match in action_matches:
-            action_type = ActionType(match.group(1))
-            file_path = match.group(2)
-            content = match.group(3).strip()
-            
-            actions.append(GameForgeAction(
-                type=action_type,
-                content=content,
-                file_path=file_path
-            ))
+    def feed(self, message_id: str, chunk: str) -> List[GameForgeAction]:
+        """Parse a streamed chunk, returning the actions whose closing tag it completed"""
+        tokenizer = self._messages.setdefault(message_id, ForgeTokenizer(message_id))
+        completed = tokenizer.feed(chunk)
+        for action in completed:
+            self._action_id += 1
+            if 'on_action_close' in self.callbacks:
+                self.callbacks['on_action_close'](action)
+        return completed
 
-        return ParsedResponse(
-            artifact_id=artifact_id,
-            title=title,
-            actions=actions
-        )
\ No newline at end of file
+    def finish(self, message_id: str) -> ParsedResponse:
+        """Finish a streamed message and return everything parsed from it"""
+        tokenizer = self._messages.pop(message_id, None) or ForgeTokenizer(message_id)
+        return self._result(tokenizer.close())
+
+    def _result(self, parsed: ParsedResponse) -> ParsedResponse:
+        if not parsed.artifact_id and not parsed.actions:
+            logger.warning("No artifact found in response")
+        for error in parsed.errors:
+            logger.warning(f"Malformed response: {error}")
+        return parsed
@@ -0,0 +1,209 @@
+import difflib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Minimum similarity for a fuzzy match when the search text is not found verbatim
+FUZZY_THRESHOLD = 0.85
+
+# A fuzzy match must beat the best non-overlapping alternative by this much
+FUZZY_MARGIN = 0.05
+
+# Shorter blocks are matched exactly or not at all: one changed token is a different line
+MIN_FUZZY_LINES = 2
+
+SEARCH_REPLACE_PATTERN = re.compile(
+    r'^<{5,} ?SEARCH[^\n]*\n(.*?)^={5,}[ \t]*\n(.*?)^>{5,} ?REPLACE[^\n]*$',
+    re.DOTALL | re.MULTILINE
+)
+HUNK_HEADER_PATTERN = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+\d+(?:,(\d+))? @@')
+
+class PatchError(Exception):
+    """Raised when a patch cannot be applied or produces an invalid file"""
+
+@dataclass
+class Hunk:
+    search: List[str]
+    replace: List[str]
+    line_hint: Optional[int] = None
+
+def parse_patch(patch: str) -> List[Hunk]:
+    """Parse search/replace blocks or a unified diff into hunks"""
+    blocks = SEARCH_REPLACE_PATTERN.findall(patch)
+    if blocks:
+        return [
+            Hunk(search=search.splitlines(), replace=replace.splitlines())
+            for search, replace in blocks
+        ]
+    return _parse_unified_diff(patch)
+
+def _parse_unified_diff(patch: str) -> List[Hunk]:
+    hunks = []
+    current: Optional[Hunk] = None
+    # Lines of the old and new file the current hunk header says are still to come
+    old_left = new_left = 0
+    for line in patch.splitlines():
+        header = HUNK_HEADER_PATTERN.match(line)
+        if header:
+            current = Hunk(search=[], replace=[], line_hint=int(header.group(1)) - 1)
+            hunks.append(current)
+            old_left = int(header.group(2) or 1)
+            new_left = int(header.group(3) or 1)
+        elif current is None:
+            continue
+        elif line.startswith(('--- ', '+++ ')) and old_left <= 0 and new_left <= 0:
+            # File headers only appear between hunks; inside one, "--- x" is a removed "-- x"
+            continue
+        elif line.startswith('-'):
+            current.search.append(line[1:])
+            old_left -= 1
+        elif line.startswith('+'):
+            current.replace.append(line[1:])
+            new_left -= 1
+        elif line.startswith('\\'):
+            continue  # "\ No newline at end of file"
+        else:
+            # Context lines; tolerate a missing leading space on blank lines
+            context = line[1:] if line.startswith(' ') else line
+            current.search.append(context)
+            current.replace.append(context)
+            old_left -= 1
+            new_left -= 1
+    if not hunks:
+        raise PatchError("Patch contains no SEARCH/REPLACE blocks or unified diff hunks")
+    return hunks
+
+def apply_patch(original: str, patch: str) -> str:
+    """Apply every hunk of `patch` to `original`, matching context exactly or fuzzily"""
+    lines = original.splitlines()
+    trailing_newline = original.endswith('\n')
+
+    for number, hunk in enumerate(parse_patch(patch), start=1):
+        if not hunk.search:
+            # Pure insertion: at the hinted line, or appended
+            position = len(lines) if hunk.line_hint is None else min(hunk.line_hint, len(lines))
+            lines[position:position] = hunk.replace
+            continue
+
+        try:
+            match = find_block(lines, hunk.search, hunk.line_hint)
+        except PatchError as e:
+            raise PatchError(f"Hunk {number}: {e}")
+        if match is None:
+            raise PatchError(f"Hunk {number} does not match the file:\n" + "\n".join(hunk.search[:5]))
+        start, end = match
+        lines[start:end] = _reindent(lines[start:end], hunk.search, hunk.replace)
+
+    result = "\n".join(lines)
+    return result + '\n' if trailing_newline and result else result
+
+def find_block(lines: List[str], block: List[str], line_hint: Optional[int] = None) -> Optional[Tuple[int, int]]:
+    """Locate `block` in `lines`, returning the (start, end) slice of the best match
+
+    Tries an exact match, then one that ignores indentation and trailing spaces,
+    then, for blocks of several lines, the most similar window above FUZZY_THRESHOLD
+    that clearly beats every other. Several equal matches are resolved by
+    `line_hint` (unified diffs) or raise PatchError.
+    """
+    size = len(block)
+    candidates = range(len(lines) - size + 1)
+
+    def closest(starts: List[int]) -> Optional[Tuple[int, int]]:
+        if not starts:
+            return None
+        if len(starts) > 1:
+            if line_hint is None:
+                raise PatchError(f"Search text matches {len(starts)} places; include more context to make it unique")
+            distances = sorted(abs(index - line_hint) for index in starts)
+            if distances[0] == distances[1]:
+                raise PatchError(f"Search text matches {len(starts)} places equally close to line {line_hint + 1}")
+        hint = line_hint or 0
+        start = min(starts, key=lambda index: abs(index - hint))
+        return start, start + size
+
+    exact = [i for i in candidates if lines[i:i + size] == block]
+    if exact:
+        return closest(exact)
+
+    stripped_block = [line.strip() for line in block]
+    loose = [i for i in candidates if [line.strip() for line in lines[i:i + size]] == stripped_block]
+    if loose:
+        return closest(loose)
+
+    if size < MIN_FUZZY_LINES:
+        return None
+    joined_block = "\n".join(stripped_block)
+    floor = FUZZY_THRESHOLD - FUZZY_MARGIN
+    scores = []
+    for i in candidates:
+        window = "\n".join(line.strip() for line in lines[i:i + size])
+        matcher = difflib.SequenceMatcher(None, window, joined_block, autojunk=False)
+        if matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor:
+            continue
+        ratio = matcher.ratio()
+        if ratio >= floor:
+            scores.append((ratio, i))
+    if not scores:
+        return None
+    best_ratio, best = max(scores)
+    if best_ratio < FUZZY_THRESHOLD:
+        return None
+    # Windows overlapping the best one share most of its lines; only distinct places compete
+    rivals = [ratio for ratio, i in scores if abs(i - best) >= size]
+    if rivals and best_ratio - max(rivals) < FUZZY_MARGIN:
+        raise PatchError("Search text is similar to several places; quote the file exactly")
+    return best, best + size
+
+def _reindent(matched: List[str], search: List[str], replace: List[str]) -> List[str]:
+    """Shift replacement lines by the indentation difference between the file and the patch"""
+    for file_line, search_line in zip(matched, search):
+        if file_line.strip() and search_line.strip():
+            file_indent = len(file_line) - len(file_line.lstrip())
+            search_indent = len(search_line) - len(search_line.lstrip())
+            break
+    else:
+        return replace
+
+    delta = file_indent - search_indent
+    if delta > 0:
+        return [(' ' * delta + line) if line.strip() else line for line in replace]
+    if delta < 0:
+        return [
+            line[-delta:] if line[:-delta].strip() == '' else line.lstrip()
+            for line in replace
+        ]
+    return replace
+
+def verify_content(file_path: str, content: str) -> Optional[str]:
+    """Syntax-check patched content by file type; return an error message or None"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.py':
+        try:
+            compile(content, file_path, 'exec')
+        except SyntaxError as e:
+            return f"Python syntax error: {e}"
+    elif extension == '.json':
+        try:
+            json.loads(content)
+        except json.JSONDecodeError as e:
+            return f"Invalid JSON: {e}"
+    elif extension in ('.js', '.mjs', '.cjs') and shutil.which('node'):
+        with tempfile.NamedTemporaryFile('w', suffix=extension, delete=False, encoding='utf-8') as f:
+            f.write(content)
+        try:
+            result = subprocess.run(['node', '--check', f.name], capture_output=True, text=True, timeout=30)
+            if result.returncode != 0:
+                return f"JavaScript syntax error: {result.stderr.strip()}"
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Timed out syntax-checking {file_path}")
+        finally:
+            os.remove(f.name)
+    return None
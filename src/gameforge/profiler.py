@@ -0,0 +1,413 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from dataclasses import asdict, dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+from .instrumentation import percentile
+from .prompts import build_optimization_prompt
+from .validator import ENTRY_POINT_PATTERN, PYGAME_IMPORT_PATTERN, _is_local, _limit_resources, generated_files
+
+logger = logging.getLogger(__name__)
+
+# One frame at 60 fps
+DEFAULT_FRAME_BUDGET_MS = 1000 / 60
+
+CANVAS_HARNESS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "canvas_profiler.js")
+
+# Runs a pygame entry point with dummy SDL drivers for a fixed number of frames.
+# Clock.tick does not sleep and game time advances 1/60 s per frame, keys are pressed
+# and held on a fixed schedule, and each frame's wall time, time spent in pygame.draw
+# and display calls, and net allocated memory blocks are written to a JSON file along
+# with the game functions most often found on the stack by a SIGPROF sampler.
+PYGAME_PROFILE_HARNESS = r'''
+import json, os, runpy, signal, sys, time, traceback
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+import pygame
+
+script, frames, result_path = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+game_dir = os.path.dirname(os.path.abspath(script))
+sys.argv = [script]
+sys.path.insert(0, game_dir)
+FRAME_MS = 1000 / 60
+SAMPLE_SECONDS = 0.0005
+KEYS = (pygame.K_SPACE, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_z)
+state = {"frame": 0, "now": 0.0, "start": None, "render": 0.0, "blocks": 0, "held": None}
+result = {"frames": [], "hotspots": [], "draw_calls": {}, "error": None}
+samples = {"total": 0}
+
+def sample(signum, frame):
+    samples["total"] += 1
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(game_dir):
+            code = frame.f_code
+            name = f"{os.path.relpath(filename, game_dir)}:{code.co_firstlineno} {code.co_name}"
+            samples[name] = samples.get(name, 0) + 1
+            return
+        frame = frame.f_back
+
+def timed(name, original):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            state["render"] += time.perf_counter() - start
+            result["draw_calls"][name] = result["draw_calls"].get(name, 0) + 1
+    return wrapper
+
+def key_event(kind, key):
+    pygame.event.post(pygame.event.Event(kind, key=key, mod=0, unicode="", scancode=0))
+
+def press(frame):
+    held = state["held"]
+    if held and frame >= held[1]:
+        key_event(pygame.KEYUP, held[0])
+        state["held"] = held = None
+    if frame % 300 == 10:
+        # Start (or restart) the game
+        key_event(pygame.KEYDOWN, pygame.K_RETURN)
+        key_event(pygame.KEYUP, pygame.K_RETURN)
+        for kind in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            pygame.event.post(pygame.event.Event(kind, pos=(400, 300), button=1))
+    if not held and frame >= 30 and frame % 15 == 0:
+        state["held"] = (KEYS[(frame // 15) % len(KEYS)], frame + 8)
+        key_event(pygame.KEYDOWN, state["held"][0])
+
+def on_frame(original, name):
+    original = timed(name, original)
+    def wrapper(*args, **kwargs):
+        value = original(*args, **kwargs)
+        end = time.perf_counter()
+        if state["start"] is not None:
+            total = (end - state["start"]) * 1000
+            render = state["render"] * 1000
+            allocated = max(0, sys.getallocatedblocks() - state["blocks"])
+            result["frames"].append([total, max(0.0, total - render), render, allocated])
+        else:
+            # Measure only the frame loop, not loading
+            result["draw_calls"].clear()
+            if hasattr(signal, "setitimer"):
+                signal.signal(signal.SIGPROF, sample)
+                signal.setitimer(signal.ITIMER_PROF, SAMPLE_SECONDS, SAMPLE_SECONDS)
+        if len(result["frames"]) >= frames:
+            raise SystemExit(0)
+        state["frame"] += 1
+        state["now"] += FRAME_MS
+        press(state["frame"])
+        state["render"] = 0.0
+        state["blocks"] = sys.getallocatedblocks()
+        state["start"] = time.perf_counter()
+        return value
+    return wrapper
+
+class Clock:
+    def __init__(self):
+        self.fps = 60.0
+
+    def tick(self, framerate=0):
+        return round(FRAME_MS)
+
+    tick_busy_loop = tick
+
+    def get_time(self):
+        return round(FRAME_MS)
+
+    get_rawtime = get_time
+
+    def get_fps(self):
+        return self.fps
+
+class Pressed:
+    def __init__(self, pressed):
+        self.pressed = pressed
+
+    def __getitem__(self, key):
+        return bool(state["held"] and state["held"][0] == key) or self.pressed[key]
+
+    def __len__(self):
+        return len(self.pressed)
+
+get_pressed = pygame.key.get_pressed
+pygame.key.get_pressed = lambda: Pressed(get_pressed())
+pygame.time.Clock = Clock
+pygame.time.get_ticks = lambda: int(state["now"])
+pygame.time.delay = pygame.time.wait = lambda milliseconds: 0
+for name in dir(pygame.draw):
+    if not name.startswith("_") and callable(getattr(pygame.draw, name)):
+        setattr(pygame.draw, name, timed(f"draw.{name}", getattr(pygame.draw, name)))
+pygame.display.flip = on_frame(pygame.display.flip, "display.flip")
+pygame.display.update = on_frame(pygame.display.update, "display.update")
+try:
+    runpy.run_path(script, run_name="__main__")
+except SystemExit:
+    pass
+except BaseException:
+    result["error"] = "".join(traceback.format_exc().splitlines(keepends=True)[-4:]).strip()
+finally:
+    if hasattr(signal, "setitimer"):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+    total = samples.pop("total") or 1
+    ranked = sorted(samples.items(), key=lambda item: -item[1])[:10]
+    result["hotspots"] = [[name, 100 * count / total] for name, count in ranked]
+    with open(result_path, "w") as f:
+        json.dump(result, f)
+'''
+
+@dataclass
+class FrameSample:
+    total_ms: float
+    update_ms: float
+    render_ms: float
+    allocated: int
+
+@dataclass
+class ProfileReport:
+    """Per-frame timings of one game, checked against a frame budget
+
+    Render time is the time spent in canvas 2D calls (canvas games) or in pygame.draw
+    and display calls (pygame games); update time is the rest of the frame.
+    Allocations are heap bytes for canvas games and net memory blocks for pygame.
+    """
+    output_dir: str
+    kind: str = ""
+    budget_ms: float = DEFAULT_FRAME_BUDGET_MS
+    frames: List[FrameSample] = field(default_factory=list)
+    hotspots: List[Tuple[str, float]] = field(default_factory=list)
+    draw_calls: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+    skipped: Optional[str] = None
+    alloc_unit: str = "bytes"
+
+    def stat(self, attribute: str, pct: float) -> float:
+        return percentile([getattr(frame, attribute) for frame in self.frames], pct)
+
+    @property
+    def over_budget(self) -> bool:
+        return bool(self.frames) and self.stat("total_ms", 95) > self.budget_ms
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.over_budget
+
+    def format(self) -> str:
+        """Human- and model-readable summary of frame times and hotspots"""
+        if self.skipped:
+            return f"Not profiled: {self.skipped}"
+        lines = []
+        if self.error:
+            lines.append(f"The game failed after {len(self.frames)} profiled frames:\n{self.error}")
+        if self.frames:
+            verdict = "over budget" if self.over_budget else "within budget"
+            lines.append(
+                f"{self.kind} game, {len(self.frames)} frames: frame time p50 {self.stat('total_ms', 50):.2f} ms, "
+                f"p95 {self.stat('total_ms', 95):.2f} ms, p99 {self.stat('total_ms', 99):.2f} ms, "
+                f"max {self.stat('total_ms', 100):.2f} ms ({verdict}: p95 budget {self.budget_ms:.1f} ms)"
+            )
+            lines.append(
+                f"p95 per frame: update {self.stat('update_ms', 95):.2f} ms, render {self.stat('render_ms', 95):.2f} ms, "
+                f"allocated {self.stat('allocated', 95):.0f} {self.alloc_unit}"
+            )
+        if self.hotspots:
+            lines.append("Hotspots (share of CPU samples during the frame loop):")
+            lines.extend(f"- {name}: {share:.1f}%" for name, share in self.hotspots)
+        if self.draw_calls and self.frames:
+            calls = sorted(self.draw_calls.items(), key=lambda item: -item[1])[:8]
+            lines.append("Draw calls per frame: " + ", ".join(
+                f"{name} {count / len(self.frames):.1f}" for name, count in calls
+            ))
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["ok"] = self.ok
+        data["summary"] = {
+            f"{attribute}_p{pct}": self.stat(attribute, pct)
+            for attribute in ("total_ms", "update_ms", "render_ms", "allocated")
+            for pct in (50, 95, 99, 100)
+        }
+        return data
+
+    def save(self, path: str) -> None:
+        """Atomically write the report as JSON"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+class _ScriptCollector(HTMLParser):
+    """Collect a page's classic scripts in load order, as (src, inline source) pairs"""
+
+    def __init__(self):
+        super().__init__()
+        self.scripts: List[Tuple[Optional[str], str]] = []
+        self.modules = 0
+        self._in_script = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'script':
+            return
+        attrs = dict(attrs)
+        if attrs.get('type') == 'module':
+            self.modules += 1
+        elif attrs.get('src'):
+            self.scripts.append((attrs['src'], ""))
+        elif attrs.get('type', 'text/javascript') in ('text/javascript', 'application/javascript'):
+            self._in_script = True
+            self.scripts.append((None, ""))
+
+    def handle_endtag(self, tag):
+        if tag == 'script':
+            self._in_script = False
+
+    def handle_data(self, data):
+        if self._in_script:
+            src, source = self.scripts[-1]
+            self.scripts[-1] = (src, source + data)
+
+def find_entry_point(output_dir: str) -> Tuple[Optional[str], Optional[str]]:
+    """The game to profile: ("pygame", script) or ("canvas", index.html), shallowest first"""
+    candidates = []
+    for path in generated_files(output_dir):
+        name = os.path.basename(path)
+        depth = os.path.relpath(path, output_dir).count(os.sep)
+        if name == 'index.html':
+            candidates.append((depth, 1, "canvas", path))
+        elif name.endswith('.py'):
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                source = f.read()
+            if PYGAME_IMPORT_PATTERN.search(source) and ENTRY_POINT_PATTERN.search(source):
+                candidates.append((depth, 0 if name == 'main.py' else 1, "pygame", path))
+    if not candidates:
+        return None, None
+    _, _, kind, path = min(candidates)
+    return kind, path
+
+def _run_harness(command: List[str], cwd: str, result_path: str, timeout: float) -> dict:
+    env = {
+        "PATH": os.environ.get("PATH", ""),
+        "HOME": tempfile.gettempdir(),
+        "SDL_VIDEODRIVER": "dummy",
+        "SDL_AUDIODRIVER": "dummy",
+        "PYGAME_HIDE_SUPPORT_PROMPT": "1",
+    }
+    try:
+        result = subprocess.run(
+            command,
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            preexec_fn=_limit_resources if os.name == 'posix' else None
+        )
+    except subprocess.TimeoutExpired:
+        return {"error": f"Did not finish profiling within {timeout}s"}
+    try:
+        with open(result_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"error": result.stderr.strip()[-2000:] or f"Profiler exited with code {result.returncode}"}
+
+def _profile_canvas(index_path: str, frames: int, timeout: float, work_dir: str, report: ProfileReport) -> dict:
+    root = os.path.dirname(index_path)
+    with open(index_path, 'r', encoding='utf-8', errors='replace') as f:
+        collector = _ScriptCollector()
+        collector.feed(f.read())
+
+    scripts = []
+    for number, (src, source) in enumerate(collector.scripts):
+        if src is None:
+            scripts.append({"path": f"{index_path}#script{number}", "name": f"index.html#script{number}", "code": source})
+            continue
+        target = src.split('?', 1)[0].split('#', 1)[0]
+        path = os.path.join(root, target)
+        if _is_local(target) and os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                scripts.append({"path": os.path.abspath(path), "name": os.path.normpath(target), "code": f.read()})
+    if not scripts:
+        report.skipped = "ES modules are not supported" if collector.modules else "index.html loads no scripts"
+        return {}
+
+    manifest_path = os.path.join(work_dir, "manifest.json")
+    result_path = os.path.join(work_dir, "result.json")
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({"frames": frames, "scripts": scripts}, f)
+    return _run_harness(['node', CANVAS_HARNESS, manifest_path, result_path], root, result_path, timeout)
+
+def profile_output(output_dir: str, frames: int = 600, budget_ms: float = DEFAULT_FRAME_BUDGET_MS,
+                   timeout: float = 120) -> ProfileReport:
+    """Run the generated game headlessly and record per-frame timings"""
+    report = ProfileReport(output_dir=output_dir, budget_ms=budget_ms)
+    kind, path = find_entry_point(output_dir)
+    if kind is None:
+        report.skipped = "no pygame entry point or index.html"
+        return report
+    report.kind = kind
+
+    with tempfile.TemporaryDirectory(prefix="gameforge-profile-") as work_dir:
+        if kind == "pygame":
+            report.alloc_unit = "blocks"
+            result_path = os.path.join(work_dir, "result.json")
+            data = _run_harness(
+                [sys.executable, "-c", PYGAME_PROFILE_HARNESS, path, str(frames), result_path],
+                os.path.dirname(path), result_path, timeout
+            )
+        elif not shutil.which('node'):
+            report.skipped = "node is not installed"
+            return report
+        else:
+            data = _profile_canvas(path, frames, timeout, work_dir, report)
+            if report.skipped:
+                return report
+
+    report.frames = [FrameSample(*frame) for frame in data.get("frames", [])]
+    report.hotspots = [tuple(hotspot) for hotspot in data.get("hotspots", [])]
+    report.draw_calls = data.get("draw_calls", {})
+    report.error = data.get("error")
+    if not report.frames and not report.error:
+        report.error = "The game never rendered a frame"
+    return report
+
+class FrameProfiler:
+    """Profile generated games' frame times and send hotspots back as optimization turns
+
+    Profiles run one at a time in a worker thread, so concurrent games in a batch
+    do not skew each other's timings.
+    """
+
+    def __init__(self, frames: int = 600, budget_ms: float = DEFAULT_FRAME_BUDGET_MS, timeout: float = 120):
+        self.frames = frames
+        self.budget_ms = budget_ms
+        self.timeout = timeout
+        self._lock = asyncio.Lock()
+
+    async def profile(self, output_dir: str) -> ProfileReport:
+        async with self._lock:
+            return await asyncio.to_thread(profile_output, output_dir, self.frames, self.budget_ms, self.timeout)
+
+    async def profile_and_optimize(self, chat, max_turns: int = 1, validator=None,
+                                   max_repairs: int = 1) -> ProfileReport:
+        """Profile the chat's output and send over-budget reports back as optimization turns"""
+        report = await self.profile(chat.executor.output_dir)
+        for attempt in range(max_turns):
+            if report.ok or report.error:
+                break
+            logger.warning(f"Over frame budget, requesting optimization {attempt + 1}/{max_turns}:\n{report.format()}")
+            await chat.send_message(build_optimization_prompt(report.format()))
+            if validator:
+                # Repair the optimized game before measuring it again
+                validation = await validator.validate_and_repair(chat, max_repairs)
+                if not validation.ok:
+                    logger.error(f"Optimized game failed validation:\n{validation.format()}")
+            report = await self.profile(chat.executor.output_dir)
+        return report
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from typing import Optional
 
+from .skeletons import Skeleton
+
 @dataclass
 class SystemConstraints:
     work_dir: str
@@ -11,6 +13,10 @@ class SystemConstraints:
             self.allowed_html_elements = ['p', 'code', 'pre', 'ul', 'ol', 'li', 'strong', 'em']
 
     def get_system_prompt(self) -> str:
+        return f"{self.get_static_prompt()}\n{self.get_runtime_prompt()}"
+
+    def get_static_prompt(self) -> str:
+        """The run-independent preamble, sent as a cacheable prefix"""
         return f"""You are GameForge, an expert AI game development assistant and exceptional senior software developer with vast knowledge across multiple programming languages, frameworks, and best practices. You specialize in game development, graphics programming, and interactive experiences.
 
 REQUIRED FORMAT:
@@ -42,8 +48,6 @@ REQUIREMENTS:
   - System commands and tools
   - Native binary execution
   
-  The current working directory is `{self.work_dir}`.
-  
   IMPORTANT: All commands will be executed on the local system, so ensure all file paths are relative to the working directory.
 
   Do not use placeholders like "// Add game logic here" or "// Implement this feature".
@@ -91,16 +95,22 @@ REQUIREMENTS:
          - Provide complete file contents
          - Use relative paths from working directory
 
+       - patch: For editing a file that already exists, when the user message asks for patches
+         - Include filePath attribute
+         - Contains one or more SEARCH/REPLACE blocks quoting the current file exactly
+         - Only lines inside the blocks change; the rest of the file is kept
+
     5. CRITICAL: Order of actions is IMPORTANT:
        - Create virtual environment first (if needed)
        - Install dependencies before using them
        - Create files before running them
        - Start the game last
 
-    6. ALWAYS provide COMPLETE file contents:
+    6. ALWAYS provide COMPLETE file contents in file actions:
        - Include ALL code, even unchanged parts
        - NEVER use placeholders or ellipsis
-       - Show full, up-to-date contents when updating files
+       - Show full, up-to-date contents when updating files with a file action
+       - Patch actions are the only exception: they contain just the SEARCH/REPLACE blocks
 
     7. Follow game development best practices:
        - Split functionality into smaller modules (e.g., sprites, physics, input handling)
@@ -240,8 +250,124 @@ Here are some examples of correct usage of artifacts:
     </assistant_response>
   </example>
 </examples>
+"""
+
+    def get_runtime_prompt(self) -> str:
+        """The per-run context that follows the cached prefix"""
+        return f"""<runtime_context>
+  The current working directory is `{self.work_dir}`.
+</runtime_context>
 """
 
     def get_continue_prompt(self) -> str:
         return """Continue your prior response. IMPORTANT: Immediately begin from where you left off without any interruptions.
-Do not repeat any content, including artifact and action tags."""
\ No newline at end of file
+Do not repeat any content, including artifact and action tags."""
+
+def build_game_prompt(game_name: str, spec: str, skeleton: Optional[Skeleton] = None) -> str:
+    """Build the user prompt asking for a game from its name and specification"""
+    prompt = f"""Create a browser game called {game_name} that is described as follows:\n\n{spec}"""
+    if skeleton:
+        prompt += f"\n\n{get_skeleton_prompt(skeleton)}"
+    return prompt
+
+def get_skeleton_prompt(skeleton: Skeleton) -> str:
+    """Instructions to build the game on a pre-installed skeleton instead of from scratch"""
+    return f"""<skeleton name="{skeleton.name}">
+  The project already contains a tested skeleton. Do NOT re-create its files
+  ({', '.join(sorted(skeleton.files))}) and do NOT re-implement what it provides (canvas setup,
+  menu/play/pause/game-over states, menu instructions, input handling, score display).
+  Emit only the game-specific modules, written against this API:
+
+{skeleton.api.strip()}
+</skeleton>"""
+
+def get_patch_prompt() -> str:
+    """Instructions appended to follow-up turns so edits are sent as patches"""
+    return """<edit_instructions>
+  This is a follow-up to files you already created. For this turn ONLY, instead of
+  repeating complete file contents, edit existing files with patch actions:
+
+  <forgeAction type="patch" filePath="[path]">
+<<<<<<< SEARCH
+[exact lines currently in the file, with a few lines of context]
+=======
+[the lines that replace them]
+>>>>>>> REPLACE
+  </forgeAction>
+
+  - One action per file; it may contain several SEARCH/REPLACE blocks, applied in order
+  - SEARCH text must match the current file exactly and be unique within it
+  - Use type="file" with complete contents only for new files or near-total rewrites
+</edit_instructions>"""
+
+def build_repair_prompt(problems: str) -> str:
+    """Build the follow-up prompt asking the model to fix validation failures"""
+    return f"""The generated game failed automated validation:
+
+{problems}
+
+Fix these problems. Change only what is needed to make the game run correctly."""
+
+def build_optimization_prompt(profile: str) -> str:
+    """Build the follow-up prompt asking the model to speed up frames that exceed the budget"""
+    return f"""Profiling the generated game headlessly with scripted input showed it exceeding its frame budget:
+
+{profile}
+
+Make the game meet the budget. Concentrate on the hotspots listed: avoid per-frame
+allocations, cache work that does not change between frames and batch draw calls.
+Keep the gameplay and visuals the same."""
+
+def build_refinement_prompt(game_name: str, change: str, rewrite: bool = False) -> str:
+    """Build the follow-up prompt for an edited spec, given its diff or, for a rewrite, the new spec"""
+    if rewrite:
+        return f"""The specification of {game_name} was rewritten. The new specification is:
+
+{change}
+
+Update the game to match it, keeping what still applies."""
+    return f"""The specification of {game_name} changed. Unified diff against the version you implemented:
+
+{change}
+
+Update the game to match. Change only what the diff requires."""
+
+def build_plan_prompt(game_prompt: str) -> str:
+    """Build the planning prompt that asks for a file plan instead of code"""
+    return f"""{game_prompt}
+
+<planning_instructions>
+  Do NOT write any code yet. Plan the project so that every file can be written on
+  its own, in parallel, by a developer who sees only the request above and this plan.
+  Reply with ONLY a JSON object of this form:
+
+  {{
+    "id": "[game-id in kebab-case]",
+    "title": "[game title]",
+    "files": [
+      {{
+        "path": "[relative file path]",
+        "purpose": "[one line]",
+        "interface": "[everything other files rely on: exported names with signatures, globals, DOM element ids, events, script load order]"
+      }}
+    ],
+    "shell": ["[commands that install dependencies and start the game, in order]"]
+  }}
+
+  - Split the code into small, focused modules so that no single file dominates
+  - Interfaces must be concrete enough that files written separately fit together
+</planning_instructions>"""
+
+def build_file_prompt(game_prompt: str, plan: str, path: str) -> str:
+    """Build the prompt asking for one file of a planned project"""
+    return f"""{game_prompt}
+
+<project_plan>
+{plan}
+</project_plan>
+
+Write ONLY the file {path} from the plan above. The other files are being written at
+the same time against the same plan, so implement exactly the interface the plan gives
+for {path} and rely only on the interfaces it gives for other files. Reply with a
+single forgeArtifact containing one complete <forgeAction type="file" filePath="{path}">
+and nothing else."""
@@ -0,0 +1,66 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+
+class RateLimiter:
+    """Sliding one-minute window limiting requests and tokens per minute"""
+
+    WINDOW = 60.0
+
+    def __init__(self, requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests: Deque[float] = deque()
+        self._tokens: Deque[Tuple[float, int]] = deque()
+        self._token_total = 0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, estimated_tokens: int = 0) -> None:
+        """Wait until a request with roughly `estimated_tokens` tokens fits in the budget"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                delay = self._delay(now, estimated_tokens)
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+
+            self._requests.append(now)
+            self._add_tokens(now, estimated_tokens)
+
+    def record(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the reserved estimate once the real token usage is known"""
+        self._add_tokens(time.monotonic(), actual_tokens - estimated_tokens)
+
+    def _add_tokens(self, now: float, tokens: int) -> None:
+        if tokens:
+            self._tokens.append((now, tokens))
+            self._token_total += tokens
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.WINDOW
+        while self._requests and self._requests[0] <= cutoff:
+            self._requests.popleft()
+        while self._tokens and self._tokens[0][0] <= cutoff:
+            self._token_total -= self._tokens.popleft()[1]
+
+    def _delay(self, now: float, estimated_tokens: int) -> float:
+        """Seconds until the oldest entries leave the window and make room"""
+        delay = 0.0
+        if self.requests_per_minute and len(self._requests) >= self.requests_per_minute:
+            delay = max(delay, self._requests[0] + self.WINDOW - now)
+
+        if self.tokens_per_minute and self._tokens:
+            # A single request larger than the whole budget is let through once the window is empty
+            needed = min(estimated_tokens, self.tokens_per_minute)
+            freed = self._token_total
+            for timestamp, tokens in self._tokens:
+                if freed + needed <= self.tokens_per_minute:
+                    break
+                freed -= tokens
+                delay = max(delay, timestamp + self.WINDOW - now)
+        return delay
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+import re
+import shlex
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from .executor import GameForgeExecutor
+from .parser import ActionType, GameForgeAction
+from .patcher import PatchError
+
+logger = logging.getLogger(__name__)
+
+# Commands that only prepare the environment and never read or write project files
+# other than the ones they name explicitly
+SETUP_COMMAND_PATTERN = re.compile(
+    r'^\s*(?:'
+    r'(?:python3?\s+-m\s+)?pip3?\s+install\b'
+    r'|python3?\s+-m\s+venv\b'
+    r'|npm\s+(?:install|i|ci)\b'
+    r'|poetry\s+(?:add|install)\b'
+    r'|mkdir\b'
+    r'|#'
+    r')'
+)
+
+# Operators that chain commands on one line; each command must be a setup command
+COMMAND_SEPARATORS = {'&&', '||', ';', '|', '&'}
+
+# Files a setup command reads without naming them
+IMPLICIT_INPUTS = {
+    re.compile(r'^\s*npm\s+(?:install|i|ci)\s*$'): ('package.json', 'package-lock.json'),
+    re.compile(r'^\s*poetry\s+install\b'): ('pyproject.toml', 'poetry.lock'),
+}
+
+# Actions that write a file under the output directory
+FILE_ACTION_TYPES = (ActionType.FILE, ActionType.PATCH)
+
+@dataclass
+class ScheduledAction:
+    index: int
+    action: GameForgeAction
+    depends_on: Set[int] = field(default_factory=set)
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    failed: bool = False
+
+def _command_segments(line: str) -> Optional[List[str]]:
+    """Split a shell line into the commands chained by &&, ||, ;, | and &; None if it cannot be tokenized"""
+    if line.strip().startswith('#'):
+        return [line.strip()]
+    lexer = shlex.shlex(line, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    segments = [[]]
+    try:
+        for token in lexer:
+            if token in COMMAND_SEPARATORS:
+                segments.append([])
+            else:
+                segments[-1].append(token)
+    except ValueError:
+        return None
+    return [" ".join(segment) for segment in segments if segment]
+
+def is_setup_command(command_block: str) -> bool:
+    """True when every command of a shell action only installs or prepares the environment"""
+    lines = [line for line in command_block.splitlines() if line.strip()]
+    if not lines:
+        return False
+    for line in lines:
+        segments = _command_segments(line)
+        if not segments or not all(SETUP_COMMAND_PATTERN.match(segment) for segment in segments):
+            return False
+    return True
+
+def referenced_files(command_block: str, file_paths: List[str]) -> Set[str]:
+    """Paths from `file_paths` that a shell action names or implicitly reads"""
+    referenced = set()
+    for path in file_paths:
+        normalized = os.path.normpath(path)
+        if normalized in command_block or os.path.basename(normalized) in command_block:
+            referenced.add(path)
+    for line in command_block.splitlines():
+        for pattern, inputs in IMPLICIT_INPUTS.items():
+            if pattern.match(line):
+                referenced.update(path for path in file_paths if os.path.normpath(path) in inputs)
+    return referenced
+
+class ActionScheduler:
+    """Run actions as a dependency graph instead of strictly one after another
+
+    Dependencies are derived as actions are submitted, so the same scheduler serves
+    a fully parsed response and a stream of actions arriving one by one:
+      - a file write or patch waits for an earlier write to the same path and for the latest
+        shell step that is not a pure setup command (it may generate files);
+      - a shell step waits for the previous shell step, for the files it references
+        and, unless it only installs dependencies, for every earlier file write.
+
+    An action that fails skips every action depending on it. A patch that does not
+    apply is recorded in the executor's write summary rather than raised from join,
+    so the turn completes and validation can ask for the edit again.
+
+    Actions are numbered in submission order. Indices in `skip` (e.g. actions executed
+    before a resumed run was interrupted) complete without running, and `on_complete`
+    is called with the index of each action that ran successfully.
+    """
+
+    def __init__(self, executor: GameForgeExecutor, max_concurrency: int = 8,
+                 skip: Optional[Iterable[int]] = None, on_complete: Optional[Callable[[int], None]] = None):
+        self.executor = executor
+        self.skip = set(skip or ())
+        self.on_complete = on_complete
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._nodes: List[ScheduledAction] = []
+        self._tasks: List[asyncio.Task] = []
+        self._last_write: Dict[str, int] = {}
+        self._last_shell: Optional[int] = None
+        self._last_generating_shell: Optional[int] = None
+
+    def submit(self, action: GameForgeAction) -> ScheduledAction:
+        """Add an action to the graph and start it once its dependencies finish"""
+        node = ScheduledAction(index=len(self._nodes), action=action)
+        node.depends_on = self._dependencies(action)
+        self._nodes.append(node)
+
+        if action.type in FILE_ACTION_TYPES and action.file_path:
+            self._last_write[os.path.normpath(action.file_path)] = node.index
+        elif action.type == ActionType.SHELL:
+            self._last_shell = node.index
+            if not is_setup_command(action.content):
+                self._last_generating_shell = node.index
+
+        self._tasks.append(asyncio.create_task(self._run(node)))
+        return node
+
+    async def join(self) -> None:
+        """Wait for every submitted action; re-raise the first failure"""
+        results = await asyncio.gather(*self._tasks, return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise errors[0]
+
+    async def run(self, actions: List[GameForgeAction]) -> None:
+        """Schedule a complete list of actions and wait for all of them"""
+        for action in actions:
+            self.submit(action)
+        await self.join()
+
+    def _dependencies(self, action: GameForgeAction) -> Set[int]:
+        depends_on = set()
+        if action.type in FILE_ACTION_TYPES:
+            if action.file_path:
+                previous = self._last_write.get(os.path.normpath(action.file_path))
+                if previous is not None:
+                    depends_on.add(previous)
+            if self._last_generating_shell is not None:
+                depends_on.add(self._last_generating_shell)
+        elif action.type == ActionType.SHELL:
+            if self._last_shell is not None:
+                depends_on.add(self._last_shell)
+            if is_setup_command(action.content):
+                for path in referenced_files(action.content, list(self._last_write)):
+                    depends_on.add(self._last_write[path])
+            else:
+                depends_on.update(self._last_write.values())
+        return depends_on
+
+    async def _run(self, node: ScheduledAction) -> None:
+        try:
+            for index in node.depends_on:
+                dependency = self._nodes[index]
+                await dependency.done.wait()
+                if dependency.failed:
+                    node.failed = True
+                    logger.error(f"Skipping action {node.index}: dependency {index} failed")
+                    return
+
+            if node.index in self.skip:
+                logger.info(f"Skipping action {node.index}: already executed")
+                return
+
+            try:
+                async with self._semaphore:
+                    await self.executor.execute_action_async(node.action)
+            except PatchError:
+                # The executor records the file as failed; later actions on it must not run
+                node.failed = True
+                return
+            if self.on_complete:
+                self.on_complete(node.index)
+        except BaseException:
+            node.failed = True
+            raise
+        finally:
+            node.done.set()
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import os
+import re
+import signal
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DENY_PATTERNS = [
+    r'\bsudo\b',
+    r'\bsu\s',
+    r'\brm\s+(?:-\w+\s+)*(?:/|~|\$HOME)(?:\s|$|\*)',
+    r'\bmkfs\b',
+    r'\bdd\s+if=',
+    r'\b(?:shutdown|reboot|halt|poweroff)\b',
+    r'(?:curl|wget)\b[^|]*\|\s*(?:ba|z)?sh\b',
+    r':\(\)\s*\{',
+    r'>\s*/dev/(?:sd|nvme|hd)',
+    r'\bchmod\s+(?:-\w+\s+)*777\s+/',
+]
+
+@dataclass
+class CommandResult:
+    command: str
+    exit_code: Optional[int]
+    stdout: str = ""
+    stderr: str = ""
+    timed_out: bool = False
+
+class CommandPolicy:
+    """Allow/deny rules for commands emitted by the model
+
+    A command is rejected if it matches any deny pattern, or if allow patterns are
+    configured and it matches none of them.
+    """
+
+    def __init__(self, allow: Optional[List[str]] = None, deny: Optional[List[str]] = None):
+        self.allow = [re.compile(pattern) for pattern in (allow or [])]
+        self.deny = [re.compile(pattern) for pattern in (DEFAULT_DENY_PATTERNS if deny is None else deny)]
+
+    def check(self, command: str) -> Optional[str]:
+        """Return why `command` is not allowed, or None if it may run"""
+        for pattern in self.deny:
+            if pattern.search(command):
+                return f"matches deny rule {pattern.pattern!r}"
+        if self.allow and not any(pattern.search(command) for pattern in self.allow):
+            return "matches no allow rule"
+        return None
+
+class ShellSession:
+    """A long-lived bash process that commands are fed into one at a time
+
+    Shell state such as the working directory, exported variables or an activated
+    virtualenv carries over between commands, and no command pays shell startup.
+    Each command is followed by a marker line carrying its exit status and the
+    shell's working directory, which is kept in `current_dir`; output is
+    streamed line by line as it is produced. A command that times out kills the
+    session, and the next command starts a fresh one.
+    """
+
+    def __init__(self, cwd: str, env: Optional[Dict[str, str]] = None, timeout: float = 120.0,
+                 on_output: Optional[Callable[[str, str], None]] = None):
+        self.cwd = cwd
+        self.current_dir = cwd
+        self.env = env if env is not None else {**os.environ}
+        self.timeout = timeout
+        self.on_output = on_output or self._log_output
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._marker = f"__GAMEFORGE_DONE_{uuid.uuid4().hex}__"
+        self._lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def start(self) -> None:
+        self.current_dir = self.cwd
+        self._process = await asyncio.create_subprocess_exec(
+            "bash", "--noprofile", "--norc",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.cwd,
+            env=self.env,
+            # Own process group so a timeout also stops anything the command started
+            start_new_session=True
+        )
+
+    async def run(self, command: str, timeout: Optional[float] = None) -> CommandResult:
+        """Run one command in the session and wait for its exit status"""
+        async with self._lock:
+            if not self.alive:
+                await self.start()
+
+            # Commands read from /dev/null so they cannot consume the session's own input
+            script = (
+                f"{{\n{command}\n}} < /dev/null\n"
+                f"__gameforge_status=$?\n"
+                f"printf '\\n{self._marker} %s %s\\n' \"$__gameforge_status\" \"$PWD\"\n"
+                f"printf '\\n{self._marker}\\n' >&2\n"
+            )
+            self._process.stdin.write(script.encode())
+            await self._process.stdin.drain()
+
+            result = CommandResult(command=command, exit_code=None)
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(self._read_stdout(result), self._read_stderr(result)),
+                    timeout=timeout or self.timeout
+                )
+            except asyncio.TimeoutError:
+                result.timed_out = True
+                await self.close()
+            return result
+
+    async def close(self) -> None:
+        """Stop the shell and anything still running in it"""
+        process, self._process = self._process, None
+        if process is None or process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+    async def _read_stdout(self, result: CommandResult) -> None:
+        lines = []
+        while True:
+            raw = await self._process.stdout.readline()
+            if not raw:
+                # The command ended the shell itself (e.g. `exit`)
+                result.exit_code = await self._process.wait()
+                break
+            line = raw.decode(errors='replace').rstrip('\n')
+            if line.startswith(self._marker):
+                _, status, self.current_dir = line.split(' ', 2)
+                result.exit_code = int(status)
+                break
+            lines.append(line)
+            self.on_output("stdout", line)
+        # Drop the blank line that separates the output from the marker
+        if lines and lines[-1] == "":
+            lines.pop()
+        result.stdout = "\n".join(lines)
+
+    async def _read_stderr(self, result: CommandResult) -> None:
+        lines = []
+        while True:
+            raw = await self._process.stderr.readline()
+            if not raw:
+                break
+            line = raw.decode(errors='replace').rstrip('\n')
+            if line == self._marker:
+                break
+            lines.append(line)
+            self.on_output("stderr", line)
+        if lines and lines[-1] == "":
+            lines.pop()
+        result.stderr = "\n".join(lines)
+
+    @staticmethod
+    def _log_output(stream: str, line: str) -> None:
+        if not line:
+            return
+        if stream == "stderr":
+            logger.warning(f"Command error output: {line}")
+        else:
+            logger.info(f"Command output: {line}")
@@ -0,0 +1,37 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+SKELETONS_DIR = os.path.dirname(os.path.abspath(__file__))
+API_FILE = "API.md"
+
+@dataclass
+class Skeleton:
+    name: str
+    files: Dict[str, str] = field(default_factory=dict)
+    api: str = ""
+
+def list_skeletons() -> List[str]:
+    """Names of the skeletons shipped with GameForge"""
+    return sorted(
+        name for name in os.listdir(SKELETONS_DIR)
+        if os.path.isfile(os.path.join(SKELETONS_DIR, name, API_FILE))
+    )
+
+def load_skeleton(name: str) -> Skeleton:
+    """Read a skeleton's files and its API description"""
+    root = os.path.join(SKELETONS_DIR, name)
+    if name not in list_skeletons():
+        raise ValueError(f"Unknown skeleton {name!r}; available: {', '.join(list_skeletons())}")
+
+    skeleton = Skeleton(name=name)
+    for dirpath, _, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            relative = os.path.relpath(path, root)
+            with open(path, 'r', encoding='utf-8') as f:
+                if relative == API_FILE:
+                    skeleton.api = f.read()
+                else:
+                    skeleton.files[relative] = f.read()
+    return skeleton
@@ -0,0 +1,351 @@
+// GameForge canvas skeleton: canvas setup, game-state machine, input and HUD.
+// Games call GameEngine.start(game) from game.js; see API.md for the contract.
+const GameEngine = (() => {
+  const STATES = Object.freeze({
+    MENU: 'menu',
+    PLAYING: 'playing',
+    PAUSED: 'paused',
+    GAME_OVER: 'gameover'
+  });
+
+  const STEP = 1 / 60;
+  const MAX_FRAME_TIME = 0.25;
+  const START_KEYS = ['Enter', 'Space'];
+  const PAUSE_KEYS = ['KeyP', 'Escape'];
+  const RESTART_KEYS = ['Enter', 'Space', 'KeyR'];
+
+  class Input {
+    constructor(target) {
+      this.down = new Set();
+      this.pressed = new Set();
+      this.listeners = [];
+      target.addEventListener('keydown', (e) => {
+        if (e.code.startsWith('Arrow') || e.code === 'Space') {
+          e.preventDefault();
+        }
+        if (!e.repeat) {
+          this.pressed.add(e.code);
+          this.listeners.forEach((listener) => listener(e.code));
+        }
+        this.down.add(e.code);
+      });
+      target.addEventListener('keyup', (e) => this.down.delete(e.code));
+      if (typeof window !== 'undefined') {
+        window.addEventListener('blur', () => this.down.clear());
+      }
+    }
+
+    isDown(code) {
+      return this.down.has(code);
+    }
+
+    wasPressed(code) {
+      return this.pressed.has(code);
+    }
+
+    onPress(listener) {
+      this.listeners.push(listener);
+    }
+
+    endStep() {
+      this.pressed.clear();
+    }
+  }
+
+  class Engine {
+    constructor(game) {
+      this.game = game;
+      this.title = game.title || document.title || 'Game';
+      this.width = game.width || 800;
+      this.height = game.height || 600;
+      this.background = game.background || '#111';
+      this.instructions = game.instructions || [];
+      this.hud = Object.assign({ score: true, level: true, lives: true }, game.hud);
+
+      this.canvas = document.getElementById(game.canvasId || 'gameCanvas');
+      if (!this.canvas) {
+        this.canvas = document.createElement('canvas');
+        this.canvas.id = game.canvasId || 'gameCanvas';
+        document.body.appendChild(this.canvas);
+      }
+      this.ctx = this.canvas.getContext('2d');
+      this.resize();
+
+      this.input = new Input(document);
+      this.input.onPress((code) => this.handleKey(code));
+
+      this.state = STATES.MENU;
+      this.messages = [];
+      this.highScore = this.loadHighScore();
+      this.resetStats();
+
+      this.lastTime = null;
+      this.accumulator = 0;
+      this.error = null;
+    }
+
+    resize() {
+      const ratio = (typeof window !== 'undefined' && window.devicePixelRatio) || 1;
+      this.canvas.width = this.width * ratio;
+      this.canvas.height = this.height * ratio;
+      this.canvas.style.width = `${this.width}px`;
+      this.canvas.style.height = `${this.height}px`;
+      this.ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+    }
+
+    resetStats() {
+      this.score = 0;
+      this.level = this.game.startLevel || 1;
+      this.lives = this.game.lives === undefined ? 3 : this.game.lives;
+      this.time = 0;
+    }
+
+    // --- state machine -------------------------------------------------
+
+    newGame() {
+      this.resetStats();
+      this.messages = [];
+      this.state = STATES.PLAYING;
+      this.call('init');
+    }
+
+    pause() {
+      if (this.state === STATES.PLAYING) {
+        this.state = STATES.PAUSED;
+      }
+    }
+
+    resume() {
+      if (this.state === STATES.PAUSED) {
+        this.state = STATES.PLAYING;
+      }
+    }
+
+    gameOver(message) {
+      if (this.state === STATES.GAME_OVER) {
+        return;
+      }
+      this.state = STATES.GAME_OVER;
+      this.gameOverMessage = message || 'Game Over';
+      if (this.score > this.highScore) {
+        this.highScore = this.score;
+        this.saveHighScore();
+      }
+      this.call('onGameOver');
+    }
+
+    handleKey(code) {
+      if (this.state === STATES.MENU && START_KEYS.includes(code)) {
+        this.newGame();
+      } else if (this.state === STATES.GAME_OVER && RESTART_KEYS.includes(code)) {
+        this.newGame();
+      } else if (this.state === STATES.PLAYING && PAUSE_KEYS.includes(code)) {
+        this.pause();
+      } else if (this.state === STATES.PAUSED && PAUSE_KEYS.includes(code)) {
+        this.resume();
+      } else if (this.state === STATES.PLAYING) {
+        this.call('onKey', code);
+      }
+    }
+
+    // --- scoring and feedback -----------------------------------------
+
+    addScore(points) {
+      this.score += points;
+    }
+
+    setLevel(level) {
+      if (level > this.level) {
+        this.flash(`Level ${level}`);
+      }
+      this.level = level;
+    }
+
+    loseLife() {
+      this.lives -= 1;
+      if (this.lives <= 0) {
+        this.lives = 0;
+        this.gameOver();
+      }
+      return this.lives;
+    }
+
+    flash(text, duration = 1.5, color = '#fff') {
+      this.messages.push({ text, remaining: duration, duration, color });
+    }
+
+    loadHighScore() {
+      try {
+        return Number(localStorage.getItem(this.storageKey())) || 0;
+      } catch (e) {
+        return 0;
+      }
+    }
+
+    saveHighScore() {
+      try {
+        localStorage.setItem(this.storageKey(), String(this.highScore));
+      } catch (e) {
+        // Storage can be unavailable (private mode, file://); the score just is not kept
+      }
+    }
+
+    storageKey() {
+      return `gameforge:${this.title}:highScore`;
+    }
+
+    // --- loop ----------------------------------------------------------
+
+    call(hook, ...args) {
+      const fn = this.game[hook];
+      return typeof fn === 'function' ? fn.call(this.game, ...args, this) : undefined;
+    }
+
+    frame(now) {
+      if (this.error) {
+        return;
+      }
+      const seconds = now / 1000;
+      const elapsed = this.lastTime === null ? 0 : Math.min(seconds - this.lastTime, MAX_FRAME_TIME);
+      this.lastTime = seconds;
+
+      try {
+        if (this.state === STATES.PLAYING) {
+          this.accumulator += elapsed;
+          while (this.accumulator >= STEP && this.state === STATES.PLAYING) {
+            this.time += STEP;
+            this.call('update', STEP);
+            this.input.endStep();
+            this.accumulator -= STEP;
+          }
+        } else {
+          this.accumulator = 0;
+          this.input.endStep();
+        }
+        this.messages.forEach((message) => { message.remaining -= elapsed; });
+        this.messages = this.messages.filter((message) => message.remaining > 0);
+        this.render();
+      } catch (e) {
+        this.error = e;
+        console.error(e);
+        this.drawError(e);
+        return;
+      }
+      requestAnimationFrame((t) => this.frame(t));
+    }
+
+    render() {
+      const ctx = this.ctx;
+      ctx.fillStyle = this.background;
+      ctx.fillRect(0, 0, this.width, this.height);
+
+      if (this.state === STATES.MENU) {
+        this.drawMenu();
+        return;
+      }
+
+      ctx.save();
+      this.call('render', ctx);
+      ctx.restore();
+      this.drawHud();
+      this.drawMessages();
+
+      if (this.state === STATES.PAUSED) {
+        this.drawOverlay('Paused', ['Press P or Esc to resume']);
+      } else if (this.state === STATES.GAME_OVER) {
+        this.drawOverlay(this.gameOverMessage, [
+          `Score: ${this.score}`,
+          `High score: ${this.highScore}`,
+          'Press Enter or R to play again'
+        ]);
+      }
+    }
+
+    // --- drawing helpers -------------------------------------------------
+
+    drawText(text, x, y, options = {}) {
+      const ctx = this.ctx;
+      ctx.save();
+      ctx.font = `${options.bold ? 'bold ' : ''}${options.size || 18}px ${options.font || 'Arial, sans-serif'}`;
+      ctx.fillStyle = options.color || '#fff';
+      ctx.textAlign = options.align || 'left';
+      ctx.textBaseline = options.baseline || 'top';
+      ctx.fillText(text, x, y);
+      ctx.restore();
+    }
+
+    drawMenu() {
+      const center = this.width / 2;
+      let y = this.height * 0.18;
+      this.drawText(this.title, center, y, { size: 48, bold: true, align: 'center' });
+      y += 80;
+      this.drawText('How to play', center, y, { size: 22, bold: true, align: 'center', color: '#ffd54f' });
+      y += 34;
+      this.instructions.forEach((line) => {
+        this.drawText(line, center, y, { size: 18, align: 'center', color: '#ddd' });
+        y += 26;
+      });
+      y += 10;
+      this.drawText('P / Esc: Pause', center, y, { size: 18, align: 'center', color: '#ddd' });
+      y += 50;
+      this.drawText('Press Enter or Space to start', center, y, { size: 22, align: 'center' });
+      if (this.highScore) {
+        this.drawText(`High score: ${this.highScore}`, center, this.height - 40, { size: 16, align: 'center', color: '#aaa' });
+      }
+    }
+
+    drawHud() {
+      const parts = [];
+      if (this.hud.score) parts.push(`Score: ${this.score}`);
+      if (this.hud.level) parts.push(`Level: ${this.level}`);
+      if (this.hud.lives) parts.push(`Lives: ${this.lives}`);
+      if (parts.length) {
+        this.drawText(parts.join('   '), 10, 8, { size: 18, bold: true });
+      }
+    }
+
+    drawMessages() {
+      this.messages.forEach((message, index) => {
+        const alpha = Math.min(1, message.remaining / (message.duration / 2));
+        this.ctx.save();
+        this.ctx.globalAlpha = alpha;
+        this.drawText(message.text, this.width / 2, this.height / 3 + index * 40,
+          { size: 32, bold: true, align: 'center', color: message.color });
+        this.ctx.restore();
+      });
+    }
+
+    drawOverlay(title, lines) {
+      const ctx = this.ctx;
+      ctx.save();
+      ctx.fillStyle = 'rgba(0, 0, 0, 0.65)';
+      ctx.fillRect(0, 0, this.width, this.height);
+      ctx.restore();
+      const center = this.width / 2;
+      let y = this.height / 2 - 60;
+      this.drawText(title, center, y, { size: 40, bold: true, align: 'center' });
+      y += 60;
+      lines.forEach((line) => {
+        this.drawText(line, center, y, { size: 20, align: 'center' });
+        y += 30;
+      });
+    }
+
+    drawError(error) {
+      this.ctx.setTransform(1, 0, 0, 1, 0, 0);
+      this.drawOverlay('Error', [String(error && error.message ? error.message : error)]);
+    }
+  }
+
+  function start(game) {
+    const engine = new Engine(game);
+    requestAnimationFrame((t) => engine.frame(t));
+    return engine;
+  }
+
+  return { STATES, Engine, start };
+})();
+
+if (typeof module !== 'undefined') {
+  module.exports = GameEngine;
+}
@@ -0,0 +1,266 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from .tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Bump when the rendering changes so cached compilations are not reused
+COMPILER_VERSION = 1
+
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+SECTION_NUMBER_PATTERN = re.compile(r'^\d+(?:\.\d+)*\.?\s+')
+BULLET_PATTERN = re.compile(r'^(\s*)([-*+]|\d+[.)])\s+(.*)$')
+RULE_PATTERN = re.compile(r'^\s*(?:[-=*_]\s*){3,}$')
+EMPHASIS_PATTERN = re.compile(r'(\*\*|__)(.+?)\1')
+SPACED_BLOCKS = re.compile(r'\S \S')
+
+BLOCK_CHARS = set('■□▪▫█▓▒░◼◻')
+FILLED_CHARS = set('■▪█▓◼')
+GRID_LEGEND = "Grids: # = block, . = empty, / = next row, several grids separated by ', '"
+
+# Sibling bullets up to this length (e.g. controls, scoring tables) are packed onto one line
+MAX_PACKED_ITEM = 60
+
+@dataclass
+class SpecItem:
+    kind: str  # "bullet", "text" or "grid"
+    text: str
+    depth: int = 0
+    marker: str = "-"
+
+@dataclass
+class SpecSection:
+    title: str
+    level: int
+    items: List[SpecItem] = field(default_factory=list)
+
+@dataclass
+class CompiledSpec:
+    spec_hash: str
+    sections: List[SpecSection]
+    text: str
+    original_tokens: int
+    compiled_tokens: int
+
+    @property
+    def saved_ratio(self) -> float:
+        if not self.original_tokens:
+            return 0.0
+        return 1 - self.compiled_tokens / self.original_tokens
+
+def spec_hash(spec: str) -> str:
+    return hashlib.sha256(f"{COMPILER_VERSION}\n{spec}".encode('utf-8')).hexdigest()
+
+def parse_spec(spec: str) -> List[SpecSection]:
+    """Split a markdown spec into sections of bullets, paragraphs and block diagrams"""
+    sections = [SpecSection(title="", level=0)]
+    indents: List[int] = []
+    grid: List[str] = []
+
+    def flush_grid() -> None:
+        if grid:
+            sections[-1].items.append(SpecItem(kind="grid", text="\n".join(grid)))
+            grid.clear()
+
+    for line in spec.expandtabs(4).splitlines():
+        stripped = line.strip()
+        if stripped and set(stripped) <= BLOCK_CHARS | {' '}:
+            grid.append(line.rstrip())
+            continue
+        flush_grid()
+        if not stripped or RULE_PATTERN.match(stripped):
+            continue
+
+        heading = HEADING_PATTERN.match(stripped)
+        if heading:
+            title = SECTION_NUMBER_PATTERN.sub('', clean_inline(heading.group(2)))
+            sections.append(SpecSection(title=title, level=len(heading.group(1))))
+            indents = []
+            continue
+
+        bullet = BULLET_PATTERN.match(line)
+        if bullet:
+            indent = len(bullet.group(1))
+            while indents and indents[-1] > indent:
+                indents.pop()
+            if not indents or indents[-1] < indent:
+                indents.append(indent)
+            marker = bullet.group(2) if bullet.group(2)[0].isdigit() else "-"
+            sections[-1].items.append(SpecItem(
+                kind="bullet", text=clean_inline(bullet.group(3)), depth=len(indents) - 1, marker=marker
+            ))
+        else:
+            sections[-1].items.append(SpecItem(kind="text", text=clean_inline(stripped)))
+    flush_grid()
+
+    return [section for section in sections if section.title or section.items]
+
+def clean_inline(text: str) -> str:
+    """Drop bold markers and collapse runs of whitespace"""
+    return re.sub(r'\s+', ' ', EMPHASIS_PATTERN.sub(r'\2', text)).strip()
+
+def compact_grid(diagram: str) -> Optional[str]:
+    """Render a block diagram as '#'/'.' rows, or None if its layout is ambiguous
+
+    Side-by-side diagrams are split on runs of two or more empty columns. Blocks are
+    expected on a two-column pitch ("■ ■") or packed ("■■"); anything else is kept
+    verbatim by the caller.
+    """
+    rows = diagram.split("\n")
+    width = max(len(row) for row in rows)
+    rows = [row.ljust(width) for row in rows]
+    empty = [all(row[col] == ' ' for row in rows) for col in range(width)]
+
+    segments = []
+    start = None
+    gap = 0
+    for col in range(width + 2):
+        if col < width and not empty[col]:
+            if start is None:
+                start = col
+            gap = 0
+            end = col
+        elif start is not None:
+            gap += 1
+            if gap >= 2 or col >= width:
+                segments.append((start, end))
+                start = None
+
+    grids = []
+    for start, end in segments:
+        columns = [col for col in range(start, end + 1) if not empty[col]]
+        pitch = 2 if all((col - start) % 2 == 0 for col in columns) else 1
+        if pitch == 1 and any(SPACED_BLOCKS.search(row[start:end + 1]) for row in rows):
+            # Spaced blocks on mixed columns, e.g. a row shifted by one character
+            return None
+        lines = [
+            "".join('#' if row[col] in FILLED_CHARS else '.' for col in range(start, end + 1, pitch))
+            for row in rows
+        ]
+        while lines and set(lines[0]) == {'.'}:
+            lines.pop(0)
+        while lines and set(lines[-1]) == {'.'}:
+            lines.pop()
+        grids.append("/".join(lines))
+    return ", ".join(grids)
+
+def render_spec(sections: List[SpecSection]) -> str:
+    """Re-render parsed sections as compact markdown"""
+    out: List[str] = []
+    used_grid = False
+    for section in sections:
+        if section.title:
+            out.append(f"{'#' * section.level} {section.title}")
+
+        items = section.items
+        i = 0
+        while i < len(items):
+            item = items[i]
+            if item.kind == "grid":
+                compact = compact_grid(item.text)
+                if compact is None:
+                    out.append(item.text)
+                else:
+                    used_grid = True
+                    if out and out[-1].endswith(':'):
+                        out[-1] += f" {compact}"
+                    else:
+                        out.append(compact)
+                i += 1
+                continue
+
+            # Runs of short leaf bullets share one line instead of paying a line prefix each
+            run = i
+            while run < len(items) and _packable(items[run], item.depth) and not _has_children(items, run):
+                run += 1
+            if run - i >= 2:
+                packed = "; ".join(entry.text for entry in items[i:run])
+                out.append(f"{'  ' * item.depth}- {packed}")
+                i = run
+                continue
+
+            if item.kind == "bullet":
+                out.append(f"{'  ' * item.depth}{item.marker} {item.text}")
+            else:
+                out.append(item.text)
+            i += 1
+
+    if used_grid:
+        out.insert(0, f"({GRID_LEGEND})")
+    return "\n".join(out)
+
+def _has_children(items: List[SpecItem], index: int) -> bool:
+    return (index + 1 < len(items) and items[index + 1].kind == "bullet"
+            and items[index + 1].depth > items[index].depth)
+
+def _packable(item: SpecItem, depth: int) -> bool:
+    return (item.kind == "bullet" and item.marker == "-" and item.depth == depth
+            and len(item.text) <= MAX_PACKED_ITEM and ';' not in item.text
+            and not item.text.endswith(':'))
+
+class SpecCompiler:
+    """Compile markdown game specs into a compact prompt form, cached by spec hash"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = os.path.abspath(cache_dir) if cache_dir else None
+        self._memory: Dict[str, CompiledSpec] = {}
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def compile(self, spec: str) -> CompiledSpec:
+        """Return the compact form of `spec`, reusing a cached compilation when possible"""
+        key = spec_hash(spec)
+        compiled = self._memory.get(key) or self._load(key)
+        if compiled is None:
+            sections = parse_spec(spec)
+            text = render_spec(sections)
+            compiled = CompiledSpec(
+                spec_hash=key,
+                sections=sections,
+                text=text,
+                original_tokens=estimate_tokens(spec),
+                compiled_tokens=estimate_tokens(text)
+            )
+            self._store(compiled)
+        self._memory[key] = compiled
+
+        logger.info(
+            f"Compiled spec: {compiled.original_tokens} -> {compiled.compiled_tokens} tokens "
+            f"({compiled.saved_ratio:.0%} smaller)"
+        )
+        return compiled
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load(self, key: str) -> Optional[CompiledSpec]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            data['sections'] = [
+                SpecSection(title=s['title'], level=s['level'], items=[SpecItem(**i) for i in s['items']])
+                for s in data['sections']
+            ]
+            return CompiledSpec(**data)
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, TypeError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable compiled spec {self._path(key)}: {e}")
+            return None
+
+    def _store(self, compiled: CompiledSpec) -> None:
+        if not self.cache_dir:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(asdict(compiled), f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(compiled.spec_hash))
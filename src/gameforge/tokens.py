@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+
+# Rough characters-per-token ratio for English prose and source code
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting before the API reports real usage
+
+    Non-ASCII characters such as box-drawing symbols usually cost a token or more
+    each, so their extra UTF-8 bytes are counted on top of the character ratio.
+    """
+    extra_bytes = len(text.encode('utf-8')) - len(text)
+    return len(text) // CHARS_PER_TOKEN + extra_bytes // 2 + 1
+
+@dataclass
+class TokenUsage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return (self.input_tokens + self.cache_creation_input_tokens
+                + self.cache_read_input_tokens + self.output_tokens)
+
+    def add(self, other: "TokenUsage") -> None:
+        """Accumulate another usage record into this one"""
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cache_creation_input_tokens += other.cache_creation_input_tokens
+        self.cache_read_input_tokens += other.cache_read_input_tokens
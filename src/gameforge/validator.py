@@ -0,0 +1,279 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import List, Optional
+
+from .executor import MANIFEST_NAME
+from .prompts import build_repair_prompt
+
+logger = logging.getLogger(__name__)
+
+SKIPPED_DIRS = {'responses', 'dist', 'runs', 'node_modules', 'venv', '.venv', '__pycache__', '.git'}
+PYGAME_IMPORT_PATTERN = re.compile(r'^\s*(?:import pygame|from pygame\b)', re.MULTILINE)
+ENTRY_POINT_PATTERN = re.compile(r'^if __name__ == [\'"]__main__[\'"]|^pygame\.init\(\)', re.MULTILINE)
+
+# Runs a pygame entry point with dummy SDL drivers, presses a few keys to get past
+# menus and exits cleanly after a fixed number of frames.
+PYGAME_HARNESS = r'''
+import os, runpy, sys
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+import pygame
+
+script, frames = sys.argv[1], int(sys.argv[2])
+sys.argv = [script]
+sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+state = {"frame": 0}
+KEYS = (pygame.K_RETURN, pygame.K_SPACE, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+def on_frame(original):
+    def wrapper(*args, **kwargs):
+        result = original(*args, **kwargs)
+        state["frame"] += 1
+        frame = state["frame"]
+        if frame >= frames:
+            raise SystemExit(0)
+        if frame % 10 == 0:
+            key = KEYS[(frame // 10) % len(KEYS)]
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0))
+            pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key, mod=0, unicode="", scancode=0))
+        return result
+    return wrapper
+
+pygame.display.flip = on_frame(pygame.display.flip)
+pygame.display.update = on_frame(pygame.display.update)
+runpy.run_path(script, run_name="__main__")
+'''
+
+@dataclass
+class ValidationIssue:
+    path: str
+    check: str
+    message: str
+
+@dataclass
+class ValidationReport:
+    output_dir: str
+    checked: List[str] = field(default_factory=list)
+    issues: List[ValidationIssue] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+    def format(self) -> str:
+        """Human- and model-readable list of the problems found"""
+        if self.ok:
+            return f"All {len(self.checked)} files passed validation."
+        return "\n".join(f"- {issue.path} [{issue.check}]: {issue.message}" for issue in self.issues)
+
+class _ReferenceCollector(HTMLParser):
+    """Collect local script/stylesheet references and inline scripts from an HTML page"""
+
+    def __init__(self):
+        super().__init__()
+        self.references: List[str] = []
+        self.inline_scripts: List[str] = []
+        self._in_script = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'script':
+            if attrs.get('src'):
+                self.references.append(attrs['src'])
+            elif attrs.get('type', 'text/javascript') in ('text/javascript', 'module', 'application/javascript'):
+                self._in_script = True
+                self.inline_scripts.append("")
+        elif tag == 'link' and 'stylesheet' in (attrs.get('rel') or '') and attrs.get('href'):
+            self.references.append(attrs['href'])
+
+    def handle_endtag(self, tag):
+        if tag == 'script':
+            self._in_script = False
+
+    def handle_data(self, data):
+        if self._in_script:
+            self.inline_scripts[-1] += data
+
+def _is_local(reference: str) -> bool:
+    return not re.match(r'^(?:[a-z]+:)?//|^data:', reference, re.IGNORECASE)
+
+def check_javascript(source: str, suffix: str = '.js', timeout: float = 30) -> Optional[str]:
+    """Syntax-check JavaScript with `node --check`; None if valid or node is unavailable"""
+    if not shutil.which('node'):
+        return None
+    with tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False, encoding='utf-8') as f:
+        f.write(source)
+    try:
+        result = subprocess.run(['node', '--check', f.name], capture_output=True, text=True, timeout=timeout)
+        if result.returncode != 0:
+            # Drop node's temp-file path and stack trace; keep the located error
+            lines = [line for line in result.stderr.splitlines() if line and not line.startswith('    at ')]
+            return "\n".join(lines[1:] or lines)
+    except subprocess.TimeoutExpired:
+        return "node --check timed out"
+    finally:
+        os.remove(f.name)
+    return None
+
+def run_pygame_entry_point(path: str, frames: int, timeout: float) -> Optional[str]:
+    """Run a pygame script headlessly for `frames` frames; return an error message or None"""
+    env = {
+        "PATH": os.environ.get("PATH", ""),
+        "HOME": tempfile.gettempdir(),
+        "SDL_VIDEODRIVER": "dummy",
+        "SDL_AUDIODRIVER": "dummy",
+        "PYGAME_HIDE_SUPPORT_PROMPT": "1",
+    }
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", PYGAME_HARNESS, path, str(frames)],
+            cwd=os.path.dirname(path),
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            preexec_fn=_limit_resources if os.name == 'posix' else None
+        )
+    except subprocess.TimeoutExpired:
+        return f"Did not render {frames} frames within {timeout}s"
+    if result.returncode != 0:
+        return result.stderr.strip()[-2000:] or f"Exited with code {result.returncode}"
+    return None
+
+def _limit_resources() -> None:
+    import resource
+    resource.setrlimit(resource.RLIMIT_AS, (2 * 1024 ** 3, 2 * 1024 ** 3))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (256, 256))
+
+def generated_files(output_dir: str) -> List[str]:
+    """Paths under `output_dir` that its executor wrote, from the write manifest
+
+    Without a manifest the directory is walked, skipping build output and any
+    subdirectory with a manifest of its own (another game's output directory).
+    """
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return sorted(
+            os.path.join(output_dir, path) for path in manifest
+            if os.path.isfile(os.path.join(output_dir, path))
+            and not SKIPPED_DIRS.intersection(os.path.normpath(path).split(os.sep)[:-1])
+        )
+    except (OSError, json.JSONDecodeError):
+        pass
+
+    paths = []
+    for root, dirs, files in os.walk(output_dir):
+        dirs[:] = [
+            d for d in dirs
+            if d not in SKIPPED_DIRS and not d.startswith('.')
+            and not os.path.exists(os.path.join(root, d, MANIFEST_NAME))
+        ]
+        paths.extend(os.path.join(root, name) for name in sorted(files) if not name.startswith('.'))
+    return paths
+
+def validate_output(output_dir: str, frames: int = 120, timeout: float = 30) -> ValidationReport:
+    """Syntax-check every generated file and run pygame entry points headlessly"""
+    report = ValidationReport(output_dir=output_dir)
+    for path in generated_files(output_dir):
+        root, name = os.path.split(path)
+        relative_path = os.path.relpath(path, output_dir)
+        extension = os.path.splitext(name)[1].lower()
+        if extension not in ('.py', '.js', '.mjs', '.html', '.json'):
+            continue
+        report.checked.append(relative_path)
+
+        def issue(check: str, message: str) -> None:
+            report.issues.append(ValidationIssue(relative_path, check, message))
+
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            source = f.read()
+
+        if extension == '.py':
+            try:
+                compile(source, path, 'exec')
+            except SyntaxError as e:
+                issue("python-syntax", str(e))
+                continue
+            if PYGAME_IMPORT_PATTERN.search(source) and ENTRY_POINT_PATTERN.search(source):
+                error = run_pygame_entry_point(path, frames, timeout)
+                if error:
+                    issue("pygame-run", error)
+        elif extension in ('.js', '.mjs'):
+            error = check_javascript(source, extension)
+            if error:
+                issue("js-syntax", error)
+        elif extension == '.json':
+            try:
+                json.loads(source)
+            except json.JSONDecodeError as e:
+                issue("json", str(e))
+        else:
+            collector = _ReferenceCollector()
+            collector.feed(source)
+            for reference in collector.references:
+                target = reference.split('?', 1)[0].split('#', 1)[0]
+                if _is_local(target) and not os.path.exists(os.path.join(root, target)):
+                    issue("html-reference", f"Missing referenced file {reference}")
+            for script in collector.inline_scripts:
+                error = check_javascript(script) if script.strip() else None
+                if error:
+                    issue("js-syntax", f"Inline script: {error}")
+    return report
+
+class GameValidator:
+    """Validate generated games, in parallel across a process pool"""
+
+    def __init__(self, max_workers: Optional[int] = None, frames: int = 120, timeout: float = 30):
+        self.frames = frames
+        self.timeout = timeout
+        self._pool = ProcessPoolExecutor(max_workers=max_workers)
+
+    async def validate(self, output_dir: str) -> ValidationReport:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, validate_output, output_dir, self.frames, self.timeout)
+
+    async def validate_many(self, output_dirs: List[str]) -> List[ValidationReport]:
+        return await asyncio.gather(*(self.validate(output_dir) for output_dir in output_dirs))
+
+    async def validate_and_repair(self, chat, max_repairs: int = 1) -> ValidationReport:
+        """Validate the chat's output and send failures back as repair turns
+
+        Files the last turn failed to write or patch are reported alongside the checks,
+        since the file on disk still passes them with its old contents.
+        """
+        report = await self._validate_turn(chat)
+        for attempt in range(max_repairs):
+            if report.ok:
+                break
+            logger.warning(f"Validation failed, requesting repair {attempt + 1}/{max_repairs}:\n{report.format()}")
+            await chat.send_message(build_repair_prompt(report.format()))
+            report = await self._validate_turn(chat)
+        return report
+
+    async def _validate_turn(self, chat) -> ValidationReport:
+        report = await self.validate(chat.executor.output_dir)
+        for path in chat.write_summary.failed:
+            report.issues.append(ValidationIssue(
+                path, "write", "The edit to this file could not be applied and the file is unchanged; "
+                               "send the complete file or a patch whose SEARCH text matches it exactly"))
+        return report
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+    def __enter__(self) -> "GameValidator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
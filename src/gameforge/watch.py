@@ -0,0 +1,150 @@
+import asyncio
+import difflib
+import logging
+import os
+import time
+from typing import Callable, Optional
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from .ai_client import GameForgeChat
+from .batch import load_game_spec
+from .prompts import build_refinement_prompt
+from .spec_compiler import SpecCompiler
+from .validator import GameValidator
+
+logger = logging.getLogger(__name__)
+
+# Edits closer together than this are treated as one change
+DEBOUNCE_SECONDS = 0.5
+
+# A diff longer than this fraction of the new spec is sent as the full spec instead
+REWRITE_RATIO = 0.8
+
+def spec_diff(previous: str, current: str, context: int = 2) -> str:
+    """Unified diff between two versions of a spec, or "" if they are equal"""
+    return "".join(difflib.unified_diff(
+        previous.splitlines(keepends=True),
+        current.splitlines(keepends=True),
+        fromfile="previous spec",
+        tofile="current spec",
+        n=context
+    ))
+
+class _SpecEventHandler(FileSystemEventHandler):
+    """Calls `notify` for events that touch the spec file, including editors' rename-on-save"""
+
+    def __init__(self, path: str, notify: Callable[[], None]):
+        self.path = path
+        self.notify = notify
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.is_directory or event.event_type not in ("created", "modified", "moved"):
+            return
+        paths = (event.src_path, getattr(event, "dest_path", ""))
+        if any(path and os.path.abspath(path) == self.path for path in paths):
+            self.notify()
+
+class SpecWatcher:
+    """Keep a chat session alive and turn spec edits into refinement turns
+
+    The spec file is watched with watchdog. Bursts of saves are debounced, the new
+    spec is diffed against the version the model last saw, and only the diff is sent
+    as a follow-up turn on the same chat, which asks for patches to the existing files.
+    """
+
+    def __init__(self, chat: GameForgeChat, spec_path: str, spec_compiler: Optional[SpecCompiler] = None,
+                 validator: Optional[GameValidator] = None, max_repairs: int = 1,
+                 debounce: float = DEBOUNCE_SECONDS, baseline: Optional[str] = None,
+                 on_refined: Optional[Callable[[], None]] = None):
+        self.chat = chat
+        self.spec_path = os.path.abspath(spec_path)
+        self.spec_compiler = spec_compiler
+        self.validator = validator
+        self.max_repairs = max_repairs
+        self.debounce = debounce
+        self.previous = baseline
+        self.on_refined = on_refined
+        self.refinements = 0
+
+    async def run(self) -> None:
+        """Watch until cancelled, sending a refinement turn after each settled edit"""
+        if self.previous is None:
+            self.previous = self._read_spec()[1]
+
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+        handler = _SpecEventHandler(self.spec_path, lambda: loop.call_soon_threadsafe(changed.set))
+        observer = Observer()
+        observer.schedule(handler, os.path.dirname(self.spec_path), recursive=False)
+        observer.start()
+        logger.info(f"Watching {self.spec_path} for changes")
+        try:
+            while True:
+                await changed.wait()
+                await self._settle(changed)
+                await self.refine()
+        finally:
+            observer.stop()
+            await asyncio.to_thread(observer.join)
+
+    async def _settle(self, changed: asyncio.Event) -> None:
+        """Wait until no change has been seen for the debounce interval"""
+        while True:
+            changed.clear()
+            try:
+                await asyncio.wait_for(changed.wait(), self.debounce)
+            except asyncio.TimeoutError:
+                return
+
+    def _read_spec(self):
+        """Load the spec as the model sees it; returns the game name and spec text"""
+        game = load_game_spec(self.spec_path)
+        spec = self.spec_compiler.compile(game.spec).text if self.spec_compiler else game.spec
+        return game.game_name, spec
+
+    async def refine(self) -> Optional[str]:
+        """Send the spec change since the last turn; returns the response, or None if nothing was sent"""
+        try:
+            game_name, spec = self._read_spec()
+        except (FileNotFoundError, KeyError, ValueError) as e:
+            # Usually a save caught half-written; the next event retries
+            logger.warning(f"Ignoring unreadable spec: {e}")
+            return None
+
+        diff = spec_diff(self.previous, spec)
+        if not diff:
+            logger.info("Spec saved without changes")
+            return None
+
+        rewrite = len(diff) > REWRITE_RATIO * len(spec)
+        prompt = build_refinement_prompt(game_name, spec if rewrite else diff, rewrite=rewrite)
+        start = time.perf_counter()
+        with self.chat.ai.instrumentation.span("refinement", diff_characters=len(diff), rewrite=rewrite) as span:
+            try:
+                response = await self.chat.send_message(prompt)
+                if self.validator:
+                    report = await self.validator.validate_and_repair(self.chat, self.max_repairs)
+                    span["validation_ok"] = report.ok
+                    logger.info(f"Validation: {report.format()}")
+            except Exception as e:
+                # Keep the old baseline so the next edit resends the whole pending change
+                logger.error(f"Refinement failed: {e}")
+                span["error"] = str(e)
+                history = self.chat.message_history
+                if history and history[-1].role == "user":
+                    history.pop()
+                return None
+
+        self.previous = spec
+        self.refinements += 1
+        if self.on_refined:
+            # Blocking follow-up work such as rebuilding the bundle
+            await asyncio.to_thread(self.on_refined)
+        usage = self.chat.last_usage
+        logger.info(
+            f"Refinement {self.refinements} applied in {time.perf_counter() - start:.1f}s "
+            f"({usage.output_tokens} output tokens). Files: {self.chat.write_summary}"
+        )
+        return response
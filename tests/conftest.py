@@ -0,0 +1,32 @@
+import shutil
+
+import pytest
+
+from benchmarks.stub_server import load_recorded_responses
+from src.gameforge.executor import GameForgeExecutor
+from src.gameforge.parser import ActionType, GameForgeParser
+
+# Recordings that were cut off mid-file would trigger continuations of their own
+COMPLETE_RESPONSES = [
+    response for response in load_recorded_responses()
+    if not GameForgeParser().parse("recorded", response).truncated
+]
+
+requires_node = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+
+def written_files(response: str) -> dict:
+    """The final contents of each file a response writes"""
+    parsed = GameForgeParser().parse("expected", response)
+    return {action.file_path: action.content for action in parsed.actions if action.type == ActionType.FILE}
+
+
+@pytest.fixture
+def recorded_response() -> str:
+    return COMPLETE_RESPONSES[0]
+
+
+@pytest.fixture
+def executor(tmp_path) -> GameForgeExecutor:
+    """An executor writing to a fresh output directory; shell actions are skipped"""
+    return GameForgeExecutor(work_dir=str(tmp_path), output_dir=str(tmp_path / "game"), run_shell=False)
@@ -0,0 +1,68 @@
+import json
+import os
+
+from benchmarks.stub_server import StubServer
+from src.gameforge.ai_client import GameForgeAI
+from src.gameforge.batch import BatchRunner, find_spec_files, load_game_spec, output_dir_names, safe_dir_name
+
+from .conftest import written_files
+
+# Batch games run their shell actions, so the reply only writes files
+RESPONSE = (
+    '<forgeArtifact id="pong" title="Pong">\n'
+    '<forgeAction type="file" filePath="index.html">\n<script src="js/game.js"></script>\n</forgeAction>\n'
+    '<forgeAction type="file" filePath="js/game.js">\nlet score = 0;\n</forgeAction>\n'
+    '</forgeArtifact>'
+)
+
+
+def write_spec(path, game_name: str, spec: str = "A small game") -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"game_name": game_name, "spec": spec}))
+    return str(path)
+
+
+def test_load_game_spec(tmp_path):
+    assert load_game_spec(write_spec(tmp_path / "a.json", "Pong")).game_name == "Pong"
+    (tmp_path / "snake.md").write_text("# Snake")
+    assert load_game_spec(str(tmp_path / "snake.md")).game_name == "snake"
+
+
+def test_find_spec_files(tmp_path):
+    write_spec(tmp_path / "b.json", "B")
+    (tmp_path / "a.md").write_text("A")
+    (tmp_path / "notes.py").write_text("")
+    assert find_spec_files(str(tmp_path)) == [str(tmp_path / "a.md"), str(tmp_path / "b.json")]
+
+
+def test_safe_dir_name():
+    assert safe_dir_name("Space Invaders") == "Space_Invaders"
+    assert safe_dir_name("../../etc") == "etc"
+    assert safe_dir_name("a/b\\c") == "a_b_c"
+    assert safe_dir_name("..") == "game"
+
+
+def test_output_dir_names_are_distinct(tmp_path):
+    paths = [
+        write_spec(tmp_path / "one" / "game_spec.json", "Pong"),
+        write_spec(tmp_path / "two" / "game_spec.json", "pong"),
+        write_spec(tmp_path / "three.json", "runs"),
+        str(tmp_path / "missing.json"),
+    ]
+    assert output_dir_names(paths) == ["Pong", "pong-2", "runs-2", "missing"]
+
+
+async def test_games_with_the_same_name_get_their_own_directories(tmp_path):
+    paths = [write_spec(tmp_path / "specs" / f"{i}.json", "Pong") for i in range(2)]
+    with StubServer(RESPONSE, latency=0) as server:
+        async with GameForgeAI(api_key="stub", system_prompt="", base_url=server.base_url) as ai:
+            results = await BatchRunner(ai, str(tmp_path), concurrency=2).run(paths)
+
+    assert [result.ok for result in results] == [True, True]
+    for name in ("Pong", "Pong-2"):
+        output_dir = tmp_path / "ai_output" / name
+        for path in written_files(RESPONSE):
+            assert (output_dir / path).is_file()
+        assert (output_dir / "responses" / f"response_{name}.txt").read_text() == RESPONSE
+        manifest = json.loads((output_dir / ".gameforge_manifest.json").read_text())
+        assert sorted(manifest) == sorted(os.path.normpath(path) for path in written_files(RESPONSE))
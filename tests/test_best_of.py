@@ -0,0 +1,74 @@
+import os
+
+from benchmarks.stub_server import StubServer
+from src.gameforge.ai_client import GameForgeAI
+from src.gameforge.best_of import BestOfN, Candidate, candidate_temperatures, score_candidate
+from src.gameforge.executor import MANIFEST_NAME
+from src.gameforge.parser import ActionType, GameForgeAction, ParsedResponse
+from src.gameforge.validator import ValidationIssue, ValidationReport
+
+RESPONSE = (
+    '<forgeArtifact id="pong" title="Pong">\n'
+    '<forgeAction type="file" filePath="index.html">\n<script src="js/game.js"></script>\n</forgeAction>\n'
+    '<forgeAction type="file" filePath="js/game.js">\nlet score = 0;\n</forgeAction>\n'
+    '</forgeArtifact>'
+)
+
+
+def candidate(index: int, truncated: bool = False, errors=(), issues: int = 0, code_bytes: int = 1000,
+              error: str = None, actions: bool = True) -> Candidate:
+    parsed = ParsedResponse(
+        artifact_id="game", title="Game",
+        actions=[GameForgeAction(ActionType.FILE, "x", "index.html")] if actions else [],
+        truncated=truncated, errors=list(errors)
+    )
+    validation = ValidationReport(
+        output_dir="", issues=[ValidationIssue("index.html", "syntax", "bad")] * issues
+    )
+    return Candidate(index=index, temperature=0.2, output_dir="", parsed=parsed, validation=validation,
+                     code_bytes=code_bytes, error=error)
+
+
+def test_candidate_temperatures():
+    assert candidate_temperatures(1) == [0.2]
+    assert candidate_temperatures(3) == [0.2, 0.6, 1.0]
+
+
+def test_score_candidate_ordering():
+    ranked = [
+        candidate(0, code_bytes=40_000),
+        candidate(1),
+        candidate(2, truncated=True),
+        candidate(3, errors=["unclosed action"]),
+        candidate(4, issues=1),
+        candidate(5, truncated=True, issues=3),
+    ]
+    scores = [score_candidate(c) for c in ranked]
+    assert scores == sorted(scores, reverse=True)
+    assert len(set(scores)) == len(scores)
+
+
+def test_failed_or_empty_candidates_score_zero():
+    assert score_candidate(candidate(0, error="timeout")) == 0
+    assert score_candidate(candidate(1, actions=False)) == 0
+    assert score_candidate(Candidate(index=2, temperature=0.2, output_dir="")) == 0
+
+
+async def test_winner_is_promoted_into_the_output_directory(executor, tmp_path):
+    with StubServer(RESPONSE, latency=0) as server:
+        async with GameForgeAI(api_key="stub", system_prompt="", base_url=server.base_url) as ai:
+            best_of = BestOfN(ai, executor, n=3)
+            winner = await best_of.run("Create the game")
+
+    assert server.stats["requests"] == 3
+    # Equal scores go to the lowest temperature
+    assert winner.index == 0
+    assert all(c.score == winner.score for c in best_of.candidates)
+
+    output_dir = tmp_path / "game"
+    assert (output_dir / "js" / "game.js").read_text() == "let score = 0;"
+    assert sorted(winner.chat.write_summary.created) == ["index.html", os.path.join("js", "game.js")]
+    assert winner.chat.executor is executor
+    # The scratch directories are removed and the manifest is the real executor's own
+    assert not os.path.exists(winner.output_dir)
+    assert (output_dir / MANIFEST_NAME).exists()
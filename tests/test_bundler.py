@@ -0,0 +1,89 @@
+import os
+import re
+import subprocess
+
+import pytest
+
+from src.gameforge.bundler import bundle_game, minify_css, minify_js
+from src.gameforge.executor import GameForgeExecutor
+from src.gameforge.parser import ActionType, GameForgeParser
+from src.gameforge.validator import check_javascript
+
+from .conftest import COMPLETE_RESPONSES, requires_node
+
+
+def recorded_scripts():
+    return [
+        pytest.param(action.content, id=f"{index}-{action.file_path}")
+        for index, response in enumerate(COMPLETE_RESPONSES)
+        for action in GameForgeParser().parse("recorded", response).actions
+        if action.type == ActionType.FILE and action.file_path.endswith(".js")
+    ]
+
+
+def test_comments_and_spaces_are_removed():
+    source = "// header\nfunction add(a, b) {\n    /* sum */\n    return a + b;\n}\n"
+    assert minify_js(source) == "function add(a,b){return a + b;}\n"
+
+
+def test_strings_templates_and_regexes_are_kept():
+    source = "const s = 'a  // b';\nconst t = `x ${ y + 1 }  z`;\nconst r = /[/]  +/g;\n"
+    minified = minify_js(source)
+    assert "'a  // b'" in minified
+    assert "`x ${y + 1}  z`" in minified
+    assert "/[/]  +/g" in minified
+
+
+def test_line_breaks_kept_for_semicolon_insertion():
+    assert minify_js("let a = 1\nlet b = a\n(b)\n") == "let a=1\nlet b=a\n(b)\n"
+
+
+@pytest.mark.parametrize("source", ["x = y < !--z;\n", "if (a < !b) c();\n", "while (n-- > 0) f();\n"])
+def test_html_comment_markers_are_never_formed(source):
+    minified = minify_js(source)
+    assert "<!--" not in minified
+    assert "-->" not in minified
+
+
+@requires_node
+def test_minified_comparison_keeps_its_meaning():
+    source = "let y = 1, z = 3, x;\nx = y < !--z;\nconsole.log(x, z);\n"
+    outputs = [
+        subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True).stdout
+        for script in (source, minify_js(source))
+    ]
+    assert outputs == ["false 2\n", "false 2\n"]
+
+
+def test_unterminated_input_raises():
+    with pytest.raises(ValueError):
+        minify_js("let a = 1; /* never closed")
+
+
+def test_css():
+    assert minify_css("a {\n  color: red;\n}\n\n/* note */ b > c { margin: 0 }\n") == "a{color:red}b>c{margin:0}\n"
+
+
+@requires_node
+@pytest.mark.parametrize("source", recorded_scripts())
+def test_minified_recorded_games_still_parse(source):
+    if check_javascript(source):
+        pytest.skip("the recorded script does not parse to begin with")
+    assert check_javascript(minify_js(source)) is None
+
+
+def test_bundle_includes_only_this_games_files(tmp_path):
+    executor = GameForgeExecutor(work_dir=str(tmp_path), output_dir=str(tmp_path))
+    executor.write_file("index.html", '<html><script src="js/game.js"></script></html>')
+    executor.write_file("js/game.js", "let score = 0;\n")
+    other = GameForgeExecutor(work_dir=str(tmp_path), output_dir=str(tmp_path / "pong"))
+    other.write_file("index.html", "<html></html>")
+    other.write_file("js/pong.js", "let paddle = 1;\n")
+    (tmp_path / "notes.js").write_text("not written by the executor\n")
+
+    report = bundle_game(str(tmp_path))
+
+    [page, script] = sorted(report.files)
+    assert page == "index.html"
+    assert re.fullmatch(r"js/game\.[0-9a-f]+\.js", script)
+    assert not os.path.exists(os.path.join(report.dist_dir, "pong"))
@@ -0,0 +1,78 @@
+import os
+import time
+
+from benchmarks.stub_server import StubServer
+from src.gameforge.ai_client import GameForgeAI, Message
+from src.gameforge.cache import ResponseCache
+
+MESSAGES = [Message(role="user", content="Make a game")]
+
+
+def entry_path(cache: ResponseCache, key: str) -> str:
+    return os.path.join(cache.cache_dir, key[:2], f"{key}.json")
+
+
+def age(path: str, seconds: float) -> None:
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_key_ignores_dict_order_but_not_values():
+    assert ResponseCache.make_key({"a": 1, "b": [1, 2]}) == ResponseCache.make_key({"b": [1, 2], "a": 1})
+    assert ResponseCache.make_key({"a": 1}) != ResponseCache.make_key({"a": 2})
+
+
+def test_put_then_get(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    assert cache.get("ab" * 32) is None
+    cache.put("ab" * 32, {"text": "hello"})
+    assert cache.get("ab" * 32) == {"text": "hello"}
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_age=60)
+    cache.put("ab" * 32, {"text": "old"})
+    age(entry_path(cache, "ab" * 32), 120)
+    assert cache.get("ab" * 32) is None
+    assert not os.path.exists(entry_path(cache, "ab" * 32))
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("ab" * 32, {"text": "x"})
+    with open(entry_path(cache, "ab" * 32), "w") as f:
+        f.write("{truncated")
+    assert cache.get("ab" * 32) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    keys = [f"{i:02d}" * 32 for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, {"text": "x" * 100})
+        age(entry_path(cache, key), 300 - i * 100)
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0])
+
+    entry_size = os.path.getsize(entry_path(cache, keys[0]))
+    cache.max_bytes = 2 * entry_size
+    cache.evict()
+    assert [os.path.exists(entry_path(cache, key)) for key in keys] == [True, False, True]
+
+
+async def test_identical_requests_are_replayed_from_the_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    with StubServer("Cached reply", latency=0) as server:
+        async with GameForgeAI(api_key="stub", system_prompt="system", base_url=server.base_url, cache=cache) as ai:
+            first = await ai.complete(MESSAGES)
+            second = await ai.complete(MESSAGES)
+            streamed = [chunk async for chunk in ai.chat_stream(MESSAGES)]
+            await ai.complete(MESSAGES, temperature=1.0)
+
+    assert first.text == second.text == "Cached reply"
+    assert first.usage.output_tokens > 0
+    # Hits cost no tokens
+    assert second.usage.total_tokens == 0
+    assert streamed == ["Cached reply"]
+    # Only the first request and the one with different sampling reached the API
+    assert server.stats["requests"] == 2
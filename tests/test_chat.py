@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from benchmarks.stub_server import StubServer
+from src.gameforge.ai_client import GameForgeAI, GameForgeChat
+from src.gameforge.parser import GameForgeParser
+
+from .conftest import written_files
+
+
+def chat_for(ai: GameForgeAI, executor, **kwargs) -> GameForgeChat:
+    return GameForgeChat(ai, GameForgeParser(), executor, **kwargs)
+
+
+def assert_files_written(executor, response: str) -> None:
+    for path, content in written_files(response).items():
+        with open(os.path.join(executor.output_dir, path), "r", encoding="utf-8") as f:
+            assert f.read() == content, path
+
+
+@pytest.mark.parametrize("stream", [False, True])
+async def test_send_message_writes_every_file(executor, recorded_response, stream):
+    with StubServer(recorded_response, latency=0) as server:
+        async with GameForgeAI(api_key="stub", system_prompt="", base_url=server.base_url) as ai:
+            response = await chat_for(ai, executor, stream=stream).send_message("Create the game")
+
+    assert response == recorded_response
+    assert server.stats["requests"] == 1
+    assert_files_written(executor, response)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+async def test_truncated_response_is_continued(executor, recorded_response, stream):
+    with StubServer(recorded_response, latency=0, max_output_tokens=500) as server:
+        async with GameForgeAI(api_key="stub", system_prompt="", base_url=server.base_url) as ai:
+            chat = chat_for(ai, executor, stream=stream, max_continuations=100)
+            response = await chat.send_message("Create the game")
+
+    assert response == recorded_response
+    assert server.stats["requests"] > 1
+    assert_files_written(executor, response)
+
+
+async def test_rate_limited_requests_are_retried(executor, recorded_response):
+    with StubServer(recorded_response, latency=0, errors=[429, 529], retry_after=0.01) as server:
+        async with GameForgeAI(api_key="stub", system_prompt="", base_url=server.base_url) as ai:
+            response = await chat_for(ai, executor).send_message("Create the game")
+
+    assert response == recorded_response
+    assert server.stats["errors_429"] == 1
+    assert server.stats["errors_529"] == 1
+    assert server.stats["requests"] == 3
+
+
+async def test_generate_does_not_execute_actions(executor, recorded_response):
+    with StubServer(recorded_response, latency=0) as server:
+        async with GameForgeAI(api_key="stub", system_prompt="", base_url=server.base_url) as ai:
+            chat = chat_for(ai, executor)
+            response = await chat.generate("Create the game")
+
+    assert response == recorded_response
+    assert [message.role for message in chat.message_history] == ["user", "assistant"]
+    assert os.listdir(executor.output_dir) == []
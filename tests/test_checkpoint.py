@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+from benchmarks.stub_server import StubServer
+from src.gameforge.ai_client import GameForgeAI, GameForgeChat
+from src.gameforge.checkpoint import RunCheckpoint
+from src.gameforge.parser import GameForgeParser
+from src.gameforge.tokens import TokenUsage
+
+from .conftest import written_files
+
+
+def chat_for(ai: GameForgeAI, executor, checkpoint: RunCheckpoint) -> GameForgeChat:
+    return GameForgeChat(ai, GameForgeParser(), executor, checkpoint=checkpoint)
+
+
+def test_state_survives_reload(tmp_path):
+    runs_dir = str(tmp_path)
+    checkpoint = RunCheckpoint.create(runs_dir, "run-1", game_name="blockfall", spec="Make a game")
+    checkpoint.start_message("1", "Make a game")
+    checkpoint.record_round("partial", complete=False, usage=TokenUsage(output_tokens=5))
+    checkpoint.record_action(0)
+
+    loaded = RunCheckpoint.load(runs_dir, "run-1")
+    assert loaded.state["game_name"] == "blockfall"
+    assert loaded.state["spec"] == "Make a game"
+    assert loaded.pending.response == "partial"
+    assert loaded.pending.rounds == 1
+    assert loaded.pending.executed == [0]
+    assert TokenUsage(**loaded.pending.usage).output_tokens == 5
+
+
+def test_same_message_resumes_pending(tmp_path):
+    checkpoint = RunCheckpoint.create(str(tmp_path), "run-1")
+    pending = checkpoint.start_message("1", "Make a game")
+    checkpoint.record_round("partial", complete=False, usage=TokenUsage())
+
+    loaded = RunCheckpoint.load(str(tmp_path))
+    assert loaded.start_message("1", "Make a game").response == "partial"
+    assert loaded.start_message("3", "Something else").response == ""
+    assert pending.message_id == "1"
+
+
+def test_partial_stream_only_grows(tmp_path):
+    checkpoint = RunCheckpoint.create(str(tmp_path), "run-1")
+    checkpoint.start_message("1", "Make a game")
+    checkpoint.record_partial("abc")
+    checkpoint.record_partial("a")
+    assert RunCheckpoint.load(str(tmp_path)).pending.response == "abc"
+
+
+def test_finished_messages_move_to_history(tmp_path):
+    checkpoint = RunCheckpoint.create(str(tmp_path), "run-1")
+    checkpoint.start_message("1", "Make a game")
+    checkpoint.finish_message("Done.")
+    checkpoint.mark_complete()
+
+    loaded = RunCheckpoint.load(str(tmp_path), "run-1")
+    assert loaded.complete
+    assert loaded.pending is None
+    assert loaded.history == [{"role": "user", "content": "Make a game"}, {"role": "assistant", "content": "Done."}]
+
+
+def test_load_latest_and_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        RunCheckpoint.load(str(tmp_path))
+    RunCheckpoint.create(str(tmp_path), "old")
+    newest = RunCheckpoint.create(str(tmp_path), "new")
+    newest.mark_complete()
+    assert RunCheckpoint.load(str(tmp_path)).run_id == "new"
+    with pytest.raises(FileNotFoundError):
+        RunCheckpoint.load(str(tmp_path), "missing")
+
+
+async def test_resumed_run_continues_partial_response(tmp_path, executor, recorded_response):
+    runs_dir = str(tmp_path / "runs")
+    checkpoint = RunCheckpoint.create(runs_dir, "run-1")
+    checkpoint.start_message("1", "Create the game")
+    checkpoint.record_round(recorded_response[:len(recorded_response) // 2], complete=False, usage=TokenUsage())
+    checkpoint.record_action(0)
+
+    resumed = RunCheckpoint.load(runs_dir)
+    with StubServer(recorded_response, latency=0) as server:
+        async with GameForgeAI(api_key="stub", system_prompt="", base_url=server.base_url) as ai:
+            response = await chat_for(ai, executor, checkpoint=resumed).send_message("Create the game")
+
+    assert response == recorded_response
+    assert server.stats["requests"] == 1
+    # The first action ran before the interruption and is not executed again
+    first_path, *other_paths = written_files(response)
+    assert not os.path.exists(os.path.join(executor.output_dir, first_path))
+    assert all(os.path.exists(os.path.join(executor.output_dir, path)) for path in other_paths)
+
+    finished = RunCheckpoint.load(runs_dir, "run-1")
+    assert finished.pending is None
+    assert finished.history == [
+        {"role": "user", "content": "Create the game"},
+        {"role": "assistant", "content": recorded_response},
+    ]
+
+
+async def test_completed_checkpoint_makes_no_request(tmp_path, executor, recorded_response):
+    checkpoint = RunCheckpoint.create(str(tmp_path / "runs"), "run-1")
+    checkpoint.start_message("1", "Create the game")
+    checkpoint.record_round(recorded_response, complete=True, usage=TokenUsage())
+
+    with StubServer(recorded_response, latency=0) as server:
+        async with GameForgeAI(api_key="stub", system_prompt="", base_url=server.base_url) as ai:
+            response = await chat_for(ai, executor, checkpoint=checkpoint).send_message("Create the game")
+
+    assert response == recorded_response
+    assert server.stats.get("requests", 0) == 0
+    for path, content in written_files(response).items():
+        with open(os.path.join(executor.output_dir, path), "r", encoding="utf-8") as f:
+            assert f.read() == content, path
@@ -0,0 +1,56 @@
+from benchmarks.stub_server import StubServer
+from src.gameforge.ai_client import GameForgeAI, GameForgeChat, ResponseStitcher
+from src.gameforge.parser import GameForgeParser
+
+
+def test_stitcher_passes_through_a_fresh_response():
+    stitcher = ResponseStitcher("")
+    assert stitcher.feed("Hello") + stitcher.flush() == "Hello"
+
+
+def test_stitcher_drops_whitespace_the_prefill_removed():
+    stitcher = ResponseStitcher("let x = 1;\n    ")
+    assert stitcher.feed("\n    ") == ""
+    assert stitcher.feed("let y = 2;") == "let y = 2;"
+    assert stitcher.flush() == ""
+
+
+def test_stitcher_drops_reopened_action_tag():
+    previous = '<forgeArtifact id="a" title="A">\n<forgeAction type="file" filePath="a.js">\nlet x'
+    stitcher = ResponseStitcher(previous)
+    assert stitcher.feed('<forgeAction type="fi') == ""
+    assert stitcher.feed('le" filePath="a.js"> = 1;') == " = 1;"
+
+
+def test_stitcher_drops_reopened_artifact_tag():
+    stitcher = ResponseStitcher('<forgeArtifact id="a" title="A">\nText')
+    assert stitcher.feed('<forgeArtifact id="a" title="A">more') == "more"
+
+
+def test_stitcher_keeps_a_new_action_after_a_closed_one():
+    previous = '<forgeArtifact id="a" title="A">\n<forgeAction type="file" filePath="a.js">x</forgeAction>\n'
+    stitcher = ResponseStitcher(previous)
+    chunk = '<forgeAction type="file" filePath="b.js">y</forgeAction>'
+    assert stitcher.feed(chunk) == chunk
+
+
+async def test_continuations_stop_at_the_limit(executor, recorded_response):
+    with StubServer(recorded_response, latency=0, max_output_tokens=200) as server:
+        async with GameForgeAI(api_key="stub", system_prompt="", base_url=server.base_url) as ai:
+            chat = GameForgeChat(ai, GameForgeParser(), executor, max_continuations=2)
+            response = await chat.send_message("Create the game")
+
+    assert server.stats["requests"] == 3
+    assert len(response) < len(recorded_response)
+    assert recorded_response.startswith(response.rstrip())
+
+
+async def test_continuations_stop_when_the_token_budget_is_spent(executor, recorded_response):
+    with StubServer(recorded_response, latency=0, max_output_tokens=200) as server:
+        async with GameForgeAI(api_key="stub", system_prompt="", base_url=server.base_url) as ai:
+            chat = GameForgeChat(ai, GameForgeParser(), executor, max_continuations=100, token_budget=1)
+            response = await chat.generate("Create the game")
+
+    assert server.stats["requests"] == 1
+    assert recorded_response.startswith(response)
+    assert chat.last_usage.output_tokens == chat.usage.output_tokens > 0
@@ -0,0 +1,104 @@
+import os
+import sys
+import sysconfig
+
+from src.gameforge.deps import DependencyCache, parse_pip_install, split_segments
+
+
+def test_split_segments_respects_quotes():
+    assert split_segments("cd 'a && b' && pip install x; ls") == ["cd 'a && b'", "&&", "pip install x", ";", "ls"]
+
+
+def test_parse_pip_install():
+    install = parse_pip_install("python3 -m pip install -U -q pygame 'numpy>=2'")
+    assert install.pip == ["python3", "-m", "pip"]
+    assert install.requirements == ["pygame", "numpy>=2"]
+    assert install.flags == ["-q"]
+    assert parse_pip_install("pip install -e .") is None
+    assert parse_pip_install("pip install $PKG") is None
+    assert parse_pip_install("pip install numpy>=2") is None
+    assert parse_pip_install("pip install pygame | tee log") is None
+    assert parse_pip_install("npm install") is None
+
+
+def test_local_paths_are_resolved_against_cwd(tmp_path):
+    (tmp_path / "mypkg").mkdir()
+    assert parse_pip_install("pip install mypkg", cwd=str(tmp_path)) is None
+    assert parse_pip_install("pip install mypkg", cwd=str(tmp_path / "elsewhere")).requirements == ["mypkg"]
+
+
+def test_cold_install_builds_wheels_then_installs_offline(tmp_path):
+    cache = DependencyCache(str(tmp_path / "cache"))
+    command, pending = cache.rewrite("pip install pygame")
+    assert command == (
+        f"pip wheel --wheel-dir {cache.cache_dir} --find-links {cache.cache_dir} pygame"
+        f" && pip install --no-index --find-links {cache.cache_dir} pygame"
+    )
+    assert pending == ["pygame"]
+
+
+def test_warm_install_is_offline_and_persisted(tmp_path):
+    cache = DependencyCache(str(tmp_path / "cache"))
+    cache.mark_warm(["PyGame"])
+    reloaded = DependencyCache(str(tmp_path / "cache"))
+    command, _ = reloaded.rewrite("mkdir -p assets && pip install pygame")
+    assert command == f"mkdir -p assets && pip install --no-index --find-links {cache.cache_dir} pygame"
+
+
+def test_unrecognised_commands_are_unchanged(tmp_path):
+    cache = DependencyCache(str(tmp_path / "cache"))
+    assert cache.rewrite("npm install && node build.js") == ("npm install && node build.js", [])
+
+
+def test_requirement_file_is_warm_by_contents(tmp_path):
+    cache = DependencyCache(str(tmp_path / "cache"))
+    game = tmp_path / "game"
+    game.mkdir()
+    (game / "requirements.txt").write_text("pygame\nnumpy\n")
+
+    command, pending = cache.rewrite("pip install -r requirements.txt", cwd=str(game))
+    assert command.startswith("pip wheel")
+    cache.mark_warm(pending)
+
+    command, _ = cache.rewrite("pip install -r requirements.txt", cwd=str(game))
+    assert command == f"pip install --no-index --find-links {cache.cache_dir} -r requirements.txt"
+
+    (game / "requirements.txt").write_text("pygame\nnumpy\nrich\n")
+    command, _ = cache.rewrite("pip install -r requirements.txt", cwd=str(game))
+    assert command.startswith("pip wheel")
+
+
+def test_requirement_file_follows_cd(tmp_path):
+    cache = DependencyCache(str(tmp_path / "cache"))
+    (tmp_path / "game").mkdir()
+    (tmp_path / "game" / "requirements.txt").write_text("pygame\n")
+    _, pending = cache.rewrite("cd game && pip install -r requirements.txt", cwd=str(tmp_path))
+    cache.mark_warm(pending)
+
+    command, _ = cache.rewrite("pip install -r requirements.txt", cwd=os.path.join(str(tmp_path), "game"))
+    assert "pip wheel" not in command
+
+
+def test_requirement_file_with_options_never_goes_offline(tmp_path):
+    cache = DependencyCache(str(tmp_path / "cache"))
+    (tmp_path / "requirements.txt").write_text("--index-url https://example.com\npygame\n")
+    _, pending = cache.rewrite("pip install -r requirements.txt", cwd=str(tmp_path))
+    assert pending == []
+    command, _ = cache.rewrite("pip install -r requirements.txt", cwd=str(tmp_path))
+    assert command.startswith("pip wheel")
+
+
+def test_warm_entries_are_per_interpreter_and_platform(tmp_path):
+    cache = DependencyCache(str(tmp_path / "cache"), environment="py3.12-linux-x86_64")
+    cache.mark_warm(["pygame"])
+    assert cache.is_warm("pygame")
+
+    for environment in ("py3.13-linux-x86_64", "py3.12-macosx-14.0-arm64"):
+        other = DependencyCache(str(tmp_path / "cache"), environment=environment)
+        assert not other.is_warm("pygame")
+        assert other.rewrite("pip install pygame")[0].startswith("pip wheel")
+
+
+def test_default_environment_is_this_interpreter(tmp_path):
+    cache = DependencyCache(str(tmp_path / "cache"))
+    assert cache.environment == f"py{sys.version_info.major}.{sys.version_info.minor}-{sysconfig.get_platform()}"
@@ -0,0 +1,51 @@
+import json
+import os
+
+from src.gameforge.executor import MANIFEST_NAME, GameForgeExecutor
+from src.gameforge.parser import ActionType, GameForgeAction
+
+
+def read(executor: GameForgeExecutor, path: str) -> str:
+    with open(os.path.join(executor.output_dir, path), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_new_changed_and_unchanged_writes(executor):
+    assert executor.write_file("js/game.js", "let a = 1;")
+    assert not executor.write_file("js/game.js", "let a = 1;")
+    assert executor.write_file("js/game.js", "let a = 2;")
+
+    summary = executor.pop_summary()
+    assert summary.created == ["js/game.js"]
+    assert summary.unchanged == ["js/game.js"]
+    assert summary.changed == ["js/game.js"]
+    assert read(executor, "js/game.js") == "let a = 2;"
+
+
+def test_manifest_is_persisted(executor):
+    executor.write_file("index.html", "<html></html>")
+    with open(os.path.join(executor.output_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        assert list(json.load(f)) == ["index.html"]
+    reloaded = GameForgeExecutor(work_dir=executor.work_dir, output_dir=executor.output_dir, run_shell=False)
+    assert not reloaded.write_file("index.html", "<html></html>")
+
+
+def test_same_size_external_edit_is_restored(executor):
+    executor.write_file("game.js", "let a = 1;")
+    with open(os.path.join(executor.output_dir, "game.js"), "w", encoding="utf-8") as f:
+        f.write("let b = 1;")
+
+    assert executor.write_file("game.js", "let a = 1;")
+    assert read(executor, "game.js") == "let a = 1;"
+
+
+def test_no_temporary_files_are_left(executor):
+    for i in range(3):
+        executor.write_file("game.js", f"let a = {i};")
+    assert sorted(os.listdir(executor.output_dir)) == [MANIFEST_NAME, "game.js"]
+
+
+def test_file_actions(executor):
+    executor.execute_action(GameForgeAction(ActionType.FILE, "body {}", "css/style.css"))
+    assert read(executor, "css/style.css") == "body {}"
+
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import os
+import re
+
+from src.gameforge.ai_client import Completion, GameForgeChat
+from src.gameforge.executor import GameForgeExecutor
+from src.gameforge.fanout import PlanFanOut, parse_plan, render_artifact
+from src.gameforge.instrumentation import Instrumentation
+from src.gameforge.parser import ActionType, GameForgeAction, GameForgeParser, ParsedResponse
+from src.gameforge.tokens import TokenUsage
+
+PLAN = {
+    "id": "pong",
+    "title": 'Pong "Deluxe" <2>',
+    "files": [
+        {"path": "index.html", "purpose": "page"},
+        {"path": "requirements.txt", "purpose": "dependencies"},
+        {"path": "main.py", "purpose": "server"},
+    ],
+    "shell": ["mkdir -p assets", "pip install -r requirements.txt", "python3 main.py"],
+}
+
+# Slow files arrive after the fast ones, so early setup commands would run before them
+FILE_DELAYS = {"requirements.txt": 0.2}
+
+
+class PlannedAI:
+    """Answers the planning call with PLAN and each per-file call with that file"""
+
+    def __init__(self):
+        self.instrumentation = Instrumentation()
+
+    async def complete(self, messages, temperature=None) -> Completion:
+        prompt = messages[-1].content
+        if "<planning_instructions>" in prompt:
+            return Completion(json.dumps(PLAN), "end_turn", TokenUsage())
+        path = re.search(r"Write ONLY the file (\S+) from the plan", prompt).group(1)
+        await asyncio.sleep(FILE_DELAYS.get(path, 0))
+        text = (f'<forgeArtifact id="{path}" title="{path}">\n'
+                f'<forgeAction type="file" filePath="{path}">\ncontents of {path}\n</forgeAction>\n'
+                f'</forgeArtifact>')
+        return Completion(text, "end_turn", TokenUsage())
+
+
+class RecordingExecutor(GameForgeExecutor):
+    """Skips shell actions but records which planned files existed when each one was due"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shell_runs = []
+
+    async def execute_action_async(self, action: GameForgeAction) -> None:
+        if action.type == ActionType.SHELL:
+            existing = [f["path"] for f in PLAN["files"] if os.path.exists(os.path.join(self.output_dir, f["path"]))]
+            self.shell_runs.append((action.content, sorted(existing)))
+        await super().execute_action_async(action)
+
+
+def test_parse_plan_from_fenced_json():
+    plan = parse_plan(f"Here is the plan:\n```json\n{json.dumps(PLAN)}\n```")
+    assert [f.path for f in plan.files] == ["index.html", "requirements.txt", "main.py"]
+    assert plan.shell == PLAN["shell"]
+
+
+def test_render_artifact_escapes_attributes():
+    parsed = ParsedResponse(artifact_id='a"b', title='Pong "Deluxe" <2> & co', actions=[
+        GameForgeAction(ActionType.FILE, "let x = 1;", "js/game.js"),
+    ])
+    reparsed = GameForgeParser().parse("1", render_artifact(parsed))
+    assert (reparsed.artifact_id, reparsed.title) == ('a"b', 'Pong "Deluxe" <2> & co')
+    assert reparsed.actions == parsed.actions
+    assert not reparsed.errors
+
+
+async def test_setup_commands_wait_for_the_files_they_read(tmp_path):
+    executor = RecordingExecutor(work_dir=str(tmp_path), output_dir=str(tmp_path / "game"), run_shell=False)
+    chat = GameForgeChat(PlannedAI(), GameForgeParser(), executor)
+
+    response = await PlanFanOut(chat).run("Create the game")
+
+    runs = dict(executor.shell_runs)
+    assert runs["mkdir -p assets"] == []
+    assert "requirements.txt" in runs["pip install -r requirements.txt"]
+    assert runs["python3 main.py"] == ["index.html", "main.py", "requirements.txt"]
+
+    # The merged response lists the deferred setup command after the files, as it ran
+    parsed = GameForgeParser().parse("1", response)
+    assert parsed.title == PLAN["title"]
+    assert [action.file_path or action.content for action in parsed.actions] == [
+        "mkdir -p assets", "index.html", "requirements.txt", "main.py",
+        "pip install -r requirements.txt", "python3 main.py",
+    ]
+    assert sorted(chat.write_summary.created) == ["index.html", "main.py", "requirements.txt"]
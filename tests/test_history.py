@@ -0,0 +1,77 @@
+from src.gameforge.ai_client import Message
+from src.gameforge.history import HistoryManager
+
+BIG_FILE = "\n".join(f"let value{i} = {i};" for i in range(200))
+
+
+def file_turn(*files) -> str:
+    actions = "".join(f'<forgeAction type="file" filePath="{path}">\n{content}\n</forgeAction>\n' for path, content in files)
+    return f'Here you go.\n<forgeArtifact id="game" title="Game">\n{actions}</forgeArtifact>'
+
+
+def patch_turn(path: str) -> str:
+    return (
+        f'<forgeArtifact id="game" title="Game">\n<forgeAction type="patch" filePath="{path}">\n'
+        "<<<<<<< SEARCH\nlet x = 1;\n=======\nlet x = 2;\n>>>>>>> REPLACE\n</forgeAction>\n</forgeArtifact>"
+    )
+
+
+def conversation():
+    return [
+        Message(role="user", content="Make a game"),
+        Message(role="assistant", content=file_turn(("a.js", BIG_FILE), ("b.js", "let x = 1;"))),
+        Message(role="user", content="Make it faster"),
+        Message(role="assistant", content=file_turn(("c.js", "let c = 1;"))),
+        Message(role="user", content="Add sound"),
+    ]
+
+
+def write(tmp_path, path: str, content: str) -> None:
+    (tmp_path / path).write_text(content)
+
+
+def test_history_within_budget_is_unchanged(tmp_path):
+    messages = conversation()
+    assert HistoryManager(str(tmp_path), token_budget=100000).build(messages) == messages
+
+
+def test_compacted_turns_are_replaced_by_a_manifest_and_current_files(tmp_path):
+    messages = conversation()
+    write(tmp_path, "a.js", "let edited = true;\n")
+    write(tmp_path, "b.js", "let x = 1;\n")
+    write(tmp_path, "c.js", "let c = 1;\n")
+
+    built = HistoryManager(str(tmp_path), token_budget=500).build(messages)
+
+    assert [message.role for message in built] == [message.role for message in messages]
+    assert built[0] == messages[0]
+    assert "a.js (sha256" in built[1].content
+    assert "let value199" not in built[1].content
+    assert built[3] == messages[3]
+    # Every file the compacted turn wrote is attached with its contents on disk
+    assert "--- a.js ---\nlet edited = true;" in built[-1].content
+    assert "--- b.js ---\nlet x = 1;" in built[-1].content
+    assert "--- c.js ---" not in built[-1].content
+    assert built[-1].content.startswith("Add sound")
+
+
+def test_patch_mode_attaches_files_not_shown_verbatim(tmp_path):
+    messages = conversation()
+    messages[3] = Message(role="assistant", content=patch_turn("b.js"))
+    write(tmp_path, "a.js", BIG_FILE + "\n")
+    write(tmp_path, "b.js", "let x = 2;\n")
+
+    built = HistoryManager(str(tmp_path), token_budget=100000).build(messages, patch_mode=True)
+
+    assert built[:-1] == messages[:-1]
+    assert "--- b.js ---\nlet x = 2;" in built[-1].content
+    assert "--- a.js ---" not in built[-1].content
+
+
+def test_oldest_exchanges_are_dropped_when_still_over_budget(tmp_path):
+    messages = conversation()
+    built = HistoryManager(str(tmp_path), token_budget=1).build(messages)
+    assert len(built) == 3
+    assert built[0] == messages[0]
+    assert "c.js (sha256" in built[1].content
+    assert built[-1].content.startswith("Add sound")
@@ -0,0 +1,79 @@
+import pytest
+
+from benchmarks.stub_server import load_recorded_responses
+from src.gameforge.parser import ActionType, ForgeTokenizer, GameForgeParser
+
+RESPONSES = load_recorded_responses()
+
+SAMPLE = (
+    "Intro text with a < sign and a <b>tag</b>.\n"
+    '<forgeArtifact id="demo" title="Demo">\n'
+    '<forgeAction type="file" filePath="index.html">\n<html><body><script src="a.js"></script></body></html>\n'
+    "</forgeAction>\n"
+    "<forgeAction type='file' filePath='a.js'>\nif (a < b && c > d) { x = '</forge'; }\n</forgeAction>\n"
+    '<forgeAction type="patch" filePath="a.js">\n<<<<<<< SEARCH\nx = 1;\n=======\nx = 2;\n>>>>>>> REPLACE\n'
+    "</forgeAction>\n"
+    '<forgeAction type="shell">\npip install pygame\n</forgeAction>\n'
+    "</forgeArtifact>\nOutro."
+)
+
+
+def feed_in_chunks(text: str, size: int):
+    tokenizer = ForgeTokenizer("chunks")
+    streamed = []
+    for start in range(0, len(text), size):
+        streamed.extend(tokenizer.feed(text[start:start + size]))
+    return streamed, tokenizer.close()
+
+
+def whole(text: str):
+    tokenizer = ForgeTokenizer("whole")
+    tokenizer.feed(text)
+    return tokenizer.close()
+
+
+def test_sample_actions():
+    parsed = whole(SAMPLE)
+    assert parsed.artifact_id == "demo"
+    assert parsed.title == "Demo"
+    assert [(action.type, action.file_path) for action in parsed.actions] == [
+        (ActionType.FILE, "index.html"),
+        (ActionType.FILE, "a.js"),
+        (ActionType.PATCH, "a.js"),
+        (ActionType.SHELL, None),
+    ]
+    assert "x = '</forge'" in parsed.actions[1].content
+    assert not parsed.truncated
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, 64, 1000])
+def test_chunk_boundaries_do_not_change_the_result(size):
+    for text in [SAMPLE] + RESPONSES:
+        expected = whole(text)
+        streamed, parsed = feed_in_chunks(text, size)
+        assert parsed == expected
+        assert streamed == expected.actions
+
+
+def test_actions_are_emitted_as_their_closing_tag_arrives():
+    tokenizer = ForgeTokenizer("stream")
+    head, _ = SAMPLE.split("</forgeAction>", 1)
+    assert tokenizer.feed(head) == []
+    assert [action.file_path for action in tokenizer.feed("</forgeAction>")] == ["index.html"]
+
+
+def test_truncated_response_drops_the_unfinished_action():
+    parsed = whole(SAMPLE[:SAMPLE.index("x = 2;")])
+    assert parsed.truncated
+    assert [action.type for action in parsed.actions] == [ActionType.FILE, ActionType.FILE]
+    assert parsed.errors
+
+
+def test_parser_feed_matches_parse():
+    parser = GameForgeParser()
+    streamed = []
+    for start in range(0, len(SAMPLE), 5):
+        streamed.extend(parser.feed("1", SAMPLE[start:start + 5]))
+    assert streamed == GameForgeParser().parse("2", SAMPLE).actions
+    assert parser.finish("1").actions == streamed
+
@@ -0,0 +1,134 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.gameforge.executor import WriteSummary
+from src.gameforge.parser import ActionType, GameForgeAction
+from src.gameforge.patcher import PatchError, apply_patch, find_block
+from src.gameforge.scheduler import ActionScheduler
+from src.gameforge.validator import GameValidator
+
+ORIGINAL = """function update() {
+    player.x += player.vx;
+    player.y += player.vy;
+}
+
+function draw() {
+    ctx.clearRect(0, 0, width, height);
+    ctx.fillRect(player.x, player.y, 10, 10);
+}
+"""
+
+
+def search_replace(search: str, replace: str) -> str:
+    return f"<<<<<<< SEARCH\n{search}\n=======\n{replace}\n>>>>>>> REPLACE"
+
+
+def test_exact_search_replace():
+    patched = apply_patch(ORIGINAL, search_replace("    player.y += player.vy;", "    player.y += player.vy * dt;"))
+    assert "player.y += player.vy * dt;" in patched
+    assert patched.endswith("}\n")
+
+
+def test_indentation_is_adapted():
+    patch = search_replace("player.x += player.vx;\nplayer.y += player.vy;", "player.x += 1;\nplayer.y += 1;")
+    assert "    player.x += 1;\n    player.y += 1;\n" in apply_patch(ORIGINAL, patch)
+
+
+def test_unified_diff():
+    patch = """--- a/game.js
++++ b/game.js
+@@ -6,3 +6,3 @@
+ function draw() {
+-    ctx.clearRect(0, 0, width, height);
++    ctx.clearRect(0, 0, canvas.width, canvas.height);
+     ctx.fillRect(player.x, player.y, 10, 10);
+"""
+    assert "ctx.clearRect(0, 0, canvas.width, canvas.height);" in apply_patch(ORIGINAL, patch)
+
+
+def test_unified_diff_lines_that_look_like_file_headers():
+    original = "local lives = 3\n-- lose a life\nlives = lives - 1\n"
+    patch = """--- a/game.lua
++++ b/game.lua
+@@ -1,3 +1,3 @@
+ local lives = 3
+--- lose a life
++-- lose one life
+ lives = lives - 1
+"""
+    assert apply_patch(original, patch) == "local lives = 3\n-- lose one life\nlives = lives - 1\n"
+
+
+def test_multi_line_block_matches_fuzzily():
+    lines = ORIGINAL.splitlines()
+    block = ["function draw() {", "    ctx.clearRect(0, 0, width, height)", "    ctx.fillRect(player.x, player.y, 10, 10);"]
+    assert find_block(lines, block) == (5, 8)
+
+
+def test_single_line_is_never_matched_fuzzily():
+    assert find_block(["let x = 1;"], ["let y = 1;"]) is None
+    with pytest.raises(PatchError):
+        apply_patch("let x = 1;\n", search_replace("let y = 1;", "let y = 2;"))
+
+
+def test_ambiguous_exact_match_raises():
+    lines = ["a();", "b();", "a();"]
+    with pytest.raises(PatchError):
+        find_block(lines, ["a();"])
+
+
+def test_ambiguous_loose_match_raises():
+    lines = ["  a();", "b();", "    a();"]
+    with pytest.raises(PatchError):
+        find_block(lines, ["a();"])
+
+
+def test_line_hint_resolves_duplicates():
+    lines = ["a();", "b();", "a();"]
+    assert find_block(lines, ["a();"], line_hint=2) == (2, 3)
+    with pytest.raises(PatchError):
+        find_block(lines, ["a();"], line_hint=1)
+
+
+def test_fuzzy_match_must_clearly_beat_other_places():
+    block = ["if (enemy.hit) {", "    enemy.hp -= 1;", "}"]
+    lines = ["if (enemy.hit) {", "    enemy.hp -= 2;", "}", "if (enemy.hit) {", "    enemy.hp -= 3;", "}"]
+    with pytest.raises(PatchError):
+        find_block(lines, block)
+
+
+def test_unmatched_hunk_raises():
+    with pytest.raises(PatchError):
+        apply_patch(ORIGINAL, search_replace("nothing like this\nat all", "x"))
+
+
+def patch(path: str, search: str, replace: str) -> GameForgeAction:
+    return GameForgeAction(ActionType.PATCH, search_replace(search, replace), path)
+
+
+async def test_failed_patch_skips_later_edits_to_the_file(executor, tmp_path):
+    executor.write_file("game.js", ORIGINAL)
+    executor.pop_summary()
+
+    await ActionScheduler(executor).run([
+        patch("game.js", "nothing like this\nat all", "x"),
+        patch("game.js", "    player.y += player.vy;", "    player.y += player.vy * dt;"),
+        patch("other.js", "a", "b"),
+    ])
+
+    summary = executor.pop_summary()
+    assert summary.failed == ["game.js", "other.js"]
+    assert summary.changed == []
+    assert (tmp_path / "game" / "game.js").read_text() == ORIGINAL
+
+
+async def test_failed_writes_are_reported_by_the_validator(tmp_path):
+    (tmp_path / "game.js").write_text(ORIGINAL)
+    chat = SimpleNamespace(executor=SimpleNamespace(output_dir=str(tmp_path)),
+                           write_summary=WriteSummary(failed=["game.js"]))
+
+    with GameValidator() as validator:
+        report = await validator.validate_and_repair(chat, max_repairs=0)
+
+    assert [(issue.path, issue.check) for issue in report.issues] == [("game.js", "write")]
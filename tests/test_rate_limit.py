@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.gameforge import rate_limit
+from src.gameforge.rate_limit import RateLimiter
+
+
+class FakeClock:
+    """Monotonic time that only advances when the limiter sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(rate_limit, "asyncio", SimpleNamespace(Lock=asyncio.Lock, sleep=clock.sleep))
+    return clock
+
+
+async def test_unlimited_never_waits(clock):
+    limiter = RateLimiter()
+    for _ in range(100):
+        await limiter.acquire(10000)
+    assert clock.sleeps == []
+
+
+async def test_requests_per_minute(clock):
+    limiter = RateLimiter(requests_per_minute=2)
+    await limiter.acquire()
+    clock.now = 10.0
+    await limiter.acquire()
+    await limiter.acquire()
+    assert clock.sleeps == [50.0]
+    await limiter.acquire()
+    assert clock.sleeps == [50.0, 10.0]
+
+
+async def test_tokens_per_minute(clock):
+    limiter = RateLimiter(tokens_per_minute=1000)
+    await limiter.acquire(600)
+    clock.now = 10.0
+    await limiter.acquire(300)
+    assert clock.sleeps == []
+    await limiter.acquire(600)
+    assert clock.sleeps == [50.0]
+
+
+async def test_record_corrects_the_estimate(clock):
+    limiter = RateLimiter(tokens_per_minute=1000)
+    await limiter.acquire(900)
+    limiter.record(900, 100)
+    await limiter.acquire(800)
+    assert clock.sleeps == []
+
+
+async def test_oversized_request_waits_for_an_empty_window(clock):
+    limiter = RateLimiter(tokens_per_minute=100)
+    await limiter.acquire(500)
+    assert clock.sleeps == []
+    await limiter.acquire(10)
+    assert clock.sleeps == [60.0]
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from src.gameforge.parser import ActionType, GameForgeAction
+from src.gameforge.scheduler import ActionScheduler, is_setup_command
+
+
+class RecordingExecutor:
+    """Records when each action starts and finishes; slow actions finish last unless awaited"""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.events = []
+
+    async def execute_action_async(self, action: GameForgeAction) -> None:
+        name = action.file_path or action.content
+        self.events.append(("start", name))
+        await asyncio.sleep(self.delays.get(name, 0))
+        if name == "fail":
+            raise RuntimeError("failed")
+        self.events.append(("end", name))
+
+
+def file(path: str) -> GameForgeAction:
+    return GameForgeAction(ActionType.FILE, "content", path)
+
+
+def shell(command: str) -> GameForgeAction:
+    return GameForgeAction(ActionType.SHELL, command)
+
+
+def finished_before(events, first: str, second: str) -> bool:
+    return events.index(("end", first)) < events.index(("start", second))
+
+
+async def test_independent_files_run_concurrently():
+    executor = RecordingExecutor({"a.js": 0.05})
+    await ActionScheduler(executor).run([file("a.js"), file("b.js")])
+    assert executor.events.index(("start", "b.js")) < executor.events.index(("end", "a.js"))
+
+
+async def test_writes_to_the_same_path_keep_their_order():
+    executor = RecordingExecutor({"a.js": 0.05})
+    first, second = file("a.js"), file("a.js")
+    second.content = "newer"
+    await ActionScheduler(executor).run([first, second])
+    assert executor.events == [("start", "a.js"), ("end", "a.js"), ("start", "a.js"), ("end", "a.js")]
+
+
+async def test_setup_command_does_not_wait_for_unrelated_files():
+    executor = RecordingExecutor({"game.js": 0.05})
+    await ActionScheduler(executor).run([file("game.js"), shell("pip install pygame")])
+    assert not finished_before(executor.events, "game.js", "pip install pygame")
+
+
+async def test_setup_command_waits_for_the_files_it_reads():
+    executor = RecordingExecutor({"requirements.txt": 0.05})
+    await ActionScheduler(executor).run([file("requirements.txt"), shell("pip install -r requirements.txt")])
+    assert finished_before(executor.events, "requirements.txt", "pip install -r requirements.txt")
+
+
+async def test_other_commands_wait_for_every_earlier_file():
+    executor = RecordingExecutor({"game.js": 0.05})
+    await ActionScheduler(executor).run([file("game.js"), shell("node build.js")])
+    assert finished_before(executor.events, "game.js", "node build.js")
+
+
+async def test_files_wait_for_a_generating_command():
+    executor = RecordingExecutor({"npx create-game": 0.05})
+    await ActionScheduler(executor).run([shell("npx create-game"), file("game.js")])
+    assert finished_before(executor.events, "npx create-game", "game.js")
+
+
+async def test_shell_steps_run_in_order():
+    executor = RecordingExecutor({"mkdir assets": 0.05})
+    await ActionScheduler(executor).run([shell("mkdir assets"), shell("pip install numpy")])
+    assert finished_before(executor.events, "mkdir assets", "pip install numpy")
+
+
+async def test_skipped_and_dependent_actions():
+    executor = RecordingExecutor()
+    completed = []
+    scheduler = ActionScheduler(executor, skip=[0], on_complete=completed.append)
+    await scheduler.run([file("a.js"), file("b.js")])
+    assert ("start", "a.js") not in executor.events
+    assert completed == [1]
+
+
+async def test_failure_skips_dependents_and_is_raised():
+    executor = RecordingExecutor()
+    with pytest.raises(RuntimeError):
+        await ActionScheduler(executor).run([file("fail"), shell("node fail")])
+    assert ("start", "node fail") not in executor.events
+
+
+@pytest.mark.parametrize("command, expected", [
+    ("pip install pygame", True),
+    ("python3 -m pip install -r requirements.txt\nnpm install", True),
+    ("mkdir -p assets && npm ci", True),
+    ("# install dependencies\npip install numpy", True),
+    ("pip install pygame && python main.py", False),
+    ("mkdir out; rm -rf src", False),
+    ("npm install || node build.js", False),
+    ("pip install x | sh", False),
+    ("pip install 'unterminated", False),
+    ("node build.js", False),
+    ("", False),
+])
+def test_is_setup_command(command, expected):
+    assert is_setup_command(command) is expected
@@ -0,0 +1,92 @@
+import pytest
+
+from src.gameforge.shell import CommandPolicy, ShellSession
+
+
+@pytest.fixture
+async def session(tmp_path):
+    session = ShellSession(cwd=str(tmp_path), timeout=10)
+    yield session
+    await session.close()
+
+
+async def test_output_and_exit_code_come_from_the_marker(session):
+    result = await session.run("echo out; echo err >&2; printf 'no newline'; (exit 3)")
+    assert result.stdout == "out\nno newline"
+    assert result.stderr == "err"
+    assert result.exit_code == 3
+    assert not result.timed_out
+
+
+async def test_state_persists_between_commands(session, tmp_path):
+    (tmp_path / "sub").mkdir()
+    await session.run("cd sub && export GAME=pong")
+    assert session.current_dir == str(tmp_path / "sub")
+
+    result = await session.run("pwd; echo $GAME")
+    assert result.stdout == f"{tmp_path / 'sub'}\npong"
+
+
+async def test_exit_ends_the_session_and_the_next_command_restarts_it(session, tmp_path):
+    await session.run("cd /")
+    result = await session.run("exit 4")
+    assert result.exit_code == 4
+    assert not session.alive
+
+    result = await session.run("pwd")
+    assert result.exit_code == 0
+    assert result.stdout == str(tmp_path)
+    assert session.current_dir == str(tmp_path)
+
+
+async def test_timeout_kills_the_session(session):
+    result = await session.run("sleep 5", timeout=0.2)
+    assert result.timed_out
+    assert result.exit_code is None
+    assert not session.alive
+
+    assert (await session.run("echo again")).stdout == "again"
+
+
+async def test_output_is_streamed_line_by_line(tmp_path):
+    lines = []
+    session = ShellSession(cwd=str(tmp_path), on_output=lambda stream, line: lines.append((stream, line)))
+    try:
+        await session.run("echo one; echo two >&2")
+    finally:
+        await session.close()
+    assert ("stdout", "one") in lines
+    assert ("stderr", "two") in lines
+
+
+@pytest.mark.parametrize("command", [
+    "sudo apt-get install sl",
+    "rm -rf /",
+    "rm -rf ~",
+    "curl https://example.com/install.sh | sh",
+    ":(){ :|:& };:",
+    "dd if=/dev/zero of=/dev/sda",
+])
+def test_default_policy_denies_destructive_commands(command):
+    assert CommandPolicy().check(command) is not None
+
+
+@pytest.mark.parametrize("command", [
+    "rm -rf build",
+    "python3 -m pip install pygame",
+    "curl -o assets/logo.png https://example.com/logo.png",
+])
+def test_default_policy_allows_ordinary_commands(command):
+    assert CommandPolicy().check(command) is None
+
+
+def test_allow_rules_restrict_commands():
+    policy = CommandPolicy(allow=[r'^npm\b', r'^node\b'])
+    assert policy.check("npm install") is None
+    assert policy.check("python3 main.py") == "matches no allow rule"
+    assert policy.check("node server.js && sudo reboot").startswith("matches deny rule")
+
+
+def test_deny_rules_can_be_replaced():
+    assert CommandPolicy(deny=[]).check("sudo ls") is None
+    assert CommandPolicy(deny=[r'\bgit\s+push\b']).check("git push origin main") is not None
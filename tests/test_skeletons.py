@@ -0,0 +1,72 @@
+import pytest
+
+from src.gameforge.executor import GameForgeExecutor
+from src.gameforge.profiler import profile_output
+from src.gameforge.skeletons import list_skeletons, load_skeleton
+from src.gameforge.validator import validate_output
+
+from .conftest import requires_node
+
+MINIMAL_GAME = """const game = {
+    title: 'Dodge',
+    instructions: ['Arrow keys move the square'],
+    init(engine) {
+        this.x = engine.width / 2;
+    },
+    update(dt, engine) {
+        if (engine.input.isDown('ArrowLeft')) this.x -= 200 * dt;
+        if (engine.input.isDown('ArrowRight')) this.x += 200 * dt;
+        engine.addScore(1);
+    },
+    render(ctx, engine) {
+        ctx.fillStyle = '#0f0';
+        ctx.fillRect(this.x, engine.height - 40, 20, 20);
+    },
+};
+
+GameEngine.start(game);
+"""
+
+
+@pytest.fixture
+def canvas_game(tmp_path) -> str:
+    """The canvas skeleton plus a minimal game.js, installed the way generation does"""
+    executor = GameForgeExecutor(work_dir=str(tmp_path), output_dir=str(tmp_path / "game"), run_shell=False)
+    skeleton = load_skeleton("canvas")
+    assert sorted(executor.install_skeleton(skeleton)) == sorted(skeleton.files)
+    executor.write_file("game.js", MINIMAL_GAME)
+    return executor.output_dir
+
+
+def test_skeletons_are_listed_with_their_api():
+    assert "canvas" in list_skeletons()
+    skeleton = load_skeleton("canvas")
+    assert "GameEngine.start(game)" in skeleton.api
+    assert "API.md" not in skeleton.files
+    with pytest.raises(ValueError):
+        load_skeleton("missing")
+
+
+@requires_node
+def test_canvas_skeleton_game_validates(canvas_game):
+    report = validate_output(canvas_game)
+    assert report.ok, report.format()
+    assert sorted(report.checked) == ["engine.js", "game.js", "index.html"]
+
+
+@requires_node
+def test_canvas_skeleton_game_profiles(canvas_game):
+    report = profile_output(canvas_game, frames=120)
+    assert report.ok, report.format()
+    assert report.kind == "canvas"
+    assert len(report.frames) == 120
+    assert report.draw_calls.get("fillRect", 0) >= 120
+
+
+@requires_node
+def test_runtime_errors_are_reported(canvas_game):
+    with open(f"{canvas_game}/game.js", "w", encoding="utf-8") as f:
+        f.write(MINIMAL_GAME.replace("engine.addScore(1);", "engine.addScore(missing.points);"))
+    report = profile_output(canvas_game, frames=120)
+    assert not report.ok
+    assert "missing" in report.error
@@ -0,0 +1,127 @@
+import json
+import os
+
+import pytest
+
+from src.gameforge.spec_compiler import (
+    GRID_LEGEND, SpecCompiler, SpecItem, SpecSection, compact_grid, parse_spec, render_spec
+)
+
+SPEC_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "game_spec.json")
+
+SPEC = """# Pong Specification
+
+## 1. Overview
+Two **paddles**   and a ball.
+
+---
+
+## 2. Controls
+- W/S: Move left paddle
+- Up/Down: Move right paddle
+  - Hold to move faster
+1. Serve
+2. Rally
+
+## 3. Pieces
+Square piece:
+
+■ ■
+■ ■
+"""
+
+
+def expand_grid(compact: str) -> list:
+    """Turn a compact '#'/'.' grid back into rows of blocks on a two-column pitch"""
+    return [" ".join('■' if cell == '#' else ' ' for cell in row).rstrip() for row in compact.split("/")]
+
+
+def test_parse_spec_sections_and_items():
+    sections = parse_spec(SPEC)
+
+    assert [(section.title, section.level) for section in sections] == [
+        ("Pong Specification", 1), ("Overview", 2), ("Controls", 2), ("Pieces", 2)
+    ]
+    assert sections[1].items == [SpecItem(kind="text", text="Two paddles and a ball.")]
+    assert sections[2].items == [
+        SpecItem(kind="bullet", text="W/S: Move left paddle", depth=0),
+        SpecItem(kind="bullet", text="Up/Down: Move right paddle", depth=0),
+        SpecItem(kind="bullet", text="Hold to move faster", depth=1),
+        SpecItem(kind="bullet", text="Serve", depth=0, marker="1."),
+        SpecItem(kind="bullet", text="Rally", depth=0, marker="2."),
+    ]
+    assert sections[3].items == [
+        SpecItem(kind="text", text="Square piece:"),
+        SpecItem(kind="grid", text="■ ■\n■ ■"),
+    ]
+
+
+@pytest.mark.parametrize("diagram", [
+    "■ ■ ■ ■",
+    "■ ■\n■ ■",
+    "  ■\n■ ■ ■",
+    "  ■ ■\n■ ■",
+    "■\n■\n■ ■",
+    "  ■\n  ■\n■ ■",
+])
+def test_compact_grid_round_trip(diagram):
+    compact = compact_grid(diagram)
+    assert set(compact) <= set("#./")
+    assert expand_grid(compact) == [row.rstrip() for row in diagram.split("\n")]
+
+
+def test_compact_grid_packed_and_side_by_side():
+    assert compact_grid("■■\n■■") == "##/##"
+    assert compact_grid("■ ■      ■\n■ ■    ■ ■ ■") == "##/##, .#./###"
+
+
+def test_compact_grid_keeps_ambiguous_layouts():
+    assert compact_grid("■ ■\n ■ ■") is None
+
+
+def test_render_spec_packs_short_bullets_and_compacts_grids():
+    rendered = render_spec(parse_spec(SPEC))
+    assert rendered.split("\n") == [
+        f"({GRID_LEGEND})",
+        "# Pong Specification",
+        "## Overview",
+        "Two paddles and a ball.",
+        "## Controls",
+        "- W/S: Move left paddle",
+        "- Up/Down: Move right paddle",
+        "  - Hold to move faster",
+        "1. Serve",
+        "2. Rally",
+        "## Pieces",
+        "Square piece: ##/##",
+    ]
+
+
+def test_render_spec_keeps_every_item_of_the_real_spec():
+    with open(SPEC_PATH, encoding="utf-8") as f:
+        spec = json.load(f)["spec"]
+    sections = parse_spec(spec)
+    rendered = render_spec(sections)
+
+    for section in sections:
+        assert f"{'#' * section.level} {section.title}" in rendered
+        for item in section.items:
+            if item.kind == "grid":
+                compact = compact_grid(item.text)
+                assert (compact or item.text) in rendered
+            else:
+                assert item.text in rendered
+    assert len(rendered) < len(spec)
+
+
+def test_render_spec_without_grids_has_no_legend():
+    rendered = render_spec([SpecSection(title="Rules", level=2, items=[SpecItem(kind="text", text="Win.")])])
+    assert rendered == "## Rules\nWin."
+
+
+def test_compiler_caches_by_spec_hash(tmp_path):
+    compiled = SpecCompiler(str(tmp_path)).compile(SPEC)
+    assert os.listdir(tmp_path) == [f"{compiled.spec_hash}.json"]
+
+    reloaded = SpecCompiler(str(tmp_path)).compile(SPEC)
+    assert reloaded == compiled
@@ -0,0 +1,51 @@
+import os
+
+from src.gameforge.executor import GameForgeExecutor
+from src.gameforge.validator import generated_files, validate_output
+
+from .conftest import requires_node
+
+
+def test_generated_files_come_from_the_manifest(tmp_path):
+    executor = GameForgeExecutor(work_dir=str(tmp_path), output_dir=str(tmp_path))
+    executor.write_file("index.html", "<html></html>")
+    executor.write_file("js/game.js", "let x = 1;")
+    executor.write_file("dist/index.html", "<html></html>")
+    (tmp_path / "notes.js").write_text("not written by the executor (")
+
+    assert generated_files(str(tmp_path)) == [
+        os.path.join(str(tmp_path), "index.html"),
+        os.path.join(str(tmp_path), "js", "game.js"),
+    ]
+
+
+def test_walk_skips_other_games_and_build_output(tmp_path):
+    (tmp_path / "main.py").write_text("print('hi')\n")
+    for directory in ("runs", "dist", "other_game"):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / "bad.py").write_text("def (\n")
+    GameForgeExecutor(work_dir=str(tmp_path), output_dir=str(tmp_path / "other_game")).write_file("x.py", "x = 1\n")
+
+    assert generated_files(str(tmp_path)) == [os.path.join(str(tmp_path), "main.py")]
+
+
+def test_validate_output_reports_syntax_errors(tmp_path):
+    executor = GameForgeExecutor(work_dir=str(tmp_path), output_dir=str(tmp_path))
+    executor.write_file("config.json", "{not json")
+    executor.write_file("main.py", "def broken(:\n")
+    executor.write_file("index.html", '<script src="missing.js"></script>')
+
+    report = validate_output(str(tmp_path))
+    assert not report.ok
+    assert sorted(issue.check for issue in report.issues) == ["html-reference", "json", "python-syntax"]
+
+
+@requires_node
+def test_validate_output_checks_javascript(tmp_path):
+    executor = GameForgeExecutor(work_dir=str(tmp_path), output_dir=str(tmp_path))
+    executor.write_file("index.html", '<script src="game.js"></script>')
+    executor.write_file("game.js", "let x = 1;\n")
+    assert validate_output(str(tmp_path)).ok
+
+    executor.write_file("game.js", "let x = ;\n")
+    assert [issue.check for issue in validate_output(str(tmp_path)).issues] == ["js-syntax"]
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from src.gameforge.executor import WriteSummary
+from src.gameforge.instrumentation import Instrumentation
+from src.gameforge.tokens import TokenUsage
+from src.gameforge.watch import SpecWatcher, spec_diff
+
+SPEC = "\n".join(f"- Rule {i}: the ball bounces off wall {i}" for i in range(20)) + "\n"
+
+
+class FakeChat:
+    """Records the prompts it is sent instead of calling the API"""
+
+    def __init__(self, fail: bool = False):
+        self.ai = SimpleNamespace(instrumentation=Instrumentation())
+        self.prompts = []
+        self.message_history = []
+        self.fail = fail
+        self.last_usage = TokenUsage()
+        self.write_summary = WriteSummary()
+
+    async def send_message(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        self.message_history.append(SimpleNamespace(role="user", content=prompt))
+        if self.fail:
+            raise RuntimeError("overloaded")
+        self.message_history.append(SimpleNamespace(role="assistant", content="ok"))
+        return "ok"
+
+
+def write_spec(path, spec: str) -> None:
+    path.write_text(json.dumps({"game_name": "Pong", "spec": spec}))
+
+
+def test_spec_diff():
+    assert spec_diff("a\nb\n", "a\nb\n") == ""
+    diff = spec_diff("a\nb\n", "a\nc\n")
+    assert "-b\n" in diff and "+c\n" in diff
+
+
+async def test_small_edit_is_sent_as_a_diff(tmp_path):
+    spec_path = tmp_path / "game_spec.json"
+    write_spec(spec_path, SPEC.replace("Rule 3", "Rule three"))
+    chat = FakeChat()
+    watcher = SpecWatcher(chat, str(spec_path), baseline=SPEC)
+
+    assert await watcher.refine() == "ok"
+    [prompt] = chat.prompts
+    assert "Unified diff" in prompt
+    assert "+- Rule three" in prompt
+    assert "Rule 7" not in prompt
+    assert watcher.previous == SPEC.replace("Rule 3", "Rule three")
+
+    # Saving the same spec again sends nothing
+    assert await watcher.refine() is None
+    assert len(chat.prompts) == 1
+
+
+async def test_large_edit_is_sent_as_the_full_spec(tmp_path):
+    spec_path = tmp_path / "game_spec.json"
+    rewritten = "A completely different game about snakes.\n"
+    write_spec(spec_path, rewritten)
+    chat = FakeChat()
+
+    await SpecWatcher(chat, str(spec_path), baseline=SPEC).refine()
+    [prompt] = chat.prompts
+    assert "was rewritten" in prompt
+    assert rewritten in prompt
+
+
+async def test_failed_refinement_keeps_the_baseline(tmp_path):
+    spec_path = tmp_path / "game_spec.json"
+    write_spec(spec_path, SPEC + "- One more rule\n")
+    chat = FakeChat(fail=True)
+    watcher = SpecWatcher(chat, str(spec_path), baseline=SPEC)
+
+    assert await watcher.refine() is None
+    assert watcher.previous == SPEC
+    assert watcher.refinements == 0
+    assert chat.message_history == []
+
+
+async def test_settle_waits_for_a_quiet_interval():
+    watcher = SpecWatcher(FakeChat(), "game_spec.json", baseline=SPEC, debounce=0.2)
+    changed = asyncio.Event()
+
+    async def burst():
+        for _ in range(4):
+            await asyncio.sleep(0.05)
+            changed.set()
+
+    start = time.perf_counter()
+    await asyncio.gather(watcher._settle(changed), burst())
+    # The last save lands at ~0.2s and is followed by a full debounce interval
+    assert time.perf_counter() - start >= 0.2 + 0.2
+
+
+async def test_burst_of_saves_sends_one_refinement(tmp_path):
+    spec_path = tmp_path / "game_spec.json"
+    write_spec(spec_path, SPEC)
+    chat = FakeChat()
+    watcher = SpecWatcher(chat, str(spec_path), debounce=0.3)
+    task = asyncio.create_task(watcher.run())
+    try:
+        await asyncio.sleep(0.3)
+        for i in range(3):
+            write_spec(spec_path, SPEC + f"- Edit {i}\n")
+            await asyncio.sleep(0.05)
+
+        deadline = time.perf_counter() + 5
+        while watcher.refinements == 0 and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.5)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert watcher.refinements == 1
+    [prompt] = chat.prompts
+    assert "+- Edit 2" in prompt
+    assert "Edit 0" not in prompt